@@ -29,7 +29,7 @@ from agent.tools.sb_presentation_outline_tool import SandboxPresentationOutlineT
 from agent.tools.sb_presentation_tool import SandboxPresentationTool
 
 from services.langfuse import langfuse
-from langfuse.client import StatefulTraceClient
+from services.trace_export import ExportedTrace
 
 from agent.tools.mcp_tool_wrapper import MCPToolWrapper
 from agent.tools.task_list_tool import TaskListTool
@@ -37,6 +37,7 @@ from agentpress.tool import SchemaType
 from agent.tools.sb_sheets_tool import SandboxSheetsTool
 from agent.tools.sb_web_dev_tool import SandboxWebDevTool
 from agent.tools.sb_upload_file_tool import SandboxUploadFileTool
+from knowledge_base.retrieval import retrieve_agent_kb_context
 
 load_dotenv()
 
@@ -53,7 +54,7 @@ class AgentConfig:
     reasoning_effort: Optional[str] = 'low'
     enable_context_manager: bool = True
     agent_config: Optional[dict] = None
-    trace: Optional[StatefulTraceClient] = None
+    trace: Optional[ExportedTrace] = None
 
 
 class ToolManager:
@@ -270,7 +271,7 @@ class PromptManager:
     async def build_system_prompt(model_name: str, agent_config: Optional[dict], 
                                   thread_id: str, 
                                   mcp_wrapper_instance: Optional[MCPToolWrapper],
-                                  client=None) -> dict:
+                                  client=None, query: Optional[str] = None) -> dict:
         
         default_system_content = get_system_prompt()
         
@@ -304,14 +305,11 @@ class PromptManager:
             try:
                 logger.debug(f"Retrieving agent knowledge base context for agent {agent_config['agent_id']}")
                 
-                # Use only agent-based knowledge base context
-                kb_result = await client.rpc('get_agent_knowledge_base_context', {
-                    'p_agent_id': agent_config['agent_id']
-                }).execute()
+                # Only the chunks most relevant to the user's message, within the token budget
+                kb_context = await retrieve_agent_kb_context(client, agent_config['agent_id'], query=query)
                 
-                if kb_result.data and kb_result.data.strip():
-                    logger.debug(f"Found agent knowledge base context, adding to system prompt (length: {len(kb_result.data)} chars)")
-                    # logger.debug(f"Knowledge base data object: {kb_result.data[:500]}..." if len(kb_result.data) > 500 else f"Knowledge base data object: {kb_result.data}")
+                if kb_context and kb_context.strip():
+                    logger.debug(f"Found agent knowledge base context, adding to system prompt (length: {len(kb_context)} chars)")
                     
                     # Construct a well-formatted knowledge base section
                     kb_section = f"""
@@ -319,7 +317,7 @@ class PromptManager:
                     === AGENT KNOWLEDGE BASE ===
                     NOTICE: The following is your specialized knowledge base. This information should be considered authoritative for your responses and should take precedence over general knowledge when relevant.
 
-                    {kb_result.data}
+                    {kb_context}
 
                     === END AGENT KNOWLEDGE BASE ===
 
@@ -393,7 +391,7 @@ class PromptManager:
 
 
 class MessageManager:
-    def __init__(self, client, thread_id: str, model_name: str, trace: Optional[StatefulTraceClient], 
+    def __init__(self, client, thread_id: str, model_name: str, trace: Optional[ExportedTrace], 
                  agent_config: Optional[dict] = None, enable_context_manager: bool = False):
         self.client = client
         self.thread_id = thread_id
@@ -567,23 +565,26 @@ class AgentRunner:
         await self.setup_tools()
         mcp_wrapper_instance = await self.setup_mcp_tools()
         
+        latest_user_content = None
+        latest_user_message = await self.client.table('messages').select('*').eq('thread_id', self.config.thread_id).eq('type', 'user').order('created_at', desc=True).limit(1).execute()
+        if latest_user_message.data and len(latest_user_message.data) > 0:
+            data = latest_user_message.data[0]['content']
+            if isinstance(data, str):
+                data = json.loads(data)
+            latest_user_content = data['content']
+            if self.config.trace:
+                self.config.trace.update(input=latest_user_content)
+
         system_message = await PromptManager.build_system_prompt(
             self.config.model_name, self.config.agent_config, 
             self.config.thread_id, 
-            mcp_wrapper_instance, self.client
+            mcp_wrapper_instance, self.client,
+            query=latest_user_content if isinstance(latest_user_content, str) else None
         )
         logger.debug(f"model_name received: {self.config.model_name}")
         iteration_count = 0
         continue_execution = True
 
-        latest_user_message = await self.client.table('messages').select('*').eq('thread_id', self.config.thread_id).eq('type', 'user').order('created_at', desc=True).limit(1).execute()
-        if latest_user_message.data and len(latest_user_message.data) > 0:
-            data = latest_user_message.data[0]['content']
-            if isinstance(data, str):
-                data = json.loads(data)
-            if self.config.trace:
-                self.config.trace.update(input=data['content'])
-
         message_manager = MessageManager(self.client, self.config.thread_id, self.config.model_name, self.config.trace, 
                                          agent_config=self.config.agent_config, enable_context_manager=self.config.enable_context_manager)
 
@@ -754,7 +755,7 @@ async def run_agent(
     reasoning_effort: Optional[str] = 'low',
     enable_context_manager: bool = True,
     agent_config: Optional[dict] = None,    
-    trace: Optional[StatefulTraceClient] = None
+    trace: Optional[ExportedTrace] = None
 ):
     effective_model = model_name
     is_tier_default = model_name in ["Kimi K2", "Claude Sonnet 4", "openai/gpt-5-mini"]
@@ -1,8 +1,9 @@
 from agentpress.tool import ToolResult, openapi_schema, usage_example
 from agentpress.thread_manager import ThreadManager
-from sandbox.tool_base import SandboxToolsBase
+from sandbox.tool_base import SandboxServiceError, SandboxToolsBase
 from utils.logger import logger
 from utils.s3_upload_utils import upload_base64_image
+from agent.tools.utils.browser_screenshots import process_screenshot_file
 import asyncio
 import json
 import base64
@@ -11,6 +12,10 @@ import traceback
 from PIL import Image
 from utils.config import config
 
+# Port of the Stagehand browser API (sandbox/docker/browserApi.ts)
+STAGEHAND_API_PORT = 8004
+
+
 class BrowserTool(SandboxToolsBase):
     """
     Browser Tool for browser automation using local Stagehand API.
@@ -25,6 +30,8 @@ class BrowserTool(SandboxToolsBase):
     - browser_screenshot: Take screenshots
     """
 
+    required_services = ("supervisord", "stagehand_api")
+    default_resource_class = "browser"
 
     def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
@@ -136,41 +143,39 @@ class BrowserTool(SandboxToolsBase):
             await self._ensure_sandbox()
             
             
-            # Simple health check curl command
-            curl_cmd = "curl -s -X GET 'http://localhost:8004/api' -H 'Content-Type: application/json'"
+            logger.debug("Checking Stagehand API health")
             
-            logger.debug(f"Checking Stagehand API health with: {curl_cmd}")
+            try:
+                response_body = await self._call_sandbox_service(STAGEHAND_API_PORT, "/api", method="GET", timeout=10)
+            except SandboxServiceError as e:
+                logger.warning(f"Stagehand API server health check failed with exit code {e.exit_code}")
+                return False
             
-            response = await self.sandbox.process.exec(curl_cmd, timeout=10)
-            if response.exit_code == 0:
-                try:
-                    result = json.loads(response.result)
-                    if result.get("status") == "healthy":
-                        logger.debug("✅ Stagehand API server is running and healthy")
-                        return True
-                    else:
-                        # If the browser api is not healthy, we need to restart the browser api
-                        model_api_key = config.GEMINI_API_KEY
+            try:
+                result = json.loads(response_body)
+                if result.get("status") == "healthy":
+                    logger.debug("✅ Stagehand API server is running and healthy")
+                    return True
+                else:
+                    # If the browser api is not healthy, we need to restart the browser api
+                    model_api_key = config.GEMINI_API_KEY
 
-                        response = await self.sandbox.process.exec(f"curl -X POST 'http://localhost:8004/api/init' -H 'Content-Type: application/json' -d '{{\"api_key\": \"{model_api_key}\"}}'", timeout=90)
-                        if response.exit_code == 0:
-                            logger.debug("Stagehand API server restarted successfully")
-                            return True
-                        else:
-                            logger.warning(f"Stagehand API server restart failed: {response.result}")
-                            return False
-                except json.JSONDecodeError:
-                    logger.warning(f"Stagehand API server responded but with invalid JSON: {response.result}")
-                    return False
-            else:
-                logger.warning(f"Stagehand API server health check failed with exit code {response.exit_code}")
+                    try:
+                        await self._call_sandbox_service(STAGEHAND_API_PORT, "/api/init", {"api_key": model_api_key}, timeout=90)
+                        logger.debug("Stagehand API server restarted successfully")
+                        return True
+                    except SandboxServiceError as e:
+                        logger.warning(f"Stagehand API server restart failed: {e}")
+                        return False
+            except json.JSONDecodeError:
+                logger.warning(f"Stagehand API server responded but with invalid JSON: {response_body}")
                 return False
                 
         except Exception as e:
             logger.error(f"Error checking Stagehand API health: {e}")
             return False
 
-    async def _execute_stagehand_api(self, endpoint: str, params: dict = None, method: str = "POST") -> ToolResult:
+    async def _execute_stagehand_api(self, endpoint: str, params: dict = None, method: str = "POST", timeout: int = 30) -> ToolResult:
         """Execute a Stagehand action through the sandbox API"""
         try:
             # Ensure sandbox is initialized
@@ -190,102 +195,98 @@ class BrowserTool(SandboxToolsBase):
                 return self.fail_response(error_msg)
             
             
-            # Build the curl command to call the local Stagehand API
-            url = f"http://localhost:8004/api/{endpoint}"  # Fixed localhost as curl runs inside container
-            
-            if method == "GET" and params:
-                query_params = "&".join([f"{k}={v}" for k, v in params.items()])
-                url = f"{url}?{query_params}"
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-            else:
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                if params:
-                    json_data = json.dumps(params)
-                    curl_cmd += f" -d '{json_data}'"
-            
-            logger.debug(f"\033[95mExecuting curl command:\033[0m\n{curl_cmd}")
-            
-            response = await self.sandbox.process.exec(curl_cmd, timeout=30)  # Execute curl inside sandbox
+            try:
+                response_body = await self._call_sandbox_service(STAGEHAND_API_PORT, f"/api/{endpoint}", params, method, timeout=timeout)
+            except SandboxServiceError as e:
+                # Check if it's a connection error (exit code 7)
+                if e.exit_code == 7:
+                    error_msg = f"Stagehand API server is not available on port {STAGEHAND_API_PORT}. Please ensure the Stagehand API server is running. Error: {e}"
+                    logger.error(error_msg)
+                    return self.fail_response(error_msg)
+                logger.error(f"Stagehand API request failed: {e}")
+                return self.fail_response(f"Stagehand API request failed: {e}")
             
-            if response.exit_code == 0:
-                try:
-                    result = json.loads(response.result)
-                    logger.debug(f"Stagehand API result: {result}")
+            try:
+                result = json.loads(response_body)
+                logger.debug(f"Stagehand API result: {result}")
 
-                    logger.debug("Stagehand API request completed successfully")
+                logger.debug("Stagehand API request completed successfully")
 
-                    if "screenshot_base64" in result:
-                        try:
-                            screenshot_data = result["screenshot_base64"]
-                            is_valid, validation_message = self._validate_base64_image(screenshot_data)
-                            
-                            if is_valid:
-                                logger.debug(f"Screenshot validation passed: {validation_message}")
-                                image_url = await upload_base64_image(screenshot_data)
-                                result["image_url"] = image_url
-                                logger.debug(f"Uploaded screenshot to {image_url}")
-                            else:
-                                logger.warning(f"Screenshot validation failed: {validation_message}")
-                                result["image_validation_error"] = validation_message
-                                
-                            del result["screenshot_base64"]
+                if result.get("screenshot_path"):
+                    await process_screenshot_file(self.sandbox, result)
+                elif "screenshot_base64" in result:
+                    # Browser API images that still return the screenshot inline
+                    try:
+                        screenshot_data = result["screenshot_base64"]
+                        is_valid, validation_message = self._validate_base64_image(screenshot_data)
+                        
+                        if is_valid:
+                            logger.debug(f"Screenshot validation passed: {validation_message}")
+                            image_url = await upload_base64_image(screenshot_data)
+                            result["image_url"] = image_url
+                            logger.debug(f"Uploaded screenshot to {image_url}")
+                        else:
+                            logger.warning(f"Screenshot validation failed: {validation_message}")
+                            result["image_validation_error"] = validation_message
                             
-                        except Exception as e:
-                            logger.error(f"Failed to process screenshot: {e}")
-                            result["image_upload_error"] = str(e)
-                    
-                    result["input"] = params
-                    added_message = await self.thread_manager.add_message(
-                        thread_id=self.thread_id,
-                        type="browser_state",
-                        content=result,
-                        is_llm_message=False
-                    )
+                        del result["screenshot_base64"]
+                        
+                    except Exception as e:
+                        logger.error(f"Failed to process screenshot: {e}")
+                        result["image_upload_error"] = str(e)
 
-                    # Prepare clean response for agent (filter out internal metadata)
-                    # Only include data that's useful for the agent's decision making
-                    clean_result = {
-                        "success": result.get("success", True),
-                        "message": result.get("message", "Stagehand action completed successfully")
-                    }
+                for step in result.get("steps") or []:
+                    if step.get("screenshot_path"):
+                        await process_screenshot_file(self.sandbox, step)
+                
+                result["input"] = params
+                added_message = await self.thread_manager.add_message(
+                    thread_id=self.thread_id,
+                    type="browser_state",
+                    content=result,
+                    is_llm_message=False
+                )
 
-                    # Include only data that actually comes from browserApi.ts
-                    if result.get("url"):
-                        clean_result["url"] = result["url"]
-                    if result.get("title"):
-                        clean_result["title"] = result["title"]
-                    if result.get("action"):
-                        clean_result["action"] = result["action"]
-                    if result.get("image_url"):  # This is screenshot_base64 converted to image_url
-                        clean_result["image_url"] = result["image_url"]
-                    
-                    # Include any error context that's useful for the agent
-                    if result.get("image_validation_error"):
-                        clean_result["screenshot_issue"] = f"Screenshot processing issue: {result['image_validation_error']}"
-                    if result.get("image_upload_error"):
-                        clean_result["screenshot_issue"] = f"Screenshot upload issue: {result['image_upload_error']}"
-                    clean_result["message_id"] = added_message.get("message_id")
+                # Prepare clean response for agent (filter out internal metadata)
+                # Only include data that's useful for the agent's decision making
+                clean_result = {
+                    "success": result.get("success", True),
+                    "message": result.get("message", "Stagehand action completed successfully")
+                }
 
-                    if clean_result.get("success"):
-                        return self.success_response(clean_result)
-                    else:
-                        # Handle error responses with helpful context  
-                        error_msg = result.get("error", result.get("message", "Unknown error"))
-                        clean_result["message"] = error_msg
-                        return self.fail_response(clean_result)
+                # Include only data that actually comes from browserApi.ts
+                if result.get("url"):
+                    clean_result["url"] = result["url"]
+                if result.get("title"):
+                    clean_result["title"] = result["title"]
+                if result.get("action"):
+                    clean_result["action"] = result["action"]
+                if result.get("image_url"):  # This is screenshot_base64 converted to image_url
+                    clean_result["image_url"] = result["image_url"]
+                if result.get("steps"):
+                    clean_result["steps"] = [
+                        {key: value for key, value in step.items() if key != "screenshot_base64"}
+                        for step in result["steps"]
+                    ]
+                
+                # Include any error context that's useful for the agent
+                if result.get("image_validation_error"):
+                    clean_result["screenshot_issue"] = f"Screenshot processing issue: {result['image_validation_error']}"
+                if result.get("image_upload_error"):
+                    clean_result["screenshot_issue"] = f"Screenshot upload issue: {result['image_upload_error']}"
+                clean_result["message_id"] = added_message.get("message_id")
 
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse response JSON: {response.result} {e}")
-                    return self.fail_response(f"Failed to parse response JSON: {response.result} {e}")
-            else:
-                # Check if it's a connection error (exit code 7)
-                if response.exit_code == 7:
-                    error_msg = f"Stagehand API server is not available on port 8004. Please ensure the Stagehand API server is running. Error: {response}"
-                    logger.error(error_msg)
-                    return self.fail_response(error_msg)
+                if clean_result.get("success"):
+                    return self.success_response(clean_result)
                 else:
-                    logger.error(f"Stagehand API request failed: {response}")
-                    return self.fail_response(f"Stagehand API request failed: {response}")
+                    # Handle error responses with helpful context  
+                    error_msg = result.get("error", result.get("message", "Unknown error"))
+                    clean_result["message"] = error_msg
+                    return self.fail_response(clean_result)
+
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse response JSON: {response_body} {e}")
+                return self.fail_response(f"Failed to parse response JSON: {response_body} {e}")
 
         except Exception as e:
             logger.error(f"Error executing Stagehand action: {e}")
@@ -443,3 +444,55 @@ class BrowserTool(SandboxToolsBase):
         """Take a screenshot using Stagehand."""
         logger.debug(f"Browser taking screenshot: {name}")
         return await self._execute_stagehand_api("screenshot", {"name": name})
+
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "browser_batch",
+            "description": "Run a sequence of browser actions in a single call, e.g. navigate to a page, fill in a form and submit it. Much faster than calling the individual browser tools one by one because the page state and screenshot are only captured once, after the last action. Use it when the steps are known upfront; use the individual tools when you need to look at the page between steps.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "actions": {
+                        "type": "array",
+                        "description": "Actions to run in order (at most 20). Each action has a 'type' and its own fields: navigate {url}, act {action, variables, iframes} (natural language, like browser_act), extract {instruction, iframes}, click {selector}, type {selector, text} (CSS selectors, no model call), wait {seconds} (at most 10), screenshot {}.",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {
+                                    "type": "string",
+                                    "enum": ["navigate", "act", "extract", "click", "type", "wait", "screenshot"]
+                                }
+                            },
+                            "required": ["type"]
+                        }
+                    },
+                    "stop_on_error": {
+                        "type": "boolean",
+                        "description": "Stop at the first action that fails",
+                        "default": True
+                    }
+                },
+                "required": ["actions"]
+            }
+        }
+    })
+    @usage_example('''
+        <function_calls>
+        <invoke name="browser_batch">
+        <parameter name="actions">[{"type": "navigate", "url": "https://example.com/login"}, {"type": "act", "action": "fill in the email field with %email%", "variables": {"email": "john.doe@example.com"}}, {"type": "click", "selector": "button[type=submit]"}, {"type": "wait", "seconds": 2}]</parameter>
+        </invoke>
+        </function_calls>
+        ''')
+    async def browser_batch(self, actions: list, stop_on_error: bool = True) -> ToolResult:
+        """Run several browser actions in one request to the Stagehand API."""
+        if isinstance(actions, str):
+            try:
+                actions = json.loads(actions)
+            except json.JSONDecodeError:
+                return self.fail_response("actions must be a JSON list of action objects")
+        if not isinstance(actions, list) or not actions:
+            return self.fail_response("actions must be a non-empty list of action objects")
+        logger.debug(f"Browser running batch of {len(actions)} actions")
+        params = {"actions": actions, "stop_on_error": stop_on_error}
+        return await self._execute_stagehand_api("batch", params, timeout=min(30 * len(actions), 300))
@@ -25,6 +25,8 @@ KEYBOARD_KEYS = [
 
 class ComputerUseTool(SandboxToolsBase):
     """Computer automation tool for controlling the sandbox browser and GUI."""
+
+    default_resource_class = "browser"
     
     def __init__(self, project_id: str, thread_manager):
         """Initialize automation tool with sandbox connection."""
@@ -39,12 +39,13 @@ class ActiveJobsProvider(RapidDataProviderBase):
 
 
 if __name__ == "__main__":
+    import asyncio
     from dotenv import load_dotenv
     load_dotenv()
     tool = ActiveJobsProvider()
 
     # Example for searching active jobs
-    jobs = tool.call_endpoint(
+    jobs = asyncio.run(tool.call_endpoint(
         route="active_jobs",
         payload={
             "limit": "10",
@@ -53,5 +54,5 @@ if __name__ == "__main__":
             "location_filter": "\"United States\" OR \"United Kingdom\"",
             "description_type": "text"
         }
-    )
+    ))
     print("Active Jobs:", jobs)
\ No newline at end of file
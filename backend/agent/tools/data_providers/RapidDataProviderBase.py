@@ -1,7 +1,8 @@
 import os
-import requests
 from typing import Dict, Any, Optional, TypedDict, Literal
 
+from services.http_client import get_http_client
+
 
 class EndpointSchema(TypedDict):
     route: str
@@ -19,7 +20,7 @@ class RapidDataProviderBase:
     def get_endpoints(self):
         return self.endpoints
     
-    def call_endpoint(
+    async def call_endpoint(
             self,
             route: str,
             payload: Optional[Dict[str, Any]] = None
@@ -51,11 +52,12 @@ class RapidDataProviderBase:
         }
 
         method = endpoint.get('method', 'GET').upper()
+        client = get_http_client(url)
         
         if method == 'GET':
-            response = requests.get(url, params=payload, headers=headers)
+            response = await client.get(url, params=payload, headers=headers, follow_redirects=True)
         elif method == 'POST':
-            response = requests.post(url, json=payload, headers=headers)
+            response = await client.post(url, json=payload, headers=headers, follow_redirects=True)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
         return response.json()
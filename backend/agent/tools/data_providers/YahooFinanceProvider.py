@@ -93,61 +93,62 @@ class YahooFinanceProvider(RapidDataProviderBase):
 
 
 if __name__ == "__main__":
+    import asyncio
     from dotenv import load_dotenv
     load_dotenv()
     tool = YahooFinanceProvider()
 
     # Example for getting stock tickers
-    tickers_result = tool.call_endpoint(
+    tickers_result = asyncio.run(tool.call_endpoint(
         route="get_tickers",
         payload={
             "page": 1,
             "type": "STOCKS"
         }
-    )
+    ))
     print("Tickers Result:", tickers_result)
     
     # Example for searching financial instruments
-    search_result = tool.call_endpoint(
+    search_result = asyncio.run(tool.call_endpoint(
         route="search",
         payload={
             "search": "AA"
         }
-    )
+    ))
     print("Search Result:", search_result)
     
     # Example for getting financial news
-    news_result = tool.call_endpoint(
+    news_result = asyncio.run(tool.call_endpoint(
         route="get_news",
         payload={
             "tickers": "AAPL",
             "type": "ALL"
         }
-    )
+    ))
     print("News Result:", news_result)
     
     # Example for getting stock asset profile module
-    stock_module_result = tool.call_endpoint(
+    stock_module_result = asyncio.run(tool.call_endpoint(
         route="get_stock_module",
         payload={
             "ticker": "AAPL",
             "module": "asset-profile"
         }
-    )
+    ))
     print("Asset Profile Result:", stock_module_result)
     
     # Example for getting financial data module
-    financial_data_result = tool.call_endpoint(
+    financial_data_result = asyncio.run(tool.call_endpoint(
         route="get_stock_module",
         payload={
             "ticker": "AAPL",
             "module": "financial-data"
         }
-    )
+    ))
     print("Financial Data Result:", financial_data_result)
     
     # Example for getting SMA indicator data
-    sma_result = tool.call_endpoint(
+    sma_result = asyncio.run(tool.call_endpoint(
         route="get_sma",
         payload={
             "symbol": "AAPL",
@@ -156,11 +157,11 @@ if __name__ == "__main__":
             "time_period": "50",
             "limit": "50"
         }
-    )
+    ))
     print("SMA Result:", sma_result)
     
     # Example for getting RSI indicator data
-    rsi_result = tool.call_endpoint(
+    rsi_result = asyncio.run(tool.call_endpoint(
         route="get_rsi",
         payload={
             "symbol": "AAPL",
@@ -169,22 +170,22 @@ if __name__ == "__main__":
             "time_period": "50",
             "limit": "50"
         }
-    )
+    ))
     print("RSI Result:", rsi_result)
     
     # Example for getting earnings calendar data
-    earnings_calendar_result = tool.call_endpoint(
+    earnings_calendar_result = asyncio.run(tool.call_endpoint(
         route="get_earnings_calendar",
         payload={
             "date": "2023-11-30"
         }
-    )
+    ))
     print("Earnings Calendar Result:", earnings_calendar_result)
     
     # Example for getting insider trades
-    insider_trades_result = tool.call_endpoint(
+    insider_trades_result = asyncio.run(tool.call_endpoint(
         route="get_insider_trades",
         payload={}
-    )
+    ))
     print("Insider Trades Result:", insider_trades_result)
 
@@ -1,7 +1,7 @@
 import json
 from typing import Union, Dict, Any
 
-from agentpress.tool import Tool, ToolResult, openapi_schema, usage_example
+from agentpress.tool import Tool, ToolResult, openapi_schema, usage_example, cacheable
 from agent.tools.data_providers.LinkedinProvider import LinkedinProvider
 from agent.tools.data_providers.YahooFinanceProvider import YahooFinanceProvider
 from agent.tools.data_providers.AmazonProvider import AmazonProvider
@@ -11,6 +11,8 @@ from agent.tools.data_providers.TwitterProvider import TwitterProvider
 class DataProvidersTool(Tool):
     """Tool for making requests to various data providers."""
 
+    default_resource_class = "external_api"
+
     def __init__(self):
         super().__init__()
 
@@ -79,6 +81,7 @@ Use this tool when you need to discover what endpoints are available.
                 simplified_message += "..."
             return self.fail_response(simplified_message)
 
+    @cacheable(ttl=3600, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -162,7 +165,7 @@ Use this tool when you need to discover what endpoints are available.
                 return self.fail_response(f"Endpoint '{route}' not found in {service_name} data provider.")
             
             
-            result = data_provider.call_endpoint(route, payload)
+            result = await data_provider.call_endpoint(route, payload)
             return self.success_response(result)
             
         except Exception as e:
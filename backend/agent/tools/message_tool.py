@@ -9,6 +9,8 @@ class MessageTool(Tool):
     attachments and user takeover suggestions.
     """
 
+    default_resource_class = "control"
+
     def __init__(self):
         super().__init__()
 
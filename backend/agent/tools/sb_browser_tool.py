@@ -6,13 +6,19 @@ from PIL import Image
 
 from agentpress.tool import ToolResult, openapi_schema, usage_example
 from agentpress.thread_manager import ThreadManager
-from sandbox.tool_base import SandboxToolsBase
+from sandbox.tool_base import SandboxToolsBase, SandboxServiceError
 from utils.logger import logger
 from utils.s3_upload_utils import upload_base64_image
+from agent.tools.utils.browser_screenshots import process_screenshot_file
+
+BROWSER_API_PORT = 8003
 
 
 class SandboxBrowserTool(SandboxToolsBase):
     """Tool for executing tasks in a Daytona sandbox with browser-use capabilities."""
+
+    required_services = ("supervisord", "browser_api")
+    default_resource_class = "browser"
     
     def __init__(self, project_id: str, thread_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
@@ -118,100 +124,87 @@ class SandboxBrowserTool(SandboxToolsBase):
             # Ensure sandbox is initialized
             await self._ensure_sandbox()
             
-            # Build the curl command
-            url = f"http://localhost:8003/api/automation/{endpoint}"
-            
-            if method == "GET" and params:
-                query_params = "&".join([f"{k}={v}" for k, v in params.items()])
-                url = f"{url}?{query_params}"
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-            else:
-                curl_cmd = f"curl -s -X {method} '{url}' -H 'Content-Type: application/json'"
-                if params:
-                    json_data = json.dumps(params)
-                    curl_cmd += f" -d '{json_data}'"
-            
-            logger.debug("\033[95mExecuting curl command:\033[0m")
-            logger.debug(f"{curl_cmd}")
-            
-            response = await self.sandbox.process.exec(curl_cmd, timeout=30)
-            
-            if response.exit_code == 0:
-                try:
-                    result = json.loads(response.result)
-
-                    if not "content" in result:
-                        result["content"] = ""
-                    
-                    if not "role" in result:
-                        result["role"] = "assistant"
-
-                    logger.debug("Browser automation request completed successfully")
+            try:
+                response_body = await self._call_sandbox_service(BROWSER_API_PORT, f"/api/automation/{endpoint}", params, method)
+            except SandboxServiceError as e:
+                logger.error(f"Browser automation request failed: {e}")
+                return self.fail_response(f"Browser automation request failed: {e}")
 
-                    if "screenshot_base64" in result:
-                        try:
-                            # Comprehensive validation of the base64 image data
-                            screenshot_data = result["screenshot_base64"]
-                            is_valid, validation_message = self._validate_base64_image(screenshot_data)
-                            
-                            if is_valid:
-                                logger.debug(f"Screenshot validation passed: {validation_message}")
-                                image_url = await upload_base64_image(screenshot_data)
-                                result["image_url"] = image_url
-                                logger.debug(f"Uploaded screenshot to {image_url}")
-                            else:
-                                logger.warning(f"Screenshot validation failed: {validation_message}")
-                                result["image_validation_error"] = validation_message
-                                
-                            # Remove base64 data from result to keep it clean
-                            del result["screenshot_base64"]
+            try:
+                result = json.loads(response_body)
+
+                if not "content" in result:
+                    result["content"] = ""
+                
+                if not "role" in result:
+                    result["role"] = "assistant"
+
+                logger.debug("Browser automation request completed successfully")
+
+                if result.get("screenshot_path"):
+                    await process_screenshot_file(self.sandbox, result)
+                elif "screenshot_base64" in result:
+                    # Browser API images that still return the screenshot inline
+                    try:
+                        # Comprehensive validation of the base64 image data
+                        screenshot_data = result["screenshot_base64"]
+                        is_valid, validation_message = self._validate_base64_image(screenshot_data)
+                        
+                        if is_valid:
+                            logger.debug(f"Screenshot validation passed: {validation_message}")
+                            image_url = await upload_base64_image(screenshot_data)
+                            result["image_url"] = image_url
+                            logger.debug(f"Uploaded screenshot to {image_url}")
+                        else:
+                            logger.warning(f"Screenshot validation failed: {validation_message}")
+                            result["image_validation_error"] = validation_message
                             
-                        except Exception as e:
-                            logger.error(f"Failed to process screenshot: {e}")
-                            result["image_upload_error"] = str(e)
-
-                    added_message = await self.thread_manager.add_message(
-                        thread_id=self.thread_id,
-                        type="browser_state",
-                        content=result,
-                        is_llm_message=False
-                    )
-
-                    success_response = {}
-
-                    if result.get("success"):
-                        success_response["success"] = result["success"]
-                        success_response["message"] = result.get("message", "Browser action completed successfully")
-                    else:
-                        success_response["success"] = False
-                        success_response["message"] = result.get("message", "Browser action failed")
-
-                    if added_message and 'message_id' in added_message:
-                        success_response['message_id'] = added_message['message_id']
-                    if result.get("url"):
-                        success_response["url"] = result["url"]
-                    if result.get("title"):
-                        success_response["title"] = result["title"]
-                    if result.get("element_count"):
-                        success_response["elements_found"] = result["element_count"]
-                    if result.get("pixels_below"):
-                        success_response["scrollable_content"] = result["pixels_below"] > 0
-                    if result.get("ocr_text"):
-                        success_response["ocr_text"] = result["ocr_text"]
-                    if result.get("image_url"):
-                        success_response["image_url"] = result["image_url"]
-
-                    if success_response.get("success"):
-                        return self.success_response(success_response)
-                    else:
-                        return self.fail_response(success_response)
-
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse response JSON: {response.result} {e}")
-                    return self.fail_response(f"Failed to parse response JSON: {response.result} {e}")
-            else:
-                logger.error(f"Browser automation request failed 2: {response}")
-                return self.fail_response(f"Browser automation request failed 2: {response}")
+                        # Remove base64 data from result to keep it clean
+                        del result["screenshot_base64"]
+                        
+                    except Exception as e:
+                        logger.error(f"Failed to process screenshot: {e}")
+                        result["image_upload_error"] = str(e)
+
+                added_message = await self.thread_manager.add_message(
+                    thread_id=self.thread_id,
+                    type="browser_state",
+                    content=result,
+                    is_llm_message=False
+                )
+
+                success_response = {}
+
+                if result.get("success"):
+                    success_response["success"] = result["success"]
+                    success_response["message"] = result.get("message", "Browser action completed successfully")
+                else:
+                    success_response["success"] = False
+                    success_response["message"] = result.get("message", "Browser action failed")
+
+                if added_message and 'message_id' in added_message:
+                    success_response['message_id'] = added_message['message_id']
+                if result.get("url"):
+                    success_response["url"] = result["url"]
+                if result.get("title"):
+                    success_response["title"] = result["title"]
+                if result.get("element_count"):
+                    success_response["elements_found"] = result["element_count"]
+                if result.get("pixels_below"):
+                    success_response["scrollable_content"] = result["pixels_below"] > 0
+                if result.get("ocr_text"):
+                    success_response["ocr_text"] = result["ocr_text"]
+                if result.get("image_url"):
+                    success_response["image_url"] = result["image_url"]
+
+                if success_response.get("success"):
+                    return self.success_response(success_response)
+                else:
+                    return self.fail_response(success_response)
+
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse response JSON: {response_body} {e}")
+                return self.fail_response(f"Failed to parse response JSON: {response_body} {e}")
 
         except Exception as e:
             logger.error(f"Error executing browser action: {e}")
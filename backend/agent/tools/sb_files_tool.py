@@ -1,9 +1,11 @@
 from agentpress.tool import ToolResult, openapi_schema, usage_example
 from sandbox.tool_base import SandboxToolsBase
 from utils.files_utils import should_exclude_file, clean_path
+from agent.tools.utils.workspace_snapshot import build_snapshot_command, parse_snapshot_summary, unpack_snapshot
 from agentpress.thread_manager import ThreadManager
 from utils.logger import logger
 from utils.config import config
+from services.http_client import get_http_client
 import os
 import json
 import litellm
@@ -11,9 +13,13 @@ import openai
 import asyncio
 from typing import Optional
 
+MORPH_API_BASE = "https://api.morphllm.com/v1"
+
 class SandboxFilesTool(SandboxToolsBase):
     """Tool for executing file system operations in a Daytona sandbox. All operations are performed relative to the /workspace directory."""
 
+    required_services = ("supervisord", "http_server")
+
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self.SNIPPET_LINES = 4  # Number of context lines to show around edits
@@ -36,7 +42,64 @@ class SandboxFilesTool(SandboxToolsBase):
             return False
 
     async def get_workspace_state(self) -> dict:
-        """Get the current workspace state by reading all files"""
+        """Get the current workspace state by reading all files.
+
+        Uses a single bulk snapshot of the workspace (packed inside the sandbox
+        and downloaded once); falls back to reading files one by one if the
+        snapshot cannot be taken.
+        """
+        try:
+            snapshot = await self.get_workspace_snapshot()
+            return snapshot["files"]
+        except Exception as e:
+            logger.warning(f"Bulk workspace snapshot failed, reading files individually: {str(e)}")
+            return await self._get_workspace_state_per_file()
+
+    async def get_workspace_snapshot(self, since_token: Optional[str] = None, recursive: bool = False) -> dict:
+        """Take a bulk snapshot of the workspace, optionally relative to an earlier one.
+
+        Args:
+            since_token: Token returned by a previous snapshot. When given (and still
+                known to the sandbox), only files whose content changed since then are
+                returned and removed files are listed under ``deleted``.
+            recursive: Include files in subdirectories, up to the limits in
+                agent.tools.utils.workspace_snapshot; by default only top-level files
+
+        Returns:
+            dict with ``token`` (pass to the next call), ``incremental`` (False if a full
+            snapshot was taken), ``truncated`` (a recursive snapshot hit its limits),
+            ``files`` (path -> content/size/modified) and ``deleted``.
+        """
+        await self._ensure_sandbox()
+
+        command = build_snapshot_command(self.workspace_path, since_token, recursive=recursive)
+        response = await self.sandbox.process.exec(command, timeout=120)
+        if response.exit_code != 0:
+            raise RuntimeError(f"Workspace snapshot failed: {response.result}")
+
+        summary = parse_snapshot_summary(response.result)
+        files_state = {}
+        try:
+            if summary["meta"]:
+                archive = await self.sandbox.fs.download_file(summary["archive"])
+                files_state = unpack_snapshot(archive, summary["meta"])
+        finally:
+            try:
+                await self.sandbox.fs.delete_file(summary["archive"])
+            except Exception as e:
+                logger.debug(f"Could not remove workspace snapshot archive {summary['archive']}: {str(e)}")
+
+        logger.debug(f"Workspace snapshot {summary['token']}: {len(files_state)} files, {len(summary['deleted'])} deleted, incremental={summary['incremental']}")
+        return {
+            "token": summary["token"],
+            "incremental": summary["incremental"],
+            "truncated": summary.get("truncated", False),
+            "files": files_state,
+            "deleted": summary["deleted"],
+        }
+
+    async def _get_workspace_state_per_file(self) -> dict:
+        """Read top-level workspace files one by one (fallback for get_workspace_state)."""
         files_state = {}
         try:
             # Ensure sandbox is initialized
@@ -361,7 +424,8 @@ class SandboxFilesTool(SandboxToolsBase):
                 logger.debug("Using direct Morph API for file editing.")
                 client = openai.AsyncOpenAI(
                     api_key=morph_api_key,
-                    base_url="https://api.morphllm.com/v1"
+                    base_url=MORPH_API_BASE,
+                    http_client=get_http_client(MORPH_API_BASE)
                 )
                 response = await client.chat.completions.create(
                     model="morph-v3-large",
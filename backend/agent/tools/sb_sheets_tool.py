@@ -3,6 +3,7 @@ from __future__ import annotations
 import csv
 import io
 import json
+from collections import OrderedDict
 from dataclasses import dataclass
 from io import BytesIO
 from statistics import mean
@@ -12,6 +13,7 @@ import chardet
 from agentpress.tool import ToolResult, openapi_schema, usage_example
 from sandbox.tool_base import SandboxToolsBase
 from utils.logger import logger
+from utils.offload import blocking, run_blocking
 
 try:
     import openpyxl
@@ -22,6 +24,22 @@ try:
 except Exception:
     openpyxl = None
 
+try:
+    import pandas as pd
+except Exception:
+    pd = None
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except Exception:
+    CSV_ENGINE = "c"
+
+# Parsed sheets kept per tool instance (i.e. per agent run)
+SHEET_CACHE_SIZE = 8
+ENCODING_SAMPLE_BYTES = 64 * 1024
+CSV_EXPORT_CHUNK_ROWS = 10_000
+
 
 @dataclass
 class SheetData:
@@ -29,9 +47,23 @@ class SheetData:
     rows: List[List[Any]]
 
 
+@dataclass
+class _CachedSheet:
+    """A parsed sheet and the (mod_time, size) of the file it was parsed from.
+
+    Holds the rows, a pandas frame with positional columns, or both; the other
+    form is built on first use.
+    """
+    stamp: Tuple[Any, Any]
+    headers: List[str]
+    rows: Optional[List[List[Any]]] = None
+    frame: Any = None
+
+
 class SandboxSheetsTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_manager):
         super().__init__(project_id, thread_manager)
+        self._sheet_cache: "OrderedDict[Tuple[str, Optional[str]], _CachedSheet]" = OrderedDict()
 
     async def _file_exists(self, full_path: str) -> bool:
         try:
@@ -44,16 +76,37 @@ class SandboxSheetsTool(SandboxToolsBase):
         return await self.sandbox.fs.download_file(full_path)
 
     async def _upload_bytes(self, full_path: str, data: bytes, permissions: str = "644") -> None:
+        self._forget_sheet(full_path)
         await self.sandbox.fs.upload_file(data, full_path)
         await self.sandbox.fs.set_file_permissions(full_path, permissions)
 
+    async def _file_stamp(self, full_path: str) -> Tuple[Any, Any]:
+        info = await self.sandbox.fs.get_file_info(full_path)
+        return info.mod_time, info.size
+
+    def _forget_sheet(self, full_path: str) -> None:
+        for key in [k for k in self._sheet_cache if k[0] == full_path]:
+            del self._sheet_cache[key]
+
+    def _cache_key(self, full_path: str, sheet_name: Optional[str]) -> Tuple[str, Optional[str]]:
+        return full_path, (None if full_path.lower().endswith(".csv") else sheet_name)
+
+    def _store_sheet(self, key: Tuple[str, Optional[str]], entry: _CachedSheet) -> None:
+        self._sheet_cache[key] = entry
+        self._sheet_cache.move_to_end(key)
+        while len(self._sheet_cache) > SHEET_CACHE_SIZE:
+            self._sheet_cache.popitem(last=False)
+
     def _detect_encoding(self, data: bytes) -> str:
         try:
-            result = chardet.detect(data)
-            return result.get("encoding") or "utf-8"
+            result = chardet.detect(data[:ENCODING_SAMPLE_BYTES])
+            encoding = result.get("encoding") or "utf-8"
+            # A plain ASCII sample says nothing about the rest of the file
+            return "utf-8" if encoding.lower() == "ascii" else encoding
         except Exception:
             return "utf-8"
 
+    @blocking
     def _read_csv_bytes(self, data: bytes) -> SheetData:
         encoding = self._detect_encoding(data)
         text = data.decode(encoding, errors="replace")
@@ -65,15 +118,62 @@ class SandboxSheetsTool(SandboxToolsBase):
         data_rows = rows[1:] if len(rows) > 1 else []
         return SheetData(headers=headers, rows=data_rows)
 
+    @blocking
+    def _read_csv_frame(self, data: bytes) -> Optional[Tuple[List[str], Any]]:
+        """Parse a CSV into a frame of strings (empty cells stay ""). None if pandas can't parse it."""
+        try:
+            frame = pd.read_csv(
+                BytesIO(data),
+                header=None,
+                dtype=str,
+                keep_default_na=False,
+                encoding=self._detect_encoding(data),
+                engine=CSV_ENGINE,
+            )
+        except Exception as e:
+            # e.g. ragged rows, which the csv module handles
+            logger.debug(f"Columnar CSV parse failed, using csv module: {e}")
+            return None
+        if frame.empty:
+            return [], frame
+        headers = ["" if pd.isna(h) else str(h) for h in frame.iloc[0].tolist()]
+        frame = frame.iloc[1:].reset_index(drop=True)
+        frame.columns = range(frame.shape[1])
+        return headers, frame
+
+    def _rows_to_frame(self, headers: List[str], rows: List[List[Any]]) -> Any:
+        width = max(len(headers), max((len(r) for r in rows), default=0))
+        return pd.DataFrame(rows, columns=range(width))
+
+    def _frame_to_rows(self, frame: Any) -> List[List[Any]]:
+        return frame.astype(object).where(frame.notna(), None).values.tolist()
+
+    def _csv_buffer(self) -> Tuple[BytesIO, io.TextIOWrapper]:
+        # Rows are encoded as they are written, so the CSV isn't held as both str and bytes
+        raw = BytesIO()
+        return raw, io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+
+    @blocking
     def _write_csv_bytes(self, sheet: SheetData) -> bytes:
-        buf = io.StringIO()
+        raw, buf = self._csv_buffer()
         writer = csv.writer(buf)
         if sheet.headers:
             writer.writerow(sheet.headers)
-        for r in sheet.rows:
-            writer.writerow(["" if v is None else v for v in r])
-        return buf.getvalue().encode("utf-8")
+        writer.writerows(["" if v is None else v for v in r] for r in sheet.rows)
+        buf.flush()
+        return raw.getvalue()
+
+    @blocking
+    def _write_frame_csv_bytes(self, headers: List[str], frame: Any) -> bytes:
+        raw, buf = self._csv_buffer()
+        if headers:
+            csv.writer(buf).writerow(headers)
+        # Same "\r\n" row terminator as csv.writer, which wrote the header row
+        frame.to_csv(buf, header=False, index=False, lineterminator="\r\n", chunksize=CSV_EXPORT_CHUNK_ROWS)
+        buf.flush()
+        return raw.getvalue()
 
+    @blocking
     def _read_xlsx_bytes(self, data: bytes, sheet_name: Optional[str]) -> SheetData:
         if not openpyxl:
             raise RuntimeError("openpyxl not available; cannot read XLSX")
@@ -86,6 +186,7 @@ class SandboxSheetsTool(SandboxToolsBase):
         data_rows = [[c for c in r] for r in rows[1:]] if len(rows) > 1 else []
         return SheetData(headers=headers, rows=data_rows)
 
+    @blocking
     def _write_xlsx_bytes(self, sheet: SheetData, sheet_name: Optional[str]) -> bytes:
         if not openpyxl:
             raise RuntimeError("openpyxl not available; cannot write XLSX")
@@ -101,33 +202,108 @@ class SandboxSheetsTool(SandboxToolsBase):
         wb.save(out)
         return out.getvalue()
 
-    async def _load_sheet(self, file_path: str, sheet_name: Optional[str]) -> Tuple[str, SheetData]:
+    async def _load_cached_sheet(self, file_path: str, sheet_name: Optional[str]) -> Tuple[str, _CachedSheet]:
+        """Parse a sheet, or reuse the parse from an earlier call if the file hasn't changed since."""
         file_path = self.clean_path(file_path)
         full_path = f"{self.workspace_path}/{file_path}"
+        is_csv = file_path.lower().endswith(".csv")
+        if not is_csv and not file_path.lower().endswith(".xlsx"):
+            raise ValueError("Unsupported file extension. Use .csv or .xlsx")
+
+        key = self._cache_key(full_path, sheet_name)
+        stamp = await self._file_stamp(full_path)
+        entry = self._sheet_cache.get(key)
+        if entry and entry.stamp == stamp:
+            self._sheet_cache.move_to_end(key)
+            return full_path, entry
+
         data = await self._download_bytes(full_path)
-        if file_path.lower().endswith(".csv"):
-            return full_path, self._read_csv_bytes(data)
-        if file_path.lower().endswith(".xlsx"):
-            return full_path, self._read_xlsx_bytes(data, sheet_name)
-        raise ValueError("Unsupported file extension. Use .csv or .xlsx")
+        parsed = await self._read_csv_frame(data) if is_csv and pd is not None else None
+        if parsed:
+            entry = _CachedSheet(stamp=stamp, headers=parsed[0], frame=parsed[1])
+        else:
+            sheet = await self._read_csv_bytes(data) if is_csv else await self._read_xlsx_bytes(data, sheet_name)
+            entry = _CachedSheet(stamp=stamp, headers=sheet.headers, rows=sheet.rows)
+        self._store_sheet(key, entry)
+        return full_path, entry
+
+    async def _load_sheet(self, file_path: str, sheet_name: Optional[str]) -> Tuple[str, SheetData]:
+        """Load a sheet as rows. The rows are shared with the cache and must not be modified."""
+        full_path, entry = await self._load_cached_sheet(file_path, sheet_name)
+        if entry.rows is None:
+            entry.rows = await run_blocking(self._frame_to_rows, entry.frame)
+        return full_path, SheetData(headers=entry.headers, rows=entry.rows)
+
+    async def _load_frame(self, file_path: str, sheet_name: Optional[str]) -> Tuple[str, List[str], Any]:
+        """Load a sheet as a pandas frame with positional columns, plus its headers."""
+        full_path, entry = await self._load_cached_sheet(file_path, sheet_name)
+        if entry.frame is None:
+            entry.frame = await run_blocking(self._rows_to_frame, entry.headers, entry.rows)
+        return full_path, entry.headers, entry.frame
 
     async def _save_sheet(self, file_path: str, sheet: SheetData, sheet_name: Optional[str]) -> str:
         file_path = self.clean_path(file_path)
         full_path = f"{self.workspace_path}/{file_path}"
         if file_path.lower().endswith(".csv"):
-            await self._upload_bytes(full_path, self._write_csv_bytes(sheet))
+            await self._upload_bytes(full_path, await self._write_csv_bytes(sheet))
         elif file_path.lower().endswith(".xlsx"):
-            await self._upload_bytes(full_path, self._write_xlsx_bytes(sheet, sheet_name))
+            await self._upload_bytes(full_path, await self._write_xlsx_bytes(sheet, sheet_name))
             try:
                 csv_full = f"{full_path.rsplit('.', 1)[0]}.csv"
-                await self._upload_bytes(csv_full, self._write_csv_bytes(sheet))
+                await self._upload_bytes(csv_full, await self._write_csv_bytes(sheet))
             except Exception as e:
                 logger.warning(f"Failed to write CSV mirror for {full_path}: {e}")
         else:
             raise ValueError("Unsupported file extension. Use .csv or .xlsx")
+        try:
+            # The next call on this file can use the sheet as written instead of downloading it again
+            stamp = await self._file_stamp(full_path)
+            self._store_sheet(self._cache_key(full_path, sheet_name), _CachedSheet(stamp=stamp, headers=sheet.headers, rows=sheet.rows))
+        except Exception as e:
+            logger.debug(f"Not caching saved sheet {full_path}: {e}")
         return full_path
 
+    def _numeric_column(self, col: Any) -> Any:
+        """Column as floats (NaN where a cell isn't a number), accepting padded numeric strings."""
+        values = pd.to_numeric(col, errors="coerce")
+        if not pd.api.types.is_numeric_dtype(col) and values.isna().any():
+            try:
+                values = values.fillna(pd.to_numeric(col.str.strip(), errors="coerce"))
+            except AttributeError:
+                pass
+        return values
+
     def _infer_column_types(self, rows: List[List[Any]], headers: List[str]) -> Dict[str, str]:
+        if pd is None:
+            return self._infer_column_types_rows(rows, headers)
+        return self._infer_frame_types(headers, self._rows_to_frame(headers, rows))
+
+    def _infer_frame_types(self, headers: List[str], frame: Any) -> Dict[str, str]:
+        types: Dict[str, str] = {}
+        if not headers:
+            return types
+        for i in range(frame.shape[1]):
+            col = frame[i]
+            present = int(col.notna().sum())
+            numeric = self._numeric_column(col).notna()
+            numeric_count = int(numeric.sum())
+            date_like = 0
+            if not pd.api.types.is_numeric_dtype(col):
+                try:
+                    text = col.str.strip()
+                    date_mask = text.str.contains("[-/]", regex=True) & text.str.contains(r"\d", regex=True)
+                    date_like = int((date_mask.fillna(False).astype(bool) & ~numeric).sum())
+                except AttributeError:
+                    pass
+            detected = "string"
+            if numeric_count >= max(1, present // 2):
+                detected = "number"
+            elif date_like >= max(1, present // 2):
+                detected = "date"
+            types[headers[i] if i < len(headers) else f"col_{i+1}"] = detected
+        return types
+
+    def _infer_column_types_rows(self, rows: List[List[Any]], headers: List[str]) -> Dict[str, str]:
         types: Dict[str, str] = {}
         if not headers:
             return types
@@ -218,7 +394,7 @@ class SandboxSheetsTool(SandboxToolsBase):
                     return self.fail_response("openpyxl not available to update .xlsx")
 
                 data = await self._download_bytes(full_path)
-                wb = openpyxl.load_workbook(BytesIO(data))
+                wb = await run_blocking(openpyxl.load_workbook, BytesIO(data))
                 ws = wb[sheet_name] if sheet_name and sheet_name in wb.sheetnames else wb.active
 
                 header_map: Dict[str, int] = {}
@@ -311,7 +487,7 @@ class SandboxSheetsTool(SandboxToolsBase):
                         return self.fail_response(f"Unsupported operation type: {t}")
 
                 out = BytesIO()
-                wb.save(out)
+                await run_blocking(wb.save, out)
                 await self._upload_bytes(full_path if not save_as else f"{self.workspace_path}/{self.clean_path(save_as)}", out.getvalue())
                 try:
                     csv_full = f"{(full_path if not save_as else f'{self.workspace_path}/{self.clean_path(save_as)}').rsplit('.', 1)[0]}.csv"
@@ -327,7 +503,8 @@ class SandboxSheetsTool(SandboxToolsBase):
                 saved_path = (save_as or file_path)
                 return self.success_response({"updated": f"{self.workspace_path}/{self.clean_path(saved_path)}", "headers": [ws.cell(row=1, column=c).value for c in range(1, (ws.max_column or 0)+1)], "row_count": ws.max_row})
 
-            full_path, sheet = await self._load_sheet(file_path, sheet_name)
+            full_path, cached = await self._load_sheet(file_path, sheet_name)
+            sheet = SheetData(headers=cached.headers, rows=[list(r) for r in cached.rows])
 
             headers = sheet.headers[:] or []
             index_map = self._to_index_map(headers) if headers else {}
@@ -460,20 +637,29 @@ class SandboxSheetsTool(SandboxToolsBase):
     async def view_sheet(self, file_path: str, sheet_name: Optional[str] = None, max_rows: int = 100, export_csv_path: Optional[str] = None) -> ToolResult:
         try:
             await self._ensure_sandbox()
-            full_path, sheet = await self._load_sheet(file_path, sheet_name)
+            full_path, entry = await self._load_cached_sheet(file_path, sheet_name)
             exported_to = None
             if export_csv_path:
                 rel = self.clean_path(export_csv_path)
                 if not rel.lower().endswith(".csv"):
                     rel += ".csv"
                 export_full = f"{self.workspace_path}/{rel}"
-                await self._upload_bytes(export_full, self._write_csv_bytes(sheet))
+                if entry.rows is None:
+                    data = await self._write_frame_csv_bytes(entry.headers, entry.frame)
+                else:
+                    data = await self._write_csv_bytes(SheetData(headers=entry.headers, rows=entry.rows))
+                await self._upload_bytes(export_full, data)
                 exported_to = export_full
-            sample_rows = sheet.rows[: max(0, max_rows)]
+            if entry.rows is None:
+                sample_rows = self._frame_to_rows(entry.frame.head(max(0, max_rows)))
+                row_count = len(entry.frame)
+            else:
+                sample_rows = entry.rows[: max(0, max_rows)]
+                row_count = len(entry.rows)
             return self.success_response({
                 "file_path": full_path,
-                "headers": sheet.headers,
-                "row_count": len(sheet.rows),
+                "headers": entry.headers,
+                "row_count": row_count,
                 "sample_rows": sample_rows,
                 "exported_csv": exported_to
             })
@@ -518,15 +704,15 @@ class SandboxSheetsTool(SandboxToolsBase):
             if exists and not overwrite:
                 return self.fail_response("File already exists. Set overwrite=true to replace.")
             if rel.lower().endswith(".csv"):
-                await self._upload_bytes(full, self._write_csv_bytes(SheetData(headers or [], rows or [])))
+                await self._upload_bytes(full, await self._write_csv_bytes(SheetData(headers or [], rows or [])))
             elif rel.lower().endswith(".xlsx"):
                 if not openpyxl:
                     return self.fail_response("openpyxl not available to create .xlsx")
                 sheet = SheetData(headers or [], rows or [])
-                await self._upload_bytes(full, self._write_xlsx_bytes(sheet, sheet_name))
+                await self._upload_bytes(full, await self._write_xlsx_bytes(sheet, sheet_name))
                 try:
                     csv_full = f"{full.rsplit('.', 1)[0]}.csv"
-                    await self._upload_bytes(csv_full, self._write_csv_bytes(sheet))
+                    await self._upload_bytes(csv_full, await self._write_csv_bytes(sheet))
                 except Exception as e:
                     logger.warning(f"Failed to write CSV mirror for {full}: {e}")
             else:
@@ -536,6 +722,134 @@ class SandboxSheetsTool(SandboxToolsBase):
             logger.exception("create_sheet failed")
             return self.fail_response(f"Error creating sheet: {e}")
 
+    @blocking
+    def _analyze_frame(self, headers: List[str], frame: Any, target_columns: Optional[List[str]], group_by: Optional[str], aggregations: Optional[List[str]]) -> SheetData:
+        idx_map = self._to_index_map(headers)
+        numeric_cols = [c for c in (target_columns or headers) if c in idx_map]
+        values = pd.DataFrame(
+            {i: self._numeric_column(frame[idx_map[col]]) for i, col in enumerate(numeric_cols)},
+            index=frame.index,
+            columns=range(len(numeric_cols)),
+            dtype=float,
+        )
+
+        if group_by and group_by in idx_map:
+            aggs = aggregations or ["count", "sum", "avg", "min", "max"]
+            grouped = values.groupby(frame[idx_map[group_by]], sort=False, dropna=False)
+            stats = {
+                "count": grouped.count(),
+                "sum": grouped.sum(min_count=1),
+                "avg": grouped.mean(),
+                "min": grouped.min(),
+                "max": grouped.max(),
+            }
+            out_headers = [group_by]
+            columns = [stats["count"].index.to_numpy(dtype=object)]
+            for i, col in enumerate(numeric_cols):
+                for agg in aggs:
+                    out_headers.append(f"{col}_{agg}")
+                    columns.append(stats[agg][i].to_numpy(dtype=object))
+            out = pd.DataFrame(dict(enumerate(columns)))
+            return SheetData(headers=out_headers, rows=self._frame_to_rows(out))
+
+        metrics = {
+            "count": values.count(),
+            "sum": values.sum(min_count=1),
+            "avg": values.mean(),
+            "min": values.min(),
+            "max": values.max(),
+        }
+        rows_out = [[name, *(None if pd.isna(v) else v for v in stat.tolist())] for name, stat in metrics.items()]
+        return SheetData(headers=["metric"] + numeric_cols, rows=rows_out)
+
+    def _analyze_rows(self, sheet: SheetData, target_columns: Optional[List[str]], group_by: Optional[str], aggregations: Optional[List[str]]) -> SheetData:
+        headers = sheet.headers
+        idx_map = self._to_index_map(headers)
+
+        def to_float(v: Any) -> Optional[float]:
+            if v is None:
+                return None
+            if isinstance(v, (int, float)):
+                return float(v)
+            try:
+                return float(str(v).strip())
+            except Exception:
+                return None
+
+        numeric_cols = [c for c in (target_columns or headers) if c in idx_map]
+        if group_by and group_by in idx_map:
+            g_idx = idx_map[group_by]
+            groups: Dict[Any, List[List[Any]]] = {}
+            for row in sheet.rows:
+                key = row[g_idx] if len(row) > g_idx else None
+                groups.setdefault(key, []).append(row)
+            out_headers = [group_by]
+            aggs = aggregations or ["count", "sum", "avg", "min", "max"]
+            for col in numeric_cols:
+                for agg in aggs:
+                    out_headers.append(f"{col}_{agg}")
+            summary_rows: List[List[Any]] = []
+            for key, rows in groups.items():
+                row_out = [key]
+                for col in numeric_cols:
+                    c_idx = idx_map[col]
+                    vals = [to_float(r[c_idx]) for r in rows if len(r) > c_idx]
+                    vals = [v for v in vals if v is not None]
+                    count_v = len(vals)
+                    sum_v = sum(vals) if vals else None
+                    avg_v = mean(vals) if vals else None
+                    min_v = min(vals) if vals else None
+                    max_v = max(vals) if vals else None
+                    for agg in aggs:
+                        row_out.append({
+                            "count": count_v,
+                            "sum": sum_v,
+                            "avg": avg_v,
+                            "min": min_v,
+                            "max": max_v
+                        }[agg])
+                summary_rows.append(row_out)
+            return SheetData(headers=out_headers, rows=summary_rows)
+        else:
+            out_headers = ["metric"] + numeric_cols
+            rows_out: List[List[Any]] = []
+            counts = []
+            for col in numeric_cols:
+                c_idx = idx_map[col]
+                vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
+                vals = [v for v in vals if v is not None]
+                counts.append(len(vals))
+            rows_out.append(["count", *counts])
+            sums = []
+            for col in numeric_cols:
+                c_idx = idx_map[col]
+                vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
+                vals = [v for v in vals if v is not None]
+                sums.append(sum(vals) if vals else None)
+            rows_out.append(["sum", *sums])
+            avgs = []
+            for col in numeric_cols:
+                c_idx = idx_map[col]
+                vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
+                vals = [v for v in vals if v is not None]
+                avgs.append(mean(vals) if vals else None)
+            rows_out.append(["avg", *avgs])
+            mins = []
+            for col in numeric_cols:
+                c_idx = idx_map[col]
+                vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
+                vals = [v for v in vals if v is not None]
+                mins.append(min(vals) if vals else None)
+            rows_out.append(["min", *mins])
+            maxs = []
+            for col in numeric_cols:
+                c_idx = idx_map[col]
+                vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
+                vals = [v for v in vals if v is not None]
+                maxs.append(max(vals) if vals else None)
+            rows_out.append(["max", *maxs])
+            return SheetData(headers=out_headers, rows=rows_out)
+
     @openapi_schema({
         "type": "function",
         "function": {
@@ -568,93 +882,12 @@ class SandboxSheetsTool(SandboxToolsBase):
     async def analyze_sheet(self, file_path: str, sheet_name: Optional[str] = None, target_columns: Optional[List[str]] = None, group_by: Optional[str] = None, aggregations: Optional[List[str]] = None, export_csv_path: Optional[str] = None) -> ToolResult:
         try:
             await self._ensure_sandbox()
-            full_path, sheet = await self._load_sheet(file_path, sheet_name)
-            headers = sheet.headers
-            idx_map = self._to_index_map(headers)
-
-            def to_float(v: Any) -> Optional[float]:
-                if v is None:
-                    return None
-                if isinstance(v, (int, float)):
-                    return float(v)
-                try:
-                    return float(str(v).strip())
-                except Exception:
-                    return None
-
-            numeric_cols = [c for c in (target_columns or headers) if c in idx_map]
-            if group_by and group_by in idx_map:
-                g_idx = idx_map[group_by]
-                groups: Dict[Any, List[List[Any]]] = {}
-                for row in sheet.rows:
-                    key = row[g_idx] if len(row) > g_idx else None
-                    groups.setdefault(key, []).append(row)
-                out_headers = [group_by]
-                aggs = aggregations or ["count", "sum", "avg", "min", "max"]
-                for col in numeric_cols:
-                    for agg in aggs:
-                        out_headers.append(f"{col}_{agg}")
-                summary_rows: List[List[Any]] = []
-                for key, rows in groups.items():
-                    row_out = [key]
-                    for col in numeric_cols:
-                        c_idx = idx_map[col]
-                        vals = [to_float(r[c_idx]) for r in rows if len(r) > c_idx]
-                        vals = [v for v in vals if v is not None]
-                        count_v = len(vals)
-                        sum_v = sum(vals) if vals else None
-                        avg_v = mean(vals) if vals else None
-                        min_v = min(vals) if vals else None
-                        max_v = max(vals) if vals else None
-                        for agg in aggs:
-                            row_out.append({
-                                "count": count_v,
-                                "sum": sum_v,
-                                "avg": avg_v,
-                                "min": min_v,
-                                "max": max_v
-                            }[agg])
-                    summary_rows.append(row_out)
-                result_sheet = SheetData(headers=out_headers, rows=summary_rows)
+            if pd is not None:
+                full_path, headers, frame = await self._load_frame(file_path, sheet_name)
+                result_sheet = await self._analyze_frame(headers, frame, target_columns, group_by, aggregations)
             else:
-                out_headers = ["metric"] + numeric_cols
-                rows_out: List[List[Any]] = []
-                counts = []
-                for col in numeric_cols:
-                    c_idx = idx_map[col]
-                    vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
-                    vals = [v for v in vals if v is not None]
-                    counts.append(len(vals))
-                rows_out.append(["count", *counts])
-                sums = []
-                for col in numeric_cols:
-                    c_idx = idx_map[col]
-                    vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
-                    vals = [v for v in vals if v is not None]
-                    sums.append(sum(vals) if vals else None)
-                rows_out.append(["sum", *sums])
-                avgs = []
-                for col in numeric_cols:
-                    c_idx = idx_map[col]
-                    vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
-                    vals = [v for v in vals if v is not None]
-                    avgs.append(mean(vals) if vals else None)
-                rows_out.append(["avg", *avgs])
-                mins = []
-                for col in numeric_cols:
-                    c_idx = idx_map[col]
-                    vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
-                    vals = [v for v in vals if v is not None]
-                    mins.append(min(vals) if vals else None)
-                rows_out.append(["min", *mins])
-                maxs = []
-                for col in numeric_cols:
-                    c_idx = idx_map[col]
-                    vals = [to_float(r[c_idx]) for r in sheet.rows if len(r) > c_idx]
-                    vals = [v for v in vals if v is not None]
-                    maxs.append(max(vals) if vals else None)
-                rows_out.append(["max", *maxs])
-                result_sheet = SheetData(headers=out_headers, rows=rows_out)
+                full_path, sheet = await self._load_sheet(file_path, sheet_name)
+                result_sheet = self._analyze_rows(sheet, target_columns, group_by, aggregations)
 
             exported = None
             if export_csv_path:
@@ -662,7 +895,7 @@ class SandboxSheetsTool(SandboxToolsBase):
                 if not rel.lower().endswith(".csv"):
                     rel += ".csv"
                 export_full = f"{self.workspace_path}/{rel}"
-                await self._upload_bytes(export_full, self._write_csv_bytes(result_sheet))
+                await self._upload_bytes(export_full, await self._write_csv_bytes(result_sheet))
                 exported = export_full
 
             return self.success_response({
@@ -766,7 +999,7 @@ class SandboxSheetsTool(SandboxToolsBase):
             chart_ws = wb.create_sheet(title=f"Chart_{chart_type}")
             chart_ws.add_chart(chart, "A1")
             out = BytesIO()
-            wb.save(out)
+            await run_blocking(wb.save, out)
             await self._upload_bytes(target_full, out.getvalue())
 
             dataset_headers = [x_column] + y_columns
@@ -795,7 +1028,7 @@ class SandboxSheetsTool(SandboxToolsBase):
                 base = self.clean_path(target).rsplit(".", 1)[0]
                 csv_rel = f"{base}_data.csv"
             csv_full = f"{self.workspace_path}/{csv_rel}"
-            await self._upload_bytes(csv_full, self._write_csv_bytes(SheetData(headers=dataset_headers, rows=dataset_rows)))
+            await self._upload_bytes(csv_full, await self._write_csv_bytes(SheetData(headers=dataset_headers, rows=dataset_rows)))
 
             return self.success_response({
                 "source": full,
@@ -851,7 +1084,7 @@ class SandboxSheetsTool(SandboxToolsBase):
             data = await self._download_bytes(full)
             if not openpyxl:
                 return self.fail_response("openpyxl not available")
-            wb = openpyxl.load_workbook(BytesIO(data))
+            wb = await run_blocking(openpyxl.load_workbook, BytesIO(data))
             ws = wb[sheet_name] if sheet_name else wb.active
 
             max_col = ws.max_column
@@ -892,7 +1125,7 @@ class SandboxSheetsTool(SandboxToolsBase):
                         )
 
             out = BytesIO()
-            wb.save(out)
+            await run_blocking(wb.save, out)
             await self._upload_bytes(full, out.getvalue())
             return self.success_response({"formatted": full, "sheet": ws.title})
         except Exception as e:
@@ -0,0 +1,81 @@
+"""
+Handling of screenshots written to disk by the in-sandbox browser API.
+
+The browser API returns a ``screenshot_path`` (plus a small ``thumbnail_base64``)
+instead of the full-resolution image inline. The raw PNG is downloaded from the
+sandbox and uploaded as-is, so it is never base64 encoded on its way to storage.
+
+Usage:
+    from agent.tools.utils.browser_screenshots import process_screenshot_file
+
+    if result.get("screenshot_path"):
+        await process_screenshot_file(self.sandbox, result)
+"""
+
+import io
+
+from PIL import Image
+
+from utils.logger import logger
+from utils.s3_upload_utils import upload_image_bytes
+
+SUPPORTED_FORMATS = {'JPEG', 'PNG', 'GIF', 'BMP', 'WEBP', 'TIFF'}
+MAX_DIMENSION = 8192
+
+
+def validate_image_bytes(image_data: bytes, max_size_mb: int = 10) -> tuple[bool, str]:
+    """Check size limits and the image header (format, dimensions) without decoding pixels."""
+    if not image_data:
+        return False, "Image data is empty"
+
+    max_size_bytes = max_size_mb * 1024 * 1024
+    if len(image_data) > max_size_bytes:
+        return False, f"Image size ({len(image_data)} bytes) exceeds limit ({max_size_bytes} bytes)"
+
+    try:
+        # Image.open only parses the header
+        with Image.open(io.BytesIO(image_data)) as img:
+            if img.format not in SUPPORTED_FORMATS:
+                return False, f"Unsupported image format: {img.format}"
+            width, height = img.size
+    except Exception as e:
+        return False, f"Invalid image data: {str(e)}"
+
+    if width > MAX_DIMENSION or height > MAX_DIMENSION:
+        return False, f"Image dimensions ({width}x{height}) exceed limit ({MAX_DIMENSION}x{MAX_DIMENSION})"
+    if width < 1 or height < 1:
+        return False, f"Invalid image dimensions: {width}x{height}"
+
+    return True, "Valid image"
+
+
+async def process_screenshot_file(sandbox, result: dict):
+    """Upload the screenshot referenced by ``result`` and replace the reference with ``image_url``.
+
+    On failure ``image_validation_error`` or ``image_upload_error`` is set and the
+    thumbnail is kept as ``screenshot_base64``, which the browser view renders when
+    there is no image URL.
+    """
+    screenshot_path = result.pop("screenshot_path")
+    result.pop("screenshot_size", None)
+    thumbnail = result.pop("thumbnail_base64", None)
+
+    try:
+        image_bytes = await sandbox.fs.download_file(screenshot_path)
+        is_valid, validation_message = validate_image_bytes(image_bytes)
+
+        if is_valid:
+            image_url = await upload_image_bytes(
+                image_bytes, "image/png", bucket_name="browser-screenshots", filename_prefix="image"
+            )
+            result["image_url"] = image_url
+            logger.debug(f"Uploaded screenshot to {image_url}")
+        else:
+            logger.warning(f"Screenshot validation failed: {validation_message}")
+            result["image_validation_error"] = validation_message
+    except Exception as e:
+        logger.error(f"Failed to process screenshot {screenshot_path}: {e}")
+        result["image_upload_error"] = str(e)
+
+    if not result.get("image_url") and thumbnail:
+        result["screenshot_base64"] = thumbnail
@@ -0,0 +1,189 @@
+"""
+Bulk workspace snapshots for sandbox file tools.
+
+Rather than listing the workspace and downloading every file with its own
+round trip, a small script is run inside the sandbox that walks the workspace,
+applies the same exclusion rules as ``utils.files_utils.should_exclude_file``,
+and packs the selected files into a single gzip tarball that is downloaded once.
+
+By default only the top-level files of the workspace are included, like the
+per-file reader. A recursive snapshot walks the whole tree but stops after
+MAX_SNAPSHOT_FILES files or MAX_SNAPSHOT_BYTES of file content and reports
+that it was truncated.
+
+Each snapshot writes a manifest (size, mtime and sha256 per file) next to the
+archive inside the sandbox and returns a token naming it. Passing that token to
+the next snapshot makes it incremental: only files whose content changed are
+packed, and files that disappeared are reported as deleted. Archives are only
+removed together with their pruned manifest, so concurrent snapshots never
+delete each other's archive.
+"""
+
+import base64
+import io
+import json
+import tarfile
+from typing import Any, Dict, List, Optional
+
+from utils.files_utils import EXCLUDED_DIRS, EXCLUDED_EXT, EXCLUDED_FILES
+
+SNAPSHOT_STATE_DIR = "/tmp/.workspace_snapshots"
+
+# Manifests kept inside the sandbox; older tokens fall back to a full snapshot.
+MAX_KEPT_MANIFESTS = 5
+
+# Limits of a recursive snapshot
+MAX_SNAPSHOT_FILES = 2000
+MAX_SNAPSHOT_BYTES = 50 * 1024 * 1024
+
+_SNAPSHOT_SCRIPT = r'''
+import datetime, hashlib, json, os, sys, tarfile, time, uuid
+
+args = json.loads(sys.argv[1])
+workspace, state_dir, since = args["workspace"], args["state_dir"], args.get("since")
+excluded_files, excluded_dirs, excluded_ext = set(args["files"]), set(args["dirs"]), set(args["ext"])
+os.makedirs(state_dir, exist_ok=True)
+
+def excluded(rel_path):
+    name = os.path.basename(rel_path)
+    if name in excluded_files:
+        return True
+    if any(d in os.path.dirname(rel_path) for d in excluded_dirs):
+        return True
+    return os.path.splitext(name)[1].lower() in excluded_ext
+
+def sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+previous = {}
+if since:
+    try:
+        with open(os.path.join(state_dir, since + ".json")) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        since = None
+
+def workspace_files():
+    for root, dirs, names in os.walk(workspace):
+        dirs[:] = [d for d in dirs if d not in excluded_dirs] if args["recursive"] else []
+        for name in names:
+            yield os.path.join(root, name)
+
+manifest, changed = {}, []
+total_bytes, truncated = 0, False
+for full in workspace_files():
+    rel = os.path.relpath(full, workspace)
+    if excluded(rel) or not os.path.isfile(full):
+        continue
+    st = os.stat(full)
+    if len(manifest) >= args["max_files"] or total_bytes + st.st_size > args["max_bytes"]:
+        truncated = True
+        break
+    total_bytes += st.st_size
+    prev = previous.get(rel)
+    if prev and prev["size"] == st.st_size and prev["mtime"] == st.st_mtime:
+        digest = prev["sha256"]
+    else:
+        digest = sha256(full)
+    manifest[rel] = {"size": st.st_size, "mtime": st.st_mtime, "sha256": digest}
+    if not prev or prev["sha256"] != digest:
+        changed.append(rel)
+
+token = "%d-%s" % (time.time() * 1000, uuid.uuid4().hex[:8])
+archive = os.path.join(state_dir, token + ".tar.gz")
+with tarfile.open(archive, "w:gz") as tar:
+    for rel in changed:
+        tar.add(os.path.join(workspace, rel), arcname=rel, recursive=False)
+with open(os.path.join(state_dir, token + ".json"), "w") as f:
+    json.dump(manifest, f)
+
+manifests = sorted(n for n in os.listdir(state_dir) if n.endswith(".json"))
+for old in manifests[:-args["keep"]]:
+    os.remove(os.path.join(state_dir, old))
+    # Only the archive of a pruned manifest; others may still be downloading theirs
+    try:
+        os.remove(os.path.join(state_dir, old[:-len(".json")] + ".tar.gz"))
+    except OSError:
+        pass
+
+print(json.dumps({
+    "token": token,
+    "archive": archive,
+    "incremental": bool(since),
+    "truncated": truncated,
+    # A truncated walk does not see every file, so check that missing ones are really gone
+    "deleted": sorted(rel for rel in set(previous) - set(manifest) if not os.path.isfile(os.path.join(workspace, rel))),
+    "meta": {
+        rel: {
+            "size": manifest[rel]["size"],
+            "modified": datetime.datetime.fromtimestamp(manifest[rel]["mtime"]).isoformat(),
+        }
+        for rel in changed
+    },
+}))
+'''
+
+
+def build_snapshot_command(workspace_path: str, since_token: Optional[str] = None, recursive: bool = False) -> str:
+    """Build the shell command that packs the workspace inside the sandbox.
+
+    Args:
+        workspace_path: Absolute path of the workspace in the sandbox
+        since_token: Token from a previous snapshot for incremental mode
+        recursive: Include files in subdirectories (up to the snapshot limits)
+
+    Returns:
+        Shell command printing a JSON summary (token, archive path, deleted
+        paths and metadata of the packed files) on stdout
+    """
+    args = json.dumps({
+        "workspace": workspace_path,
+        "state_dir": SNAPSHOT_STATE_DIR,
+        "since": since_token,
+        "keep": MAX_KEPT_MANIFESTS,
+        "recursive": recursive,
+        "max_files": MAX_SNAPSHOT_FILES,
+        "max_bytes": MAX_SNAPSHOT_BYTES,
+        "files": sorted(EXCLUDED_FILES),
+        "dirs": sorted(EXCLUDED_DIRS),
+        "ext": sorted(EXCLUDED_EXT),
+    })
+    script = base64.b64encode(_SNAPSHOT_SCRIPT.encode()).decode()
+    encoded_args = base64.b64encode(args.encode()).decode()
+    return f'echo {script} | base64 -d > /tmp/workspace_snapshot.py && python3 /tmp/workspace_snapshot.py "$(echo {encoded_args} | base64 -d)"'
+
+
+def unpack_snapshot(archive: bytes, meta: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Decode a snapshot archive into the ``get_workspace_state`` file mapping.
+
+    Binary files that are not valid UTF-8 are skipped, matching the per-file reader.
+    """
+    files_state = {}
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            try:
+                content = tar.extractfile(member).read().decode()
+            except UnicodeDecodeError:
+                continue
+            info = meta.get(member.name, {})
+            files_state[member.name] = {
+                "content": content,
+                "is_dir": False,
+                "size": info.get("size", member.size),
+                "modified": info.get("modified"),
+            }
+    return files_state
+
+
+def parse_snapshot_summary(output: str) -> Dict[str, Any]:
+    """Parse the JSON summary printed by the snapshot script (last non-empty line)."""
+    lines: List[str] = [line for line in output.strip().splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("Workspace snapshot produced no output")
+    return json.loads(lines[-1])
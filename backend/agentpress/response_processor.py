@@ -16,10 +16,13 @@ from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple, Union, Callable, Literal
 from dataclasses import dataclass
 from utils.logger import logger
+from utils.metrics import LLM_INTER_CHUNK_SECONDS, LLM_TOKENS_PER_SECOND, TOOL_EXECUTION_SECONDS, observe_seconds
 from agentpress.tool import ToolResult
 from agentpress.tool_registry import ToolRegistry
+from agentpress.tool_executor import ToolExecutor
+from agentpress.tool_cache import ToolResultCache, resolve_scope_id
 from agentpress.xml_tool_parser import XMLToolParser
-from langfuse.client import StatefulTraceClient
+from services.trace_export import ExportedTrace
 from services.langfuse import langfuse
 from utils.json_helpers import (
     ensure_dict, ensure_list, safe_json_parse, 
@@ -44,6 +47,7 @@ class ToolExecutionContext:
     error: Optional[Exception] = None
     assistant_message_id: Optional[str] = None
     parsing_details: Optional[Dict[str, Any]] = None
+    cache_hit: Optional[bool] = None
 
 @dataclass
 class ProcessorConfig:
@@ -86,7 +90,7 @@ class ProcessorConfig:
 class ResponseProcessor:
     """Processes LLM responses, extracting and executing tool calls."""
     
-    def __init__(self, tool_registry: ToolRegistry, add_message_callback: Callable, trace: Optional[StatefulTraceClient] = None, agent_config: Optional[dict] = None):
+    def __init__(self, tool_registry: ToolRegistry, add_message_callback: Callable, trace: Optional[ExportedTrace] = None, agent_config: Optional[dict] = None):
         """Initialize the ResponseProcessor.
         
         Args:
@@ -103,6 +107,10 @@ class ResponseProcessor:
         self.is_agent_builder = False  # Deprecated - keeping for compatibility
         self.target_agent_id = None  # Deprecated - keeping for compatibility
         self.agent_config = agent_config
+        # Shared by streamed and batched tool calls so resource limits apply across both
+        self.tool_executor = ToolExecutor(tool_registry, self._execute_tool)
+        self.tool_cache = ToolResultCache()
+        self._tool_cache_outcomes: Dict[int, bool] = {}  # id(tool_call) -> cache hit
 
     async def _yield_message(self, message_obj: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Helper to yield a message with proper formatting.
@@ -276,6 +284,8 @@ class ResponseProcessor:
                 current_time = datetime.now(timezone.utc).timestamp()
                 if streaming_metadata["first_chunk_time"] is None:
                     streaming_metadata["first_chunk_time"] = current_time
+                else:
+                    LLM_INTER_CHUNK_SECONDS.labels(model=llm_model).observe(current_time - streaming_metadata["last_chunk_time"])
                 streaming_metadata["last_chunk_time"] = current_time
                 
                 # Extract metadata from chunk attributes
@@ -291,6 +301,15 @@ class ResponseProcessor:
                         streaming_metadata["usage"]["completion_tokens"] = chunk.usage.completion_tokens
                     if hasattr(chunk.usage, 'total_tokens') and chunk.usage.total_tokens is not None:
                         streaming_metadata["usage"]["total_tokens"] = chunk.usage.total_tokens
+                    # Prompt cache reads and writes (Anthropic reports both; others only cached reads)
+                    cache_read_tokens = getattr(chunk.usage, 'cache_read_input_tokens', None)
+                    if cache_read_tokens is None:
+                        cache_read_tokens = getattr(getattr(chunk.usage, 'prompt_tokens_details', None), 'cached_tokens', None)
+                    if cache_read_tokens is not None:
+                        streaming_metadata["usage"]["cache_read_input_tokens"] = cache_read_tokens
+                    cache_creation_tokens = getattr(chunk.usage, 'cache_creation_input_tokens', None)
+                    if cache_creation_tokens is not None:
+                        streaming_metadata["usage"]["cache_creation_input_tokens"] = cache_creation_tokens
 
                 if hasattr(chunk, 'choices') and chunk.choices and hasattr(chunk.choices[0], 'finish_reason') and chunk.choices[0].finish_reason:
                     finish_reason = chunk.choices[0].finish_reason
@@ -352,7 +371,7 @@ class ResponseProcessor:
                                         if started_msg_obj: yield format_for_yield(started_msg_obj)
                                         yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                        execution_task = asyncio.create_task(self._execute_tool(tool_call))
+                                        execution_task = self.tool_executor.submit(tool_call)
                                         pending_tool_executions.append({
                                             "task": execution_task, "tool_call": tool_call,
                                             "tool_index": tool_index, "context": context
@@ -422,7 +441,7 @@ class ResponseProcessor:
                                 if started_msg_obj: yield format_for_yield(started_msg_obj)
                                 yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                execution_task = asyncio.create_task(self._execute_tool(tool_call_data))
+                                execution_task = self.tool_executor.submit(tool_call_data)
                                 pending_tool_executions.append({
                                     "task": execution_task, "tool_call": tool_call_data,
                                     "tool_index": tool_index, "context": context
@@ -469,6 +488,22 @@ class ResponseProcessor:
                     logger.warning(f"Failed to calculate usage: {str(e)}")
                     self.trace.event(name="failed_to_calculate_usage", level="WARNING", status_message=(f"Failed to calculate usage: {str(e)}"))
 
+            usage = streaming_metadata["usage"]
+            if streaming_metadata["first_chunk_time"] is not None:
+                streaming_seconds = streaming_metadata["last_chunk_time"] - streaming_metadata["first_chunk_time"]
+                if streaming_seconds > 0 and usage["completion_tokens"] > 0:
+                    LLM_TOKENS_PER_SECOND.labels(model=llm_model).observe(usage["completion_tokens"] / streaming_seconds)
+
+            if "cache_read_input_tokens" in usage or "cache_creation_input_tokens" in usage:
+                logger.debug(
+                    f"Prompt cache: {usage.get('cache_read_input_tokens', 0)} tokens read, "
+                    f"{usage.get('cache_creation_input_tokens', 0)} written, {usage['prompt_tokens']} prompt tokens"
+                )
+                self.trace.event(name="prompt_cache_usage", level="DEFAULT", status_message=(
+                    f"cache_read_input_tokens={usage.get('cache_read_input_tokens', 0)} "
+                    f"cache_creation_input_tokens={usage.get('cache_creation_input_tokens', 0)} "
+                    f"prompt_tokens={usage['prompt_tokens']}"
+                ))
 
             # Wait for pending tool executions from streaming phase
             tool_results_buffer = [] # Stores (tool_call, result, tool_index, context)
@@ -478,6 +513,7 @@ class ResponseProcessor:
                 # ... (asyncio.wait logic) ...
                 pending_tasks = [execution["task"] for execution in pending_tool_executions]
                 done, _ = await asyncio.wait(pending_tasks)
+                self.trace.event(name="streamed_tool_executions_completed", level="DEFAULT", status_message=(f"Streamed tool executions completed"), metadata={"timings": [vars(t) for t in self.tool_executor.drain_timings()]})
 
                 for execution in pending_tool_executions:
                     tool_idx = execution.get("tool_index", -1)
@@ -1292,9 +1328,22 @@ class ResponseProcessor:
                 span.end(status_message="tool_not_found", level="ERROR")
                 return ToolResult(success=False, output=f"Tool function '{function_name}' not found")
             
+            cache_policy = self.tool_registry.get_cache_policy(function_name)
+            scope_id = None
+            if cache_policy:
+                scope_id = resolve_scope_id(cache_policy, self.tool_registry.get_tool(function_name).get('instance'))
+            if scope_id:
+                cached_result = await self.tool_cache.get(function_name, arguments, scope_id)
+                self._tool_cache_outcomes[id(tool_call)] = cached_result is not None
+                if cached_result:
+                    span.end(status_message="tool_cache_hit", output=cached_result)
+                    return cached_result
+
             logger.debug(f"Found tool function for '{function_name}', executing...")
             result = await tool_fn(**arguments)
             logger.debug(f"Tool execution complete: {function_name} -> {result}")
+            if scope_id:
+                await self.tool_cache.set(function_name, arguments, scope_id, result, cache_policy.ttl)
             span.end(status_message="tool_executed", output=result)
             return result
         except Exception as e:
@@ -1316,7 +1365,7 @@ class ResponseProcessor:
             tool_calls: List of tool calls to execute
             execution_strategy: Strategy for executing tools:
                 - "sequential": Execute tools one after another, waiting for each to complete
-                - "parallel": Execute all tools simultaneously for better performance 
+                - "parallel": Execute tools concurrently, bounded by their resource classes
                 
         Returns:
             List of tuples containing the original tool call and its result
@@ -1358,7 +1407,8 @@ class ResponseProcessor:
                 logger.debug(f"Executing tool {index+1}/{len(tool_calls)}: {tool_name}")
                 
                 try:
-                    result = await self._execute_tool(tool_call)
+                    with observe_seconds(TOOL_EXECUTION_SECONDS.labels(function_name=tool_name)):
+                        result = await self._execute_tool(tool_call)
                     results.append((tool_call, result))
                     logger.debug(f"Completed tool {tool_name} with success={result.success}")
                     
@@ -1392,10 +1442,12 @@ class ResponseProcessor:
             return completed_results + error_results
 
     async def _execute_tools_in_parallel(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
-        """Execute tool calls in parallel and return results.
+        """Execute tool calls concurrently, bounded by their resource classes.
         
-        This method executes all tool calls simultaneously using asyncio.gather, which
-        can significantly improve performance when executing multiple independent tools.
+        Calls are dispatched through the shared ToolExecutor: calls on independent
+        resources (e.g. web search and a sandbox file edit) run at the same time, while
+        calls contending for the same resource (e.g. two browser actions) run one after
+        another in the order they were issued.
         
         Args:
             tool_calls: List of tool calls to execute
@@ -1411,26 +1463,11 @@ class ResponseProcessor:
             logger.debug(f"Executing {len(tool_calls)} tools in parallel: {tool_names}")
             self.trace.event(name="executing_tools_in_parallel", level="DEFAULT", status_message=(f"Executing {len(tool_calls)} tools in parallel: {tool_names}"))
             
-            # Create tasks for all tool calls
-            tasks = [self._execute_tool(tool_call) for tool_call in tool_calls]
+            processed_results = await self.tool_executor.execute(tool_calls)
+            timings = [vars(t) for t in self.tool_executor.drain_timings()]
             
-            # Execute all tasks concurrently with error handling
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results and handle any exceptions
-            processed_results = []
-            for i, (tool_call, result) in enumerate(zip(tool_calls, results)):
-                if isinstance(result, Exception):
-                    logger.error(f"Error executing tool {tool_call.get('function_name', 'unknown')}: {str(result)}")
-                    self.trace.event(name="error_executing_tool", level="ERROR", status_message=(f"Error executing tool {tool_call.get('function_name', 'unknown')}: {str(result)}"))
-                    # Create error result
-                    error_result = ToolResult(success=False, output=f"Error executing tool: {str(result)}")
-                    processed_results.append((tool_call, error_result))
-                else:
-                    processed_results.append((tool_call, result))
-            
-            logger.debug(f"Parallel execution completed for {len(tool_calls)} tools")
-            self.trace.event(name="parallel_execution_completed", level="DEFAULT", status_message=(f"Parallel execution completed for {len(tool_calls)} tools"))
+            logger.debug(f"Parallel execution completed for {len(tool_calls)} tools: {timings}")
+            self.trace.event(name="parallel_execution_completed", level="DEFAULT", status_message=(f"Parallel execution completed for {len(tool_calls)} tools"), metadata={"timings": timings})
             return processed_results
         
         except Exception as e:
@@ -1691,12 +1728,18 @@ class ResponseProcessor:
         status_type = "tool_completed" if context.result.success else "tool_failed"
         message_text = f"Tool {tool_name} {'completed successfully' if context.result.success else 'failed'}"
 
+        if context.cache_hit is None:
+            context.cache_hit = self._tool_cache_outcomes.pop(id(context.tool_call), None)
+
         content = {
             "role": "assistant", "status_type": status_type,
             "function_name": context.function_name, "xml_tag_name": context.xml_tag_name,
             "message": message_text, "tool_index": context.tool_index,
             "tool_call_id": context.tool_call.get("id")
         }
+        if context.cache_hit is not None:
+            content["cache_hit"] = context.cache_hit
+            content["tool_cache"] = self.tool_cache.stats
         metadata = {"thread_run_id": thread_run_id}
         # Add the *actual* tool result message ID to the metadata if available and successful
         if context.result.success and tool_message_id:
@@ -22,7 +22,8 @@ from agentpress.response_processor import (
 )
 from services.supabase import DBConnection
 from utils.logger import logger
-from langfuse.client import StatefulGenerationClient, StatefulTraceClient
+from utils.metrics import DB_INSERT_SECONDS, observe_seconds
+from services.trace_export import ExportedObservation, ExportedTrace
 from services.langfuse import langfuse
 from litellm.utils import token_counter
 from services.billing import calculate_token_cost, handle_usage_with_credits
@@ -42,7 +43,7 @@ class ThreadManager:
     XML-based tool execution patterns.
     """
 
-    def __init__(self, trace: Optional[StatefulTraceClient] = None, agent_config: Optional[dict] = None):
+    def __init__(self, trace: Optional[ExportedTrace] = None, agent_config: Optional[dict] = None):
         """
         Initialize the ThreadManager
         
@@ -166,7 +167,8 @@ class ThreadManager:
 
         try:
             # Insert the message and get the inserted row data including the id
-            result = await client.table('messages').insert(data_to_insert).execute()
+            with observe_seconds(DB_INSERT_SECONDS.labels(table="messages")):
+                result = await client.table('messages').insert(data_to_insert).execute()
             logger.debug(f"Successfully added message to thread {thread_id}")
 
             if result.data and len(result.data) > 0 and isinstance(result.data[0], dict) and 'message_id' in result.data[0]:
@@ -286,7 +288,7 @@ class ThreadManager:
         enable_thinking: Optional[bool] = False,
         reasoning_effort: Optional[str] = 'low',
         enable_context_manager: bool = True,
-        generation: Optional[StatefulGenerationClient] = None,
+        generation: Optional[ExportedObservation] = None,
     ) -> Union[Dict[str, Any], AsyncGenerator]:
         """Run a conversation thread with LLM integration and tool execution.
 
@@ -502,7 +504,8 @@ When using the tools:
                         tool_choice=tool_choice if config.native_tool_calling else "none",
                         stream=stream,
                         enable_thinking=enable_thinking,
-                        reasoning_effort=reasoning_effort
+                        reasoning_effort=reasoning_effort,
+                        trace=self.trace
                     )
                     logger.debug("Successfully received raw LLM API response stream/object")
 
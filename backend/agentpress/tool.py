@@ -4,6 +4,8 @@ Core tool system providing the foundation for creating and managing tools.
 This module defines the base classes and decorators for creating tools in AgentPress:
 - Tool base class for implementing tool functionality
 - Schema decorators for OpenAPI tool definitions
+- Resource class declarations used for concurrent tool execution
+- Cache policies for idempotent tool functions
 - Result containers for standardized tool outputs
 """
 
@@ -31,6 +33,18 @@ class ToolSchema:
     schema_type: SchemaType
     schema: Dict[str, Any]
 
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """How the results of a tool function may be cached.
+    
+    Attributes:
+        ttl (int): Seconds a cached result stays valid
+        scope (str): "project" to share results within a project, "global" to share
+            them across all projects (only for results that do not depend on the caller)
+    """
+    ttl: int
+    scope: str = "project"
+
 @dataclass
 class ToolResult:
     """Container for tool execution results.
@@ -50,12 +64,16 @@ class Tool(ABC):
     
     Attributes:
         _schemas (Dict[str, List[ToolSchema]]): Registered schemas for tool methods
+        default_resource_class (str): Resource class for methods without a
+            ``tool_resource`` decorator (see agentpress.tool_executor)
         
     Methods:
         get_schemas: Get all registered tool schemas
         success_response: Create a successful result
         fail_response: Create a failed result
     """
+
+    default_resource_class: str = "default"
     
     def __init__(self):
         """Initialize tool with empty schema registry."""
@@ -78,6 +96,23 @@ class Tool(ABC):
         """
         return self._schemas
 
+    def get_resource_class(self, method_name: str) -> str:
+        """Get the resource class a tool method contends for.
+
+        Args:
+            method_name: Name of the tool method
+
+        Returns:
+            The class declared with ``tool_resource``, else ``default_resource_class``
+        """
+        method = getattr(self, method_name, None)
+        return getattr(method, 'tool_resource_class', None) or self.default_resource_class
+
+    def get_cache_policy(self, method_name: str) -> Optional[ToolCachePolicy]:
+        """Get the cache policy declared with ``cacheable`` for a tool method, if any."""
+        method = getattr(self, method_name, None)
+        return getattr(method, 'tool_cache_policy', None)
+
     def success_response(self, data: Union[Dict[str, Any], str]) -> ToolResult:
         """Create a successful tool result.
         
@@ -134,6 +169,33 @@ def usage_example(example: str):
         ))
     return decorator
 
+def tool_resource(resource_class: str):
+    """Decorator declaring the resource class a tool function contends for.
+
+    Calls sharing a serialized class (e.g. "browser") run one at a time in issue
+    order; see agentpress.tool_executor.RESOURCE_CLASSES for the available classes.
+    """
+    def decorator(func):
+        logger.debug(f"Assigning resource class '{resource_class}' to function {func.__name__}")
+        func.tool_resource_class = resource_class
+        return func
+    return decorator
+
+def cacheable(ttl: int, scope: str = "project"):
+    """Decorator marking a read-only tool function whose successful results may be cached.
+    
+    Args:
+        ttl: Seconds a cached result stays valid
+        scope: "project" (default) or "global"; see agentpress.tool_cache
+    """
+    if scope not in ("project", "global"):
+        raise ValueError("scope must be 'project' or 'global'")
+    def decorator(func):
+        logger.debug(f"Enabling result cache (ttl={ttl}s, scope={scope}) for function {func.__name__}")
+        func.tool_cache_policy = ToolCachePolicy(ttl=ttl, scope=scope)
+        return func
+    return decorator
+
 # def xml_schema(**kwargs):
 #     """Deprecated decorator - does nothing, kept for compatibility."""
 #     def decorator(func):
@@ -0,0 +1,115 @@
+"""
+Result cache for idempotent tool calls.
+
+Tool functions opt in with the ``cacheable`` decorator. Successful results are
+stored in Redis keyed by (function name, normalized arguments, scope), where the
+scope is the tool's project for project-scoped caches or a shared namespace for
+global ones. Each scope is bounded: a sorted set tracks last access time and the
+least recently used entries are evicted once the scope holds too many entries.
+
+Cache failures are never fatal; a Redis error is treated as a miss.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from agentpress.tool import ToolCachePolicy, ToolResult
+from services import redis
+from utils.logger import logger
+
+KEY_PREFIX = "tool_cache"
+GLOBAL_SCOPE = "global"
+
+# Entries kept per scope before least recently used ones are evicted
+MAX_ENTRIES_PER_SCOPE = 500
+# Results larger than this are not cached
+MAX_RESULT_BYTES = 512 * 1024
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize arguments so equivalent calls produce the same key."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        stripped = value.strip()
+        # Payloads often arrive as JSON strings; compare them structurally
+        if stripped[:1] in ("{", "["):
+            try:
+                return _normalize(json.loads(stripped))
+            except ValueError:
+                pass
+        return stripped
+    return value
+
+
+def make_cache_key(function_name: str, arguments: Dict[str, Any], scope_id: str) -> str:
+    """Build the Redis key for a tool call."""
+    normalized = json.dumps(_normalize(arguments), sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{scope_id}:{function_name}:{digest}"
+
+
+def resolve_scope_id(policy: ToolCachePolicy, tool_instance: Any) -> Optional[str]:
+    """Return the cache scope for a tool instance, or None if it cannot be cached."""
+    if policy.scope == GLOBAL_SCOPE:
+        return GLOBAL_SCOPE
+    project_id = getattr(tool_instance, "project_id", None)
+    return f"project:{project_id}" if project_id else None
+
+
+class ToolResultCache:
+    """Redis-backed cache of tool results with per-run hit/miss counters."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def get(self, function_name: str, arguments: Dict[str, Any], scope_id: str) -> Optional[ToolResult]:
+        """Return the cached result for a call, or None on a miss."""
+        key = make_cache_key(function_name, arguments, scope_id)
+        try:
+            client = await redis.get_client()
+            cached = await client.get(key)
+            if cached is not None:
+                await client.zadd(f"{KEY_PREFIX}:lru:{scope_id}", {key: time.time()})
+                self.hits += 1
+                logger.debug(f"Tool cache hit for {function_name} ({scope_id})")
+                return ToolResult(success=True, output=json.loads(cached))
+        except Exception as e:
+            logger.warning(f"Tool cache lookup failed for {function_name}: {str(e)}")
+        self.misses += 1
+        return None
+
+    async def set(self, function_name: str, arguments: Dict[str, Any], scope_id: str, result: ToolResult, ttl: int):
+        """Store a successful result and evict least recently used entries of the scope."""
+        if not result.success:
+            return
+        payload = json.dumps(result.output)
+        if len(payload) > MAX_RESULT_BYTES:
+            logger.debug(f"Not caching {function_name} result of {len(payload)} bytes")
+            return
+
+        key = make_cache_key(function_name, arguments, scope_id)
+        lru_key = f"{KEY_PREFIX}:lru:{scope_id}"
+        try:
+            client = await redis.get_client()
+            await client.set(key, payload, ex=ttl)
+            await client.zadd(lru_key, {key: time.time()})
+            await client.expire(lru_key, redis.REDIS_KEY_TTL)
+
+            overflow = await client.zcard(lru_key) - MAX_ENTRIES_PER_SCOPE
+            if overflow > 0:
+                evicted = [member for member, _ in await client.zpopmin(lru_key, overflow)]
+                if evicted:
+                    await client.delete(*evicted)
+                    logger.debug(f"Evicted {len(evicted)} tool cache entries from {scope_id}")
+        except Exception as e:
+            logger.warning(f"Tool cache store failed for {function_name}: {str(e)}")
@@ -0,0 +1,178 @@
+"""
+Resource-aware tool execution for AgentPress.
+
+Tool functions declare the resource they contend for (a browser, the sandbox
+shell, an external rate limit, ...) with the ``tool_resource`` decorator. The
+executor uses those classes to run independent calls concurrently while keeping
+conflicting calls in submission order, and bounds each class with a semaphore.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from agentpress.tool import ToolResult
+from agentpress.tool_registry import ToolRegistry
+from utils.logger import logger
+from utils.metrics import TOOL_EXECUTION_SECONDS, TOOL_QUEUE_SECONDS
+
+
+@dataclass(frozen=True)
+class ResourceClass:
+    """A resource that tool calls contend for.
+
+    Attributes:
+        name (str): Identifier used with the ``tool_resource`` decorator
+        max_concurrency (int): Calls of this class allowed to run at once. A value of 1
+            also means calls of this class are executed in the order they were issued.
+        conflicts_with (FrozenSet[str]): Other classes whose calls must not overlap with
+            (and must stay ordered relative to) calls of this class
+        barrier (bool): Wait for every previously issued call before running
+    """
+    name: str
+    max_concurrency: int
+    conflicts_with: FrozenSet[str] = frozenset()
+    barrier: bool = False
+
+
+DEFAULT_RESOURCE_CLASS = "default"
+
+RESOURCE_CLASSES: Dict[str, ResourceClass] = {
+    rc.name: rc for rc in [
+        ResourceClass(DEFAULT_RESOURCE_CLASS, max_concurrency=8),
+        # One Chromium per sandbox: clicks and navigations must not interleave.
+        ResourceClass("browser", max_concurrency=1),
+        # Shell commands and file edits mutate the same sandbox, so they stay ordered.
+        ResourceClass("sandbox", max_concurrency=1, conflicts_with=frozenset({"sandbox_read"})),
+        # Read-only sandbox access may overlap with itself but not with mutations.
+        ResourceClass("sandbox_read", max_concurrency=4, conflicts_with=frozenset({"sandbox"})),
+        # External search/scrape APIs with per-key rate limits.
+        ResourceClass("web_search", max_concurrency=2),
+        ResourceClass("external_api", max_concurrency=4),
+        # ask/complete and friends end the turn, so they run after everything else.
+        ResourceClass("control", max_concurrency=1, barrier=True),
+    ]
+}
+
+
+def get_resource_class(name: Optional[str]) -> ResourceClass:
+    """Look up a resource class by name, falling back to the default class."""
+    resource = RESOURCE_CLASSES.get(name or DEFAULT_RESOURCE_CLASS)
+    if resource is None:
+        logger.warning(f"Unknown tool resource class '{name}', using '{DEFAULT_RESOURCE_CLASS}'")
+        resource = RESOURCE_CLASSES[DEFAULT_RESOURCE_CLASS]
+    return resource
+
+
+def _conflicts(earlier: ResourceClass, later: ResourceClass) -> bool:
+    if later.barrier or earlier.barrier:
+        return True
+    if earlier.name == later.name:
+        return earlier.max_concurrency == 1
+    return later.name in earlier.conflicts_with or earlier.name in later.conflicts_with
+
+
+@dataclass
+class ToolCallTiming:
+    """Queue and execution time of a single tool call."""
+    function_name: str
+    resource_class: str
+    queue_seconds: float = 0.0
+    exec_seconds: float = 0.0
+
+
+@dataclass
+class _InFlight:
+    resource: ResourceClass
+    task: "asyncio.Task[ToolResult]"
+
+
+class ToolExecutor:
+    """Runs tool calls with per-resource-class concurrency limits.
+
+    Calls are submitted in the order the model issued them. Each call waits for
+    earlier calls it conflicts with, then for a slot in its class semaphore, so
+    independent classes run concurrently and conflicting ones are serialized.
+    One executor is shared by all tool calls of a response processor, including
+    those started while the response is still streaming.
+    """
+
+    def __init__(self, tool_registry: ToolRegistry, execute_fn: Callable[[Dict[str, Any]], Awaitable[ToolResult]]):
+        """
+        Args:
+            tool_registry: Registry used to resolve each function's resource class
+            execute_fn: Coroutine that executes a single tool call
+        """
+        self.tool_registry = tool_registry
+        self.execute_fn = execute_fn
+        self.timings: List[ToolCallTiming] = []
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: List[_InFlight] = []
+
+    def _semaphore(self, resource: ResourceClass) -> asyncio.Semaphore:
+        if resource.name not in self._semaphores:
+            self._semaphores[resource.name] = asyncio.Semaphore(resource.max_concurrency)
+        return self._semaphores[resource.name]
+
+    def submit(self, tool_call: Dict[str, Any]) -> "asyncio.Task[ToolResult]":
+        """Schedule a tool call and return the task producing its result."""
+        function_name = tool_call.get("function_name", "unknown")
+        resource = get_resource_class(self.tool_registry.get_resource_class(function_name))
+        timing = ToolCallTiming(function_name=function_name, resource_class=resource.name)
+
+        self._in_flight = [f for f in self._in_flight if not f.task.done()]
+        blockers = [f.task for f in self._in_flight if _conflicts(f.resource, resource)]
+
+        task = asyncio.create_task(self._run(tool_call, resource, blockers, timing))
+        self._in_flight.append(_InFlight(resource=resource, task=task))
+        self.timings.append(timing)
+        return task
+
+    async def _run(
+        self,
+        tool_call: Dict[str, Any],
+        resource: ResourceClass,
+        blockers: List["asyncio.Task[ToolResult]"],
+        timing: ToolCallTiming,
+    ) -> ToolResult:
+        queued_at = time.monotonic()
+        if blockers:
+            await asyncio.wait(blockers)
+        async with self._semaphore(resource):
+            started_at = time.monotonic()
+            timing.queue_seconds = round(started_at - queued_at, 4)
+            TOOL_QUEUE_SECONDS.labels(resource_class=resource.name).observe(started_at - queued_at)
+            try:
+                return await self.execute_fn(tool_call)
+            finally:
+                exec_seconds = time.monotonic() - started_at
+                timing.exec_seconds = round(exec_seconds, 4)
+                TOOL_EXECUTION_SECONDS.labels(function_name=timing.function_name).observe(exec_seconds)
+                logger.debug(
+                    f"Tool {timing.function_name} [{timing.resource_class}] "
+                    f"queued {timing.queue_seconds}s, executed {timing.exec_seconds}s"
+                )
+
+    def drain_timings(self) -> List[ToolCallTiming]:
+        """Return the timings recorded since the last drain and forget them."""
+        timings, self.timings = self.timings, []
+        return timings
+
+    async def execute(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
+        """Submit a batch of tool calls and wait for all of them.
+
+        Returns:
+            List of (tool_call, result) tuples in the original order. Exceptions are
+            converted to failed ToolResults.
+        """
+        tasks = [self.submit(tool_call) for tool_call in tool_calls]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        processed = []
+        for tool_call, result in zip(tool_calls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error executing tool {tool_call.get('function_name', 'unknown')}: {str(result)}")
+                result = ToolResult(success=False, output=f"Error executing tool: {str(result)}")
+            processed.append((tool_call, result))
+        return processed
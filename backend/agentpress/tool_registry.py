@@ -1,5 +1,5 @@
 from typing import Dict, Type, Any, List, Optional, Callable
-from agentpress.tool import Tool, SchemaType
+from agentpress.tool import Tool, SchemaType, ToolCachePolicy
 from utils.logger import logger
 import json
 
@@ -89,6 +89,34 @@ class ToolRegistry:
             logger.warning(f"Tool not found: {tool_name}")
         return tool
 
+    def get_resource_class(self, tool_name: str) -> Optional[str]:
+        """Get the resource class of a tool function.
+        
+        Args:
+            tool_name: Name of the tool function
+            
+        Returns:
+            Resource class name, or None if the tool is not registered
+        """
+        tool_info = self.tools.get(tool_name)
+        if not tool_info:
+            return None
+        return tool_info['instance'].get_resource_class(tool_name)
+
+    def get_cache_policy(self, tool_name: str) -> Optional[ToolCachePolicy]:
+        """Get the cache policy of a tool function.
+        
+        Args:
+            tool_name: Name of the tool function
+            
+        Returns:
+            The declared ToolCachePolicy, or None if results must not be cached
+        """
+        tool_info = self.tools.get(tool_name)
+        if not tool_info:
+            return None
+        return tool_info['instance'].get_cache_policy(tool_name)
+
     def get_openapi_schemas(self) -> List[Dict[str, Any]]:
         """Get OpenAPI schemas for function calling.
         
@@ -73,6 +73,12 @@ async def lifespan(app: FastAPI):
         template_api.initialize(db)
         composio_api.initialize(db)
         
+        from utils.offload import start_loop_lag_monitor
+        start_loop_lag_monitor()
+        
+        from utils.metrics import start_metrics_server
+        start_metrics_server(config.API_METRICS_PORT)
+        
         yield
         
         # Clean up agent resources
@@ -87,6 +93,19 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing Redis connection: {e}")
         
+        # Close pooled outbound HTTP clients
+        from services.http_client import close_http_clients
+        await close_http_clients()
+        
+        # Write buffered knowledge base usage rows
+        from knowledge_base.usage_logger import kb_usage_logger
+        await kb_usage_logger.flush()
+        
+        # Stop the lag monitor and worker pools
+        from utils.offload import stop_loop_lag_monitor, shutdown_pools
+        stop_loop_lag_monitor()
+        shutdown_pools()
+        
         # Clean up database connection
         logger.debug("Disconnecting from database")
         await db.disconnect()
@@ -1,11 +1,18 @@
 import json
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
+import os
+import shutil
+import tempfile
+import uuid
+from typing import BinaryIO, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from pydantic import BaseModel, Field, HttpUrl
 from utils.auth_utils import get_current_user_id_from_jwt, verify_agent_access
 from services.supabase import DBConnection
-from knowledge_base.file_processor import FileProcessor
+from knowledge_base.jobs import GIT_SYNC_JOB_TYPE, is_large_upload, remove_staged_upload, stage_upload, upload_storage_path
+from knowledge_base.retrieval import bump_kb_revision, index_entry, retrieve_agent_kb_context
 from utils.logger import logger
+from utils.offload import run_blocking
+from run_agent_background import process_kb_archive, process_kb_file
 
 router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
 
@@ -148,6 +155,8 @@ async def create_agent_knowledge_base_entry(
             raise HTTPException(status_code=500, detail="Failed to create agent knowledge base entry")
         
         created_entry = result.data[0]
+        await index_entry(client, created_entry['entry_id'], agent_id, created_entry['content'])
+        await bump_kb_revision(agent_id)
         
         return KnowledgeBaseEntryResponse(
             entry_id=created_entry['entry_id'],
@@ -170,7 +179,6 @@ async def create_agent_knowledge_base_entry(
 @router.post("/agents/{agent_id}/upload-file")
 async def upload_file_to_agent_kb(
     agent_id: str,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_id: str = Depends(get_current_user_id_from_jwt)
 ):
@@ -183,7 +191,22 @@ async def upload_file_to_agent_kb(
         agent_data = await verify_agent_access(client, agent_id, user_id)
         account_id = agent_data['account_id']
         
-        file_content = await file.read()
+        mime_type = file.content_type or 'application/octet-stream'
+        storage_path = upload_storage_path(account_id, str(uuid.uuid4()), file.filename or 'upload')
+        
+        # Stage the upload for the worker; archives are spooled to disk instead of held in memory
+        if (file.filename or '').lower().endswith('.zip'):
+            spooled_path = await run_blocking(_spool_upload, file.file)
+            try:
+                file_size = os.path.getsize(spooled_path)
+                await stage_upload(client, storage_path, spooled_path, mime_type)
+            finally:
+                os.unlink(spooled_path)
+        else:
+            file_content = await file.read()
+            file_size = len(file_content)
+            await stage_upload(client, storage_path, file_content, mime_type)
+        
         job_id = await client.rpc('create_agent_kb_processing_job', {
             'p_agent_id': agent_id,
             'p_account_id': account_id,
@@ -191,23 +214,19 @@ async def upload_file_to_agent_kb(
             'p_source_info': {
                 'filename': file.filename,
                 'mime_type': file.content_type,
-                'file_size': len(file_content)
+                'file_size': file_size,
+                'storage_path': storage_path
             }
         }).execute()
         
         if not job_id.data:
+            await remove_staged_upload(client, storage_path)
             raise HTTPException(status_code=500, detail="Failed to create processing job")
         
         job_id = job_id.data
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            agent_id,
-            account_id,
-            file_content,
-            file.filename,
-            file.content_type or 'application/octet-stream'
-        )
+        # Small files get their own high-priority queue so they aren't stuck behind archives
+        actor = process_kb_archive if is_large_upload(file_size) else process_kb_file
+        actor.send(job_id)
         
         return {
             "job_id": job_id,
@@ -222,6 +241,73 @@ async def upload_file_to_agent_kb(
         raise HTTPException(status_code=500, detail="Failed to upload file")
 
 
+@router.post("/{entry_id}/sync")
+async def sync_git_repository_entry(
+    entry_id: str,
+    user_id: str = Depends(get_current_user_id_from_jwt)
+):
+    
+    """Bring a git repository entry up to date with its branch, in the background"""
+    try:
+        client = await db.client
+        
+        entry_result = await client.table('agent_knowledge_base_entries').select(
+            'entry_id, agent_id, source_type, source_metadata, extracted_from_zip_id'
+        ).eq('entry_id', entry_id).execute()
+        
+        if not entry_result.data:
+            raise HTTPException(status_code=404, detail="Knowledge base entry not found")
+        
+        entry = entry_result.data[0]
+        # Files of a repository are git_repo entries too; only the repository entry itself can be synced
+        if entry['source_type'] != 'git_repo' or entry['extracted_from_zip_id'] or not (entry['source_metadata'] or {}).get('git_url'):
+            raise HTTPException(status_code=400, detail="Entry is not a git repository")
+        agent_id = entry['agent_id']
+        
+        agent_data = await verify_agent_access(client, agent_id, user_id)
+        
+        # Syncs of the same repository would delete and recreate the same entries
+        running = await client.table('agent_kb_file_processing_jobs').select('job_id').eq(
+            'agent_id', agent_id
+        ).eq('job_type', GIT_SYNC_JOB_TYPE).in_('status', ['pending', 'processing']).eq(
+            'source_info->>repo_entry_id', entry_id
+        ).execute()
+        if running.data:
+            return {
+                "job_id": running.data[0]['job_id'],
+                "message": "Repository sync already in progress."
+            }
+        
+        source_metadata = entry['source_metadata']
+        job_id = await client.rpc('create_agent_kb_processing_job', {
+            'p_agent_id': agent_id,
+            'p_account_id': agent_data['account_id'],
+            'p_job_type': GIT_SYNC_JOB_TYPE,
+            'p_source_info': {
+                'repo_entry_id': entry_id,
+                'git_url': source_metadata.get('git_url'),
+                'branch': source_metadata.get('branch')
+            }
+        }).execute()
+        
+        if not job_id.data:
+            raise HTTPException(status_code=500, detail="Failed to create processing job")
+        
+        job_id = job_id.data
+        process_kb_archive.send(job_id)
+        
+        return {
+            "job_id": job_id,
+            "message": "Repository sync started. Processing in background."
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error syncing git repository entry {entry_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to sync git repository")
+
+
 @router.put("/{entry_id}", response_model=KnowledgeBaseEntryResponse)
 async def update_knowledge_base_entry(
     entry_id: str,
@@ -252,6 +338,8 @@ async def update_knowledge_base_entry(
             update_data['description'] = entry_data.description
         if entry_data.content is not None:
             update_data['content'] = entry_data.content
+            # Edited content no longer matches the uploaded file, so it must not be shared by hash
+            update_data['content_hash'] = None
         if entry_data.usage_context is not None:
             update_data['usage_context'] = entry_data.usage_context
         if entry_data.is_active is not None:
@@ -267,6 +355,10 @@ async def update_knowledge_base_entry(
         
         updated_entry = result.data[0]
         
+        if 'content' in update_data:
+            await index_entry(client, entry_id, agent_id, updated_entry['content'])
+        await bump_kb_revision(agent_id)
+        
         logger.debug(f"Updated agent knowledge base entry {entry_id} for agent {agent_id}")
         
         return KnowledgeBaseEntryResponse(
@@ -314,6 +406,7 @@ async def delete_knowledge_base_entry(
         await verify_agent_access(client, agent_id, user_id)
         
         result = await client.table('agent_knowledge_base_entries').delete().eq('entry_id', entry_id).execute()
+        await bump_kb_revision(agent_id)
         
         logger.debug(f"Deleted agent knowledge base entry {entry_id} for agent {agent_id}")
         
@@ -415,75 +508,28 @@ async def get_agent_processing_jobs(
         logger.error(f"Error getting processing jobs for agent {agent_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get processing jobs")
 
-async def process_file_background(
-    job_id: str,
-    agent_id: str,
-    account_id: str,
-    file_content: bytes,
-    filename: str,
-    mime_type: str
-):
-    """Background task to process uploaded files"""
-    
-    processor = FileProcessor()
-    client = await processor.db.client
-    try:
-        await client.rpc('update_agent_kb_job_status', {
-            'p_job_id': job_id,
-            'p_status': 'processing'
-        }).execute()
-        
-        result = await processor.process_file_upload(
-            agent_id, account_id, file_content, filename, mime_type
-        )
-        
-        if result['success']:
-            await client.rpc('update_agent_kb_job_status', {
-                'p_job_id': job_id,
-                'p_status': 'completed',
-                'p_result_info': result,
-                'p_entries_created': 1,
-                'p_total_files': 1
-            }).execute()
-        else:
-            await client.rpc('update_agent_kb_job_status', {
-                'p_job_id': job_id,
-                'p_status': 'failed',
-                'p_error_message': result.get('error', 'Unknown error')
-            }).execute()
-            
-    except Exception as e:
-        logger.error(f"Error in background file processing for job {job_id}: {str(e)}")
-        try:
-            await client.rpc('update_agent_kb_job_status', {
-                'p_job_id': job_id,
-                'p_status': 'failed',
-                'p_error_message': str(e)
-            }).execute()
-        except:
-            pass
-
+def _spool_upload(source: BinaryIO) -> str:
+    """Copy an upload to a temp file in chunks and return its path. The caller deletes it."""
+    with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+        return target.name
 
 @router.get("/agents/{agent_id}/context")
 async def get_agent_knowledge_base_context(
     agent_id: str,
     max_tokens: int = 4000,
+    query: Optional[str] = None,
     user_id: str = Depends(get_current_user_id_from_jwt)
 ):
     
-    """Get knowledge base context for agent prompts"""
+    """Get knowledge base context for agent prompts, optionally ranked against a query"""
     try:
         client = await db.client
         
         # Verify agent access
         await verify_agent_access(client, agent_id, user_id)
         
-        result = await client.rpc('get_agent_knowledge_base_context', {
-            'p_agent_id': agent_id,
-            'p_max_tokens': max_tokens
-        }).execute()
-        
-        context = result.data if result.data else None
+        context = await retrieve_agent_kb_context(client, agent_id, query=query, max_tokens=max_tokens)
         
         return {
             "context": context,
@@ -6,7 +6,9 @@ import shutil
 import asyncio
 import subprocess
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import functools
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple, Union, Callable, NamedTuple
 from pathlib import Path
 import mimetypes
 import chardet
@@ -14,8 +16,28 @@ import chardet
 import PyPDF2
 import docx
 
+from utils.config import config
 from utils.logger import logger
+from utils.offload import run_blocking, run_cpu_bound
 from services.supabase import DBConnection
+from knowledge_base.retrieval import bump_kb_revision, index_entries
+
+
+class _IngestSource(NamedTuple):
+    """A file of a ZIP archive or git checkout, read lazily by the ingestion pipeline."""
+    filename: str
+    path: str
+    read: Callable[[], bytes]
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
 
 class FileProcessor:
     SUPPORTED_TEXT_EXTENSIONS = {
@@ -27,8 +49,10 @@ class FileProcessor:
     }
     
     MAX_FILE_SIZE = 50 * 1024 * 1024
+    MAX_ZIP_FILE_SIZE = 500 * 1024 * 1024
     MAX_ZIP_ENTRIES = 1000
     MAX_CONTENT_LENGTH = 100000
+    INSERT_BATCH_SIZE = 50
     
     def __init__(self):
         self.db = DBConnection()
@@ -37,26 +61,35 @@ class FileProcessor:
         self, 
         agent_id: str, 
         account_id: str, 
-        file_content: bytes, 
+        file_content: Union[bytes, str], 
         filename: str, 
-        mime_type: str
+        mime_type: str,
+        job_id: Optional[str] = None,
+        container_entry_id: Optional[str] = None
     ) -> Dict[str, Any]:
+        """Process an uploaded file given as bytes or as the path of a spooled temp file.
+        
+        ``container_entry_id`` resumes a partially processed archive of the same job.
+        """
         try:
-            file_size = len(file_content)
-            if file_size > self.MAX_FILE_SIZE:
-                raise ValueError(f"File too large: {file_size} bytes (max: {self.MAX_FILE_SIZE})")
-            
             file_extension = Path(filename).suffix.lower()
 
             if file_extension == '.zip':
-                return await self._process_zip_file(agent_id, account_id, file_content, filename)
+                # Archive members are size-checked individually while streaming
+                return await self._process_zip_file(agent_id, account_id, file_content, filename, job_id, container_entry_id)
             
-            content = await self._extract_file_content(file_content, filename, mime_type)
+            if isinstance(file_content, str):
+                file_content = await run_blocking(_read_file, file_content)
             
-            if not content or not content.strip():
-                raise ValueError(f"No extractable content found in {filename}")
+            file_size = len(file_content)
+            if file_size > self.MAX_FILE_SIZE:
+                raise ValueError(f"File too large: {file_size} bytes (max: {self.MAX_FILE_SIZE})")
             
             client = await self.db.client
+            content, content_hash, extraction = await self._extract_with_dedup(client, account_id, file_content, filename, mime_type)
+            
+            if not content or not content.strip():
+                raise ValueError(f"No extractable content found in {filename}")
             
             entry_data = {
                 'agent_id': agent_id,
@@ -73,6 +106,7 @@ class FileProcessor:
                 },
                 'file_size': file_size,
                 'file_mime_type': mime_type,
+                'content_hash': content_hash,
                 'usage_context': 'always',
                 'is_active': True
             }
@@ -82,6 +116,10 @@ class FileProcessor:
             if not result.data:
                 raise Exception("Failed to create knowledge base entry")
             
+            if extraction:
+                await self._store_extractions(client, [extraction])
+            await index_entries(client, agent_id, [(result.data[0]['entry_id'], entry_data['content'])])
+            
             return {
                 'success': True,
                 'entry_id': result.data[0]['entry_id'],
@@ -102,11 +140,16 @@ class FileProcessor:
         self, 
         agent_id: str, 
         account_id: str, 
-        zip_content: bytes, 
-        zip_filename: str
+        zip_source: Union[bytes, str], 
+        zip_filename: str,
+        job_id: Optional[str] = None,
+        container_entry_id: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
             client = await self.db.client
+            zip_size = os.path.getsize(zip_source) if isinstance(zip_source, str) else len(zip_source)
+            if zip_size > self.MAX_ZIP_FILE_SIZE:
+                raise ValueError(f"ZIP file too large: {zip_size} bytes (max: {self.MAX_ZIP_FILE_SIZE})")
             
             zip_entry_data = {
                 'agent_id': agent_id,
@@ -118,83 +161,80 @@ class FileProcessor:
                 'source_metadata': {
                     'filename': zip_filename,
                     'mime_type': 'application/zip',
-                    'file_size': len(zip_content),
+                    'file_size': zip_size,
                     'is_zip_container': True
                 },
-                'file_size': len(zip_content),
+                'file_size': zip_size,
                 'file_mime_type': 'application/zip',
                 'usage_context': 'always',
                 'is_active': True
             }
             
-            zip_result = await client.table('agent_knowledge_base_entries').insert(zip_entry_data).execute()
-            zip_entry_id = zip_result.data[0]['entry_id']
-            
-            extracted_files = []
-            failed_files = []
+            done_paths = set()
+            if container_entry_id:
+                # Resuming: keep the container and skip members that already have entries
+                zip_entry_id = container_entry_id
+                existing = await client.table('agent_knowledge_base_entries').select(
+                    'source_metadata->>original_path'
+                ).eq('extracted_from_zip_id', zip_entry_id).execute()
+                done_paths = {row['original_path'] for row in existing.data or []}
+                logger.debug(f"Resuming ZIP {zip_filename}: {len(done_paths)} files already processed")
+            else:
+                zip_result = await client.table('agent_knowledge_base_entries').insert(zip_entry_data).execute()
+                zip_entry_id = zip_result.data[0]['entry_id']
+                if job_id:
+                    await client.table('agent_kb_file_processing_jobs').update(
+                        {'container_entry_id': zip_entry_id}
+                    ).eq('job_id', job_id).execute()
             
-            with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_ref:
-                file_list = zip_ref.namelist()
+            # Members are read one at a time from the archive (a path is not loaded into memory)
+            with zipfile.ZipFile(io.BytesIO(zip_source) if isinstance(zip_source, bytes) else zip_source, 'r') as zip_ref:
+                members = [info for info in zip_ref.infolist() if not info.is_dir()]
                 
-                if len(file_list) > self.MAX_ZIP_ENTRIES:
-                    raise ValueError(f"ZIP contains too many files: {len(file_list)} (max: {self.MAX_ZIP_ENTRIES})")
+                if len(members) > self.MAX_ZIP_ENTRIES:
+                    raise ValueError(f"ZIP contains too many files: {len(members)} (max: {self.MAX_ZIP_ENTRIES})")
                 
-                for file_path in file_list:
-                    if file_path.endswith('/'):
+                sources = []
+                failed_files = []
+                for info in members:
+                    filename = os.path.basename(info.filename)
+                    if not filename or info.filename in done_paths:
                         continue
-                    
-                    try:
-                        file_content = zip_ref.read(file_path)
-                        filename = os.path.basename(file_path)
-                        
-                        if not filename:
-                            continue
-                        
-                        mime_type, _ = mimetypes.guess_type(filename)
-                        if not mime_type:
-                            mime_type = 'application/octet-stream'
-                        
-                        content = await self._extract_file_content(file_content, filename, mime_type)
-                        
-                        if content and content.strip():
-                            extracted_entry_data = {
-                                'agent_id': agent_id,
-                                'account_id': account_id,
-                                'name': f"📄 {filename}",
-                                'description': f"Extracted from {zip_filename}: {file_path}",
-                                'content': content[:self.MAX_CONTENT_LENGTH],
-                                'source_type': 'zip_extracted',
-                                'source_metadata': {
-                                    'filename': filename,
-                                    'original_path': file_path,
-                                    'zip_filename': zip_filename,
-                                    'mime_type': mime_type,
-                                    'file_size': len(file_content),
-                                    'extraction_method': self._get_extraction_method(Path(filename).suffix.lower(), mime_type)
-                                },
-                                'file_size': len(file_content),
-                                'file_mime_type': mime_type,
-                                'extracted_from_zip_id': zip_entry_id,
-                                'usage_context': 'always',
-                                'is_active': True
-                            }
-                            
-                            extracted_result = await client.table('agent_knowledge_base_entries').insert(extracted_entry_data).execute()
-                            
-                            extracted_files.append({
-                                'filename': filename,
-                                'path': file_path,
-                                'entry_id': extracted_result.data[0]['entry_id'],
-                                'content_length': len(content)
-                            })
-                        
-                    except Exception as e:
-                        logger.error(f"Error extracting {file_path} from ZIP: {str(e)}")
-                        failed_files.append({
-                            'filename': os.path.basename(file_path),
-                            'path': file_path,
-                            'error': str(e)
-                        })
+                    if info.file_size > self.MAX_FILE_SIZE:
+                        failed_files.append({'filename': filename, 'path': info.filename, 'error': f"File too large: {info.file_size} bytes"})
+                        continue
+                    sources.append(_IngestSource(filename, info.filename, functools.partial(zip_ref.read, info)))
+                
+                def build_entry(source: _IngestSource, file_size: int, mime_type: str, content: str) -> Dict[str, Any]:
+                    return {
+                        'agent_id': agent_id,
+                        'account_id': account_id,
+                        'name': f"📄 {source.filename}",
+                        'description': f"Extracted from {zip_filename}: {source.path}",
+                        'content': content[:self.MAX_CONTENT_LENGTH],
+                        'source_type': 'zip_extracted',
+                        'source_metadata': {
+                            'filename': source.filename,
+                            'original_path': source.path,
+                            'zip_filename': zip_filename,
+                            'mime_type': mime_type,
+                            'file_size': file_size,
+                            'extraction_method': self._get_extraction_method(Path(source.filename).suffix.lower(), mime_type)
+                        },
+                        'file_size': file_size,
+                        'file_mime_type': mime_type,
+                        'extracted_from_zip_id': zip_entry_id,
+                        'usage_context': 'always',
+                        'is_active': True
+                    }
+                
+                extracted, failed = await self._ingest_sources(client, agent_id, account_id, sources, build_entry, job_id)
+            
+            extracted_files = [
+                {'filename': s.filename, 'path': s.path, 'entry_id': entry_id, 'content_length': length}
+                for s, entry_id, length in extracted
+            ]
+            failed_files.extend({'filename': s.filename, 'path': s.path, 'error': error} for s, error in failed)
             
             return {
                 'success': True,
@@ -202,7 +242,8 @@ class FileProcessor:
                 'zip_filename': zip_filename,
                 'extracted_files': extracted_files,
                 'failed_files': failed_files,
-                'total_extracted': len(extracted_files),
+                'total_extracted': len(extracted_files) + len(done_paths),
+                'total_resumed': len(done_paths),
                 'total_failed': len(failed_files)
             }
             
@@ -221,7 +262,8 @@ class FileProcessor:
         git_url: str,
         branch: str = 'main',
         include_patterns: List[str] = None,
-        exclude_patterns: List[str] = None
+        exclude_patterns: List[str] = None,
+        job_id: Optional[str] = None
     ) -> Dict[str, Any]:
         if include_patterns is None:
             include_patterns = ['*.txt', '*.pdf', '*.docx']
@@ -244,6 +286,8 @@ class FileProcessor:
             if process.returncode != 0:
                 raise Exception(f"Git clone failed: {stderr.decode()}")
             
+            commit_sha = (await self._run_git(temp_dir, 'rev-parse', 'HEAD')).strip()
+            
             client = await self.db.client
             
             repo_name = git_url.split('/')[-1].replace('.git', '')
@@ -258,7 +302,8 @@ class FileProcessor:
                     'git_url': git_url,
                     'branch': branch,
                     'include_patterns': include_patterns,
-                    'exclude_patterns': exclude_patterns
+                    'exclude_patterns': exclude_patterns,
+                    'commit_sha': commit_sha
                 },
                 'usage_context': 'always',
                 'is_active': True
@@ -267,74 +312,33 @@ class FileProcessor:
             repo_result = await client.table('agent_knowledge_base_entries').insert(repo_entry_data).execute()
             repo_entry_id = repo_result.data[0]['entry_id']
             
-            processed_files = []
-            failed_files = []
-            
-            for root, dirs, files in os.walk(temp_dir):
-                if '.git' in dirs:
-                    dirs.remove('.git')
-                
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, temp_dir)
-                    
-                    if not self._should_include_file(relative_path, include_patterns, exclude_patterns):
-                        continue
-                    
-                    try:
-                        with open(file_path, 'rb') as f:
-                            file_content = f.read()
-                        
-                        if len(file_content) > self.MAX_FILE_SIZE:
+            def collect_sources() -> List[_IngestSource]:
+                sources = []
+                for root, dirs, files in os.walk(temp_dir):
+                    if '.git' in dirs:
+                        dirs.remove('.git')
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        relative_path = os.path.relpath(file_path, temp_dir)
+                        if not self._should_include_file(relative_path, include_patterns, exclude_patterns):
+                            continue
+                        if os.path.getsize(file_path) > self.MAX_FILE_SIZE:
                             continue
-                        
-                        mime_type, _ = mimetypes.guess_type(file)
-                        if not mime_type:
-                            mime_type = 'application/octet-stream'
-                        
-                        content = await self._extract_file_content(file_content, file, mime_type)
-                        
-                        if content and content.strip():
-                            file_entry_data = {
-                                'agent_id': agent_id,
-                                'account_id': account_id,
-                                'name': f"📄 {file}",
-                                'description': f"From {repo_name}: {relative_path}",
-                                'content': content[:self.MAX_CONTENT_LENGTH],
-                                'source_type': 'git_repo',
-                                'source_metadata': {
-                                    'filename': file,
-                                    'relative_path': relative_path,
-                                    'git_url': git_url,
-                                    'branch': branch,
-                                    'repo_name': repo_name,
-                                    'mime_type': mime_type,
-                                    'file_size': len(file_content),
-                                    'extraction_method': self._get_extraction_method(Path(file).suffix.lower(), mime_type)
-                                },
-                                'file_size': len(file_content),
-                                'file_mime_type': mime_type,
-                                'extracted_from_zip_id': repo_entry_id,
-                                'usage_context': 'always',
-                                'is_active': True
-                            }
-                            
-                            file_result = await client.table('agent_knowledge_base_entries').insert(file_entry_data).execute()
-                            
-                            processed_files.append({
-                                'filename': file,
-                                'relative_path': relative_path,
-                                'entry_id': file_result.data[0]['entry_id'],
-                                'content_length': len(content)
-                            })
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing {relative_path} from git repo: {str(e)}")
-                        failed_files.append({
-                            'filename': file,
-                            'relative_path': relative_path,
-                            'error': str(e)
-                        })
+                        sources.append(_IngestSource(file, relative_path, functools.partial(_read_file, file_path)))
+                return sources
+            
+            sources = await run_blocking(collect_sources)
+            
+            build_entry = self._git_entry_builder(agent_id, account_id, repo_entry_id, repo_name, git_url, branch)
+            processed, failed = await self._ingest_sources(client, agent_id, account_id, sources, build_entry, job_id)
+            
+            processed_files = [
+                {'filename': s.filename, 'relative_path': s.path, 'entry_id': entry_id, 'content_length': length}
+                for s, entry_id, length in processed
+            ]
+            failed_files = [{'filename': s.filename, 'relative_path': s.path, 'error': error} for s, error in failed]
+            
+            await bump_kb_revision(agent_id)
             
             return {
                 'success': True,
@@ -342,6 +346,7 @@ class FileProcessor:
                 'repo_name': repo_name,
                 'git_url': git_url,
                 'branch': branch,
+                'commit_sha': commit_sha,
                 'processed_files': processed_files,
                 'failed_files': failed_files,
                 'total_processed': len(processed_files),
@@ -360,27 +365,349 @@ class FileProcessor:
             if temp_dir and os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir, ignore_errors=True)
     
-    async def _extract_file_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
-        file_extension = Path(filename).suffix.lower()
+    async def sync_git_repository(
+        self,
+        agent_id: str,
+        account_id: str,
+        repo_entry_id: str,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Bring the entries of an ingested git repository up to date with its branch.
         
+        Only trees are fetched for the recorded and the current commit; blobs are
+        fetched just for changed paths. Entries (and their chunks) of changed or
+        deleted paths are replaced or removed, everything else is left untouched.
+        Falls back to reprocessing every file when the recorded commit is missing
+        or no longer reachable (e.g. after a force push).
+        """
+        temp_dir = None
+        git_url = None
         try:
-            if file_extension in self.SUPPORTED_TEXT_EXTENSIONS or mime_type.startswith('text/'):
-                return self._extract_text_content(file_content)
+            client = await self.db.client
+            repo_result = await client.table('agent_knowledge_base_entries').select(
+                'entry_id, source_metadata'
+            ).eq('entry_id', repo_entry_id).eq('agent_id', agent_id).eq('source_type', 'git_repo').execute()
+            if not repo_result.data:
+                raise ValueError(f"Git repository entry {repo_entry_id} not found")
+            
+            metadata = repo_result.data[0]['source_metadata'] or {}
+            git_url = metadata['git_url']
+            branch = metadata.get('branch') or 'main'
+            include_patterns = metadata.get('include_patterns') or ['*.txt', '*.pdf', '*.docx']
+            exclude_patterns = metadata.get('exclude_patterns') or []
+            last_sha = metadata.get('commit_sha')
+            repo_name = git_url.split('/')[-1].replace('.git', '')
+            
+            temp_dir = tempfile.mkdtemp()
+            await self._run_git(temp_dir, 'init', '-q')
+            await self._run_git(temp_dir, 'remote', 'add', 'origin', git_url)
+            # Partial clone: blobs are fetched lazily, only for the paths checked out
+            await self._run_git(temp_dir, 'config', 'remote.origin.promisor', 'true')
+            await self._run_git(temp_dir, 'config', 'remote.origin.partialclonefilter', 'blob:none')
+            await self._run_git(temp_dir, 'fetch', '-q', '--depth', '1', '--filter=blob:none', 'origin', branch)
+            head_sha = (await self._run_git(temp_dir, 'rev-parse', 'FETCH_HEAD')).strip()
+            
+            if head_sha == last_sha:
+                return {
+                    'success': True,
+                    'repo_entry_id': repo_entry_id,
+                    'commit_sha': head_sha,
+                    'up_to_date': True
+                }
             
-            elif file_extension == '.pdf':
-                return self._extract_pdf_content(file_content)
+            changes: Dict[str, str] = {}
+            full_resync = last_sha is None
+            if not full_resync:
+                try:
+                    await self._run_git(temp_dir, 'fetch', '-q', '--depth', '1', '--filter=blob:none', 'origin', last_sha)
+                    diff = await self._run_git(temp_dir, 'diff', '--name-status', '--no-renames', '-z', last_sha, head_sha)
+                    fields = diff.split('\0')
+                    changes = {path: status[0] for status, path in zip(fields[0::2], fields[1::2]) if path}
+                except Exception as e:
+                    logger.warning(f"Cannot diff {git_url} against {last_sha}, reprocessing all files: {str(e)}")
+                    full_resync = True
+            if full_resync:
+                tree = await self._run_git(temp_dir, 'ls-tree', '-r', '-z', '--name-only', head_sha)
+                changes = {path: 'A' for path in tree.split('\0') if path}
             
-            elif file_extension == '.docx':
-                return self._extract_docx_content(file_content)
+            changed_paths = [path for path in changes if self._should_include_file(path, include_patterns, exclude_patterns)]
             
+            # Chunks are removed with their entries (ON DELETE CASCADE)
+            deleted = 0
+            if full_resync:
+                result = await client.table('agent_knowledge_base_entries').delete().eq(
+                    'extracted_from_zip_id', repo_entry_id
+                ).execute()
+                deleted += len(result.data or [])
             else:
-                raise ValueError(f"Unsupported file format: {file_extension}. Only .txt, .pdf, and .docx files are supported.")
+                for i in range(0, len(changed_paths), 100):
+                    result = await client.table('agent_knowledge_base_entries').delete().eq(
+                        'extracted_from_zip_id', repo_entry_id
+                    ).in_('source_metadata->>relative_path', changed_paths[i:i + 100]).execute()
+                    deleted += len(result.data or [])
+            
+            fetch_paths = [path for path in changed_paths if changes[path] != 'D']
+            if fetch_paths:
+                await self._run_git(
+                    temp_dir, 'checkout', '-q', head_sha, '--pathspec-from-file=-', '--pathspec-file-nul',
+                    input='\0'.join(fetch_paths).encode()
+                )
+            
+            def collect_sources() -> List[_IngestSource]:
+                sources = []
+                for relative_path in fetch_paths:
+                    file_path = os.path.join(temp_dir, relative_path)
+                    if not os.path.isfile(file_path) or os.path.getsize(file_path) > self.MAX_FILE_SIZE:
+                        continue
+                    sources.append(_IngestSource(os.path.basename(relative_path), relative_path, functools.partial(_read_file, file_path)))
+                return sources
+            
+            sources = await run_blocking(collect_sources)
+            build_entry = self._git_entry_builder(agent_id, account_id, repo_entry_id, repo_name, git_url, branch)
+            processed, failed = await self._ingest_sources(client, agent_id, account_id, sources, build_entry, job_id)
+            
+            await client.table('agent_knowledge_base_entries').update({
+                'source_metadata': {**metadata, 'commit_sha': head_sha}
+            }).eq('entry_id', repo_entry_id).execute()
+            
+            await bump_kb_revision(agent_id)
+            
+            return {
+                'success': True,
+                'repo_entry_id': repo_entry_id,
+                'from_commit': last_sha,
+                'commit_sha': head_sha,
+                'full_resync': full_resync,
+                'processed_files': [
+                    {'filename': s.filename, 'relative_path': s.path, 'entry_id': entry_id, 'content_length': length}
+                    for s, entry_id, length in processed
+                ],
+                'failed_files': [{'filename': s.filename, 'relative_path': s.path, 'error': error} for s, error in failed],
+                'total_processed': len(processed),
+                'total_deleted': deleted,
+                'total_failed': len(failed)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error syncing git repository entry {repo_entry_id}: {str(e)}")
+            return {
+                'success': False,
+                'repo_entry_id': repo_entry_id,
+                'git_url': git_url,
+                'error': str(e)
+            }
+        
+        finally:
+            if temp_dir and os.path.exists(temp_dir):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _git_entry_builder(
+        self,
+        agent_id: str,
+        account_id: str,
+        repo_entry_id: str,
+        repo_name: str,
+        git_url: str,
+        branch: str
+    ) -> Callable[['_IngestSource', int, str, str], Dict[str, Any]]:
+        def build_entry(source: _IngestSource, file_size: int, mime_type: str, content: str) -> Dict[str, Any]:
+            return {
+                'agent_id': agent_id,
+                'account_id': account_id,
+                'name': f"📄 {source.filename}",
+                'description': f"From {repo_name}: {source.path}",
+                'content': content[:self.MAX_CONTENT_LENGTH],
+                'source_type': 'git_repo',
+                'source_metadata': {
+                    'filename': source.filename,
+                    'relative_path': source.path,
+                    'git_url': git_url,
+                    'branch': branch,
+                    'repo_name': repo_name,
+                    'mime_type': mime_type,
+                    'file_size': file_size,
+                    'extraction_method': self._get_extraction_method(Path(source.filename).suffix.lower(), mime_type)
+                },
+                'file_size': file_size,
+                'file_mime_type': mime_type,
+                'extracted_from_zip_id': repo_entry_id,
+                'usage_context': 'always',
+                'is_active': True
+            }
+        return build_entry
+    
+    async def _run_git(self, cwd: str, *args: str, input: Optional[bytes] = None) -> str:
+        process = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=cwd,
+            stdin=asyncio.subprocess.PIPE if input is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate(input)
+        if process.returncode != 0:
+            raise Exception(f"git {args[0]} failed: {stderr.decode().strip()}")
+        return stdout.decode()
+    
+    async def _ingest_sources(
+        self,
+        client,
+        agent_id: str,
+        account_id: str,
+        sources: List['_IngestSource'],
+        build_entry: Callable[['_IngestSource', int, str, str], Dict[str, Any]],
+        job_id: Optional[str] = None
+    ) -> Tuple[List[Tuple['_IngestSource', str, int]], List[Tuple['_IngestSource', str]]]:
+        """Extract sources concurrently and insert their entries in batches.
         
+        At most ``KB_INGEST_CONCURRENCY`` files are read and parsed at once, so only
+        that many raw files are held in memory. Parsed entries are inserted (and
+        chunked) ``INSERT_BATCH_SIZE`` at a time, and job progress is reported after
+        every batch. Files already extracted in the account (same sha256) reuse the
+        stored extraction and chunks.
+        
+        Returns:
+            (processed, failed): processed holds (source, entry_id, content_length),
+            failed holds (source, error message)
+        """
+        semaphore = asyncio.Semaphore(config.KB_INGEST_CONCURRENCY)
+        processed: List[Tuple[_IngestSource, str, int]] = []
+        failed: List[Tuple[_IngestSource, str]] = []
+        batch: List[Tuple[_IngestSource, Dict[str, Any], int]] = []
+        new_extractions: Dict[str, Dict[str, Any]] = {}
+        
+        async def extract(source: _IngestSource):
+            async with semaphore:
+                try:
+                    file_content = await run_blocking(source.read)
+                    mime_type, _ = mimetypes.guess_type(source.filename)
+                    mime_type = mime_type or 'application/octet-stream'
+                    content, content_hash, extraction = await self._extract_with_dedup(
+                        client, account_id, file_content, source.filename, mime_type
+                    )
+                    if extraction:
+                        new_extractions[content_hash] = extraction
+                    return source, len(file_content), mime_type, content, content_hash, None
+                except Exception as e:
+                    logger.error(f"Error extracting {source.path}: {str(e)}")
+                    return source, 0, None, None, None, str(e)
+        
+        async def flush():
+            rows = [row for _, row, _ in batch]
+            result = await client.table('agent_knowledge_base_entries').insert(rows).execute()
+            inserted = result.data or []
+            for (source, _, length), entry in zip(batch, inserted):
+                processed.append((source, entry['entry_id'], length))
+            if new_extractions:
+                await self._store_extractions(client, list(new_extractions.values()))
+                new_extractions.clear()
+            await index_entries(client, agent_id, [(entry['entry_id'], entry['content']) for entry in inserted])
+            batch.clear()
+            await self._update_job_progress(client, job_id, len(processed), len(sources))
+        
+        tasks = [asyncio.create_task(extract(source)) for source in sources]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                source, file_size, mime_type, content, content_hash, error = await next_done
+                if error:
+                    failed.append((source, error))
+                elif content and content.strip():
+                    row = build_entry(source, file_size, mime_type, content)
+                    row['content_hash'] = content_hash
+                    batch.append((source, row, len(content)))
+                if len(batch) >= self.INSERT_BATCH_SIZE:
+                    await flush()
+            if batch:
+                await flush()
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return processed, failed
+    
+    async def _update_job_progress(self, client, job_id: Optional[str], entries_created: int, total_files: int):
+        if not job_id:
+            return
+        try:
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'processing',
+                'p_entries_created': entries_created,
+                'p_total_files': total_files
+            }).execute()
+        except Exception as e:
+            logger.warning(f"Failed to update progress of knowledge base job {job_id}: {str(e)}")
+    
+    async def _extract_with_dedup(
+        self,
+        client,
+        account_id: str,
+        file_content: bytes,
+        filename: str,
+        mime_type: str
+    ) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
+        """Extract a file, reusing an earlier extraction of the same bytes in the account.
+        
+        Returns:
+            (content, content_hash, extraction): extraction is the row to store in
+            agent_kb_extractions when the file was newly extracted, else None.
+            content_hash is None when extraction failed.
+        """
+        content_hash = await run_blocking(_sha256, file_content)
+        try:
+            cached = await client.table('agent_kb_extractions').select('content').eq(
+                'account_id', account_id
+            ).eq('content_hash', content_hash).limit(1).execute()
+            if cached.data:
+                logger.debug(f"Reusing extraction of {filename} ({content_hash[:12]})")
+                return cached.data[0]['content'], content_hash, None
+        except Exception as e:
+            logger.warning(f"Failed to look up extraction of {filename}: {str(e)}")
+        
+        try:
+            content = await self._extract_content(file_content, filename, mime_type)
         except Exception as e:
             logger.error(f"Error extracting content from {filename}: {str(e)}")
-            return f"Error extracting content: {str(e)}"
+            return f"Error extracting content: {str(e)}", None, None
+        
+        if not content or not content.strip():
+            return content, content_hash, None
+        
+        extraction = {
+            'account_id': account_id,
+            'content_hash': content_hash,
+            'content': content[:self.MAX_CONTENT_LENGTH],
+            'mime_type': mime_type,
+            'extraction_method': self._get_extraction_method(Path(filename).suffix.lower(), mime_type),
+            'file_size': len(file_content)
+        }
+        return content, content_hash, extraction
+    
+    async def _store_extractions(self, client, extractions: List[Dict[str, Any]]):
+        try:
+            await client.table('agent_kb_extractions').upsert(
+                extractions, on_conflict='account_id,content_hash', ignore_duplicates=True
+            ).execute()
+        except Exception as e:
+            logger.warning(f"Failed to store {len(extractions)} knowledge base extractions: {str(e)}")
+    
+    async def _extract_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
+        file_extension = Path(filename).suffix.lower()
+        
+        if file_extension in self.SUPPORTED_TEXT_EXTENSIONS or mime_type.startswith('text/'):
+            return await run_blocking(self._extract_text_content, file_content)
+        
+        elif file_extension == '.pdf':
+            return await run_cpu_bound(FileProcessor._extract_pdf_content, file_content)
+        
+        elif file_extension == '.docx':
+            return await run_cpu_bound(FileProcessor._extract_docx_content, file_content)
+        
+        else:
+            raise ValueError(f"Unsupported file format: {file_extension}. Only .txt, .pdf, and .docx files are supported.")
     
-    def _extract_text_content(self, file_content: bytes) -> str:
+    @staticmethod
+    def _extract_text_content(file_content: bytes) -> str:
         detected = chardet.detect(file_content)
         encoding = detected.get('encoding', 'utf-8')
         
@@ -389,9 +716,11 @@ class FileProcessor:
         except UnicodeDecodeError:
             raw_text = file_content.decode('utf-8', errors='replace')
         
-        return self._sanitize_content(raw_text)
+        return FileProcessor._sanitize_content(raw_text)
     
-    def _extract_pdf_content(self, file_content: bytes) -> str:
+    # PDF and DOCX extraction are static so they can run in the shared process pool
+    @staticmethod
+    def _extract_pdf_content(file_content: bytes) -> str:
         pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
         text_content = []
         
@@ -399,9 +728,10 @@ class FileProcessor:
             text_content.append(page.extract_text())
         
         raw_text = '\n\n'.join(text_content)
-        return self._sanitize_content(raw_text)
+        return FileProcessor._sanitize_content(raw_text)
     
-    def _extract_docx_content(self, file_content: bytes) -> str:
+    @staticmethod
+    def _extract_docx_content(file_content: bytes) -> str:
         doc = docx.Document(io.BytesIO(file_content))
         text_content = []
         
@@ -409,10 +739,11 @@ class FileProcessor:
             text_content.append(paragraph.text)
         
         raw_text = '\n'.join(text_content)
-        return self._sanitize_content(raw_text)
+        return FileProcessor._sanitize_content(raw_text)
     
     
-    def _sanitize_content(self, content: str) -> str:
+    @staticmethod
+    def _sanitize_content(content: str) -> str:
         if not content:
             return content
 
@@ -0,0 +1,253 @@
+"""
+Durable processing of knowledge base uploads and git repository syncs.
+
+Uploads are staged in the ``kb-uploads`` storage bucket and processed by the
+``process_kb_file`` / ``process_kb_archive`` dramatiq actors in the worker
+process, instead of as FastAPI background tasks in the API process. Syncs of a
+git repository entry (``git_sync`` jobs) run on the archive queue. The message
+only carries the job id; everything else is read from the job row, so a job can
+be redelivered or retried safely:
+
+- a job that is already completed or failed is skipped
+- an archive that was partially processed resumes from its container entry,
+  skipping members that already have entries
+- failures are retried with exponential backoff up to ``KB_JOB_MAX_ATTEMPTS``
+- at most ``KB_JOBS_PER_ACCOUNT`` jobs of an account run at once; other jobs of
+  the account are deferred without using up an attempt
+
+Usage:
+    from knowledge_base.jobs import run_kb_job
+
+    retry = await run_kb_job(job_id, attempt)
+    if retry:
+        delay_ms, next_attempt = retry
+        actor.send_with_options(args=(job_id, next_attempt), delay=delay_ms)
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from knowledge_base.file_processor import FileProcessor
+from knowledge_base.retrieval import bump_kb_revision
+from services import redis
+from services.http_client import get_http_client
+from services.supabase import DBConnection
+from utils.config import config
+from utils.logger import logger
+from utils.offload import run_blocking
+
+KB_UPLOAD_BUCKET = "kb-uploads"
+GIT_SYNC_JOB_TYPE = "git_sync"
+
+# Delay before a job deferred by the per-account limit is tried again
+ACCOUNT_BUSY_DELAY_MS = 5_000
+RETRY_BASE_DELAY_MS = 10_000
+# Archives are streamed from storage to a temp file through a short-lived signed URL
+DOWNLOAD_URL_TTL = 10 * 60
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# A job's slot is a lease; the slot of a worker that died mid-job is freed when it runs out
+ACCOUNT_SLOT_TTL = 60 * 60
+
+# Per-account sorted set of job id -> lease deadline. Expired leases are pruned,
+# then the job gets a slot if it already holds one (redelivery) or one is free.
+ACQUIRE_ACCOUNT_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if not redis.call('ZSCORE', KEYS[1], ARGV[3]) and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+db = DBConnection()
+
+
+def upload_storage_path(account_id: str, upload_id: str, filename: str) -> str:
+    return f"{account_id}/{upload_id}/{Path(filename).name}"
+
+
+def is_large_upload(file_size: int) -> bool:
+    """Large uploads go to the low-priority archive queue."""
+    return file_size > config.KB_SMALL_FILE_BYTES
+
+
+async def stage_upload(client, storage_path: str, source: Union[bytes, str], content_type: str):
+    """Store an upload (bytes, or the path of a spooled file) for the worker."""
+    await client.storage.from_(KB_UPLOAD_BUCKET).upload(
+        storage_path, source, {"content-type": content_type}
+    )
+
+
+async def remove_staged_upload(client, storage_path: str):
+    try:
+        await client.storage.from_(KB_UPLOAD_BUCKET).remove([storage_path])
+    except Exception as e:
+        logger.warning(f"Failed to remove staged knowledge base upload {storage_path}: {e}")
+
+
+def _account_slots_key(account_id: str) -> str:
+    return f"kb_jobs_active:{account_id}"
+
+
+async def _acquire_account_slot(account_id: str, job_id: str) -> bool:
+    redis_client = await redis.get_client()
+    now = time.time()
+    acquired = await redis_client.eval(
+        ACQUIRE_ACCOUNT_SLOT_SCRIPT, 1, _account_slots_key(account_id),
+        now, now + ACCOUNT_SLOT_TTL, job_id, config.KB_JOBS_PER_ACCOUNT, ACCOUNT_SLOT_TTL,
+    )
+    return bool(acquired)
+
+
+async def _release_account_slot(account_id: str, job_id: str):
+    try:
+        redis_client = await redis.get_client()
+        await redis_client.zrem(_account_slots_key(account_id), job_id)
+    except Exception as e:
+        logger.warning(f"Failed to release knowledge base job slot of account {account_id}: {e}")
+
+
+async def _download_upload(client, storage_path: str, filename: str) -> Union[bytes, str]:
+    """Fetch a staged upload.
+
+    Archives (up to MAX_ZIP_FILE_SIZE) are streamed to a temp file in chunks,
+    never held in memory whole, and returned as its path.
+    """
+    bucket = client.storage.from_(KB_UPLOAD_BUCKET)
+    if Path(filename).suffix.lower() != '.zip':
+        return await bucket.download(storage_path)
+
+    signed = await bucket.create_signed_url(storage_path, DOWNLOAD_URL_TTL)
+    url = signed.get('signedURL') or signed.get('signedUrl')
+    if not url:
+        raise ValueError(f"Failed to create a download URL for {storage_path}")
+
+    target = await run_blocking(tempfile.NamedTemporaryFile, suffix='.zip', delete=False)
+    try:
+        async with get_http_client(url).stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                await run_blocking(target.write, chunk)
+        await run_blocking(target.close)
+    except BaseException:
+        target.close()
+        os.unlink(target.name)
+        raise
+    return target.name
+
+
+async def run_kb_job(job_id: str, attempt: int = 0) -> Optional[Tuple[int, int]]:
+    """Process a queued knowledge base upload or git sync job.
+
+    Returns:
+        None when the job is finished (or nothing is left to do), otherwise
+        (delay_ms, attempt) with which the job should be sent again
+    """
+    client = await db.client
+    job_result = await client.table('agent_kb_file_processing_jobs').select('*').eq('job_id', job_id).execute()
+    if not job_result.data:
+        logger.warning(f"Knowledge base job {job_id} no longer exists")
+        return None
+
+    job = job_result.data[0]
+    if job['status'] in ('completed', 'failed'):
+        logger.debug(f"Knowledge base job {job_id} already {job['status']}")
+        return None
+
+    agent_id = job['agent_id']
+    account_id = job['account_id']
+    source_info = job['source_info'] or {}
+    storage_path = source_info.get('storage_path')
+    filename = source_info.get('filename') or 'upload'
+    mime_type = source_info.get('mime_type') or 'application/octet-stream'
+
+    if not await _acquire_account_slot(account_id, job_id):
+        logger.debug(f"Deferring knowledge base job {job_id}: account {account_id} is at its concurrency limit")
+        return ACCOUNT_BUSY_DELAY_MS, attempt
+
+    file_content = None
+    finished = True
+    try:
+        await client.rpc('update_agent_kb_job_status', {
+            'p_job_id': job_id,
+            'p_status': 'processing'
+        }).execute()
+
+        if job['job_type'] == GIT_SYNC_JOB_TYPE:
+            result = await FileProcessor().sync_git_repository(
+                agent_id, account_id, source_info['repo_entry_id'], job_id=job_id
+            )
+            if not result['success']:
+                # Usually the fetch failed; retried like other errors
+                raise Exception(result.get('error', 'Unknown error'))
+        else:
+            file_content = await _download_upload(client, storage_path, filename)
+            result = await FileProcessor().process_file_upload(
+                agent_id, account_id, file_content, filename, mime_type,
+                job_id=job_id, container_entry_id=job.get('container_entry_id')
+            )
+
+        if result['success']:
+            if job['job_type'] == GIT_SYNC_JOB_TYPE:
+                entries_created = result.get('total_processed', 0)
+                total_files = entries_created + result.get('total_failed', 0)
+            elif 'total_extracted' in result:
+                entries_created = result['total_extracted']
+                total_files = result['total_extracted'] + result['total_failed']
+            else:
+                entries_created = total_files = 1
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'completed',
+                'p_result_info': result,
+                'p_entries_created': entries_created,
+                'p_total_files': total_files
+            }).execute()
+        else:
+            # The file itself could not be processed; retrying won't help
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'failed',
+                'p_error_message': result.get('error', 'Unknown error')
+            }).execute()
+        return None
+
+    except Exception as e:
+        next_attempt = attempt + 1
+        if next_attempt < config.KB_JOB_MAX_ATTEMPTS:
+            finished = False
+            delay_ms = RETRY_BASE_DELAY_MS * 2 ** attempt
+            logger.warning(f"Knowledge base job {job_id} failed (attempt {next_attempt}), retrying in {delay_ms}ms: {str(e)}")
+            try:
+                await client.rpc('update_agent_kb_job_status', {
+                    'p_job_id': job_id,
+                    'p_status': 'pending',
+                    'p_error_message': str(e)
+                }).execute()
+            except Exception:
+                pass
+            return delay_ms, next_attempt
+
+        logger.error(f"Knowledge base job {job_id} failed after {next_attempt} attempts: {str(e)}")
+        try:
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'failed',
+                'p_error_message': str(e)
+            }).execute()
+        except Exception:
+            pass
+        return None
+
+    finally:
+        await _release_account_slot(account_id, job_id)
+        if isinstance(file_content, str) and os.path.exists(file_content):
+            os.unlink(file_content)
+        if finished and storage_path:
+            await remove_staged_upload(client, storage_path)
+        # Entries may have been created even if the job failed part-way
+        await bump_kb_revision(agent_id)
@@ -0,0 +1,441 @@
+"""
+Query-time retrieval over agent knowledge base chunks.
+
+Entries are split into overlapping chunks when they are created or updated
+(``store_entry_chunks``). When an agent runs, its chunks are ranked against the
+user's message with BM25 and, when a local embedding model is configured
+(``KB_EMBEDDING_MODEL`` with the optional ``fastembed`` package), the best
+lexical candidates are reranked by embedding similarity. The top chunks are then
+packed into the prompt under a token budget, instead of concatenating whole
+entries in recency order.
+
+Loaded chunks are cached in Redis and the built index in process memory, both
+keyed by a per-agent revision counter that every knowledge base write bumps
+(``bump_kb_revision``), so run startup usually costs a single Redis round trip.
+
+Usage:
+    from knowledge_base.retrieval import retrieve_agent_kb_context
+
+    context = await retrieve_agent_kb_context(client, agent_id, query=user_message)
+"""
+
+import json
+import math
+import re
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from knowledge_base.usage_logger import kb_usage_logger
+from services import redis
+from utils.config import config
+from utils.logger import logger
+from utils.offload import run_blocking
+
+try:
+    from fastembed import TextEmbedding
+except ImportError:
+    TextEmbedding = None
+
+# Same estimate as the calculate_agent_kb_entry_tokens() trigger
+CHARS_PER_TOKEN = 4
+
+# Lexical candidates passed to the embedding reranker
+RERANK_CANDIDATES = 50
+# Reciprocal rank fusion constant
+RRF_K = 60
+
+# Cached chunk payloads expire; revision counters never do, so a memoized index can't be revived
+KB_CHUNKS_TTL = 60 * 60
+# Indexes memoized per process, keyed by (agent_id, revision)
+MAX_LOCAL_INDEXES = 64
+
+KB_CONTEXT_HEADER = "# AGENT KNOWLEDGE BASE\n\nThe following is your specialized knowledge base. Use this information as context when responding:"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its "
+    "me my of on or our so that the their then there these this to was we were what when "
+    "where which who why will with would you your".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords, used for both chunks and queries."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def chunk_text(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    """Split text into chunks of roughly ``max_tokens``, on paragraph and sentence boundaries.
+
+    Consecutive chunks share about ``overlap_tokens`` of text so that passages
+    straddling a boundary remain retrievable.
+    """
+    max_chars = (max_tokens or config.KB_CHUNK_TOKENS) * CHARS_PER_TOKEN
+    overlap_chars = min((overlap_tokens if overlap_tokens is not None else config.KB_CHUNK_OVERLAP_TOKENS) * CHARS_PER_TOKEN, max_chars // 2)
+
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars - overlap_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            tail = current[-overlap_chars:] if overlap_chars else ""
+            # Start the overlap on a word boundary
+            tail = tail[tail.find(" ") + 1:] if " " in tail else ""
+            current = f"{tail} {piece}".strip() if len(tail) + len(piece) + 1 <= max_chars else piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class KBChunk:
+    """A retrievable piece of a knowledge base entry."""
+    entry_id: str
+    entry_name: str
+    entry_description: Optional[str]
+    chunk_index: int
+    content: str
+    token_count: int
+    chunk_id: Optional[str] = None
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over knowledge base chunks."""
+
+    def __init__(self, chunks: List[KBChunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+
+        for i, chunk in enumerate(chunks):
+            # Entry names are short and descriptive, so they are indexed with every chunk
+            term_freqs = Counter(tokenize(f"{chunk.entry_name}\n{chunk.content}"))
+            self._lengths.append(sum(term_freqs.values()))
+            for term, freq in term_freqs.items():
+                self._postings[term].append((i, freq))
+
+        n = len(chunks)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Tuple[KBChunk, float]]:
+        """Return chunks matching the query, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, freq in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+                scores[i] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if top_k is not None:
+            ranked = ranked[:top_k]
+        return [(self.chunks[i], score) for i, score in ranked]
+
+
+_embedding_model = None
+
+
+def _get_embedding_model():
+    global _embedding_model
+    if TextEmbedding is None or not config.KB_EMBEDDING_MODEL:
+        return None
+    if _embedding_model is None:
+        logger.debug(f"Loading knowledge base embedding model {config.KB_EMBEDDING_MODEL}")
+        _embedding_model = TextEmbedding(model_name=config.KB_EMBEDDING_MODEL)
+    return _embedding_model
+
+
+def _embedding_rerank(query: str, ranked: List[Tuple[KBChunk, float]]) -> List[Tuple[KBChunk, float]]:
+    """Fuse lexical and embedding ranks of the top lexical candidates (reciprocal rank fusion)."""
+    model = _get_embedding_model()
+    if model is None or len(ranked) < 2:
+        return ranked
+
+    candidates, rest = ranked[:RERANK_CANDIDATES], ranked[RERANK_CANDIDATES:]
+    vectors = list(model.embed([query] + [f"{c.entry_name}\n{c.content}" for c, _ in candidates]))
+    query_vector, chunk_vectors = vectors[0], vectors[1:]
+
+    def cosine(a, b) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+    similarities = [cosine(query_vector, v) for v in chunk_vectors]
+    dense_rank = {i: rank for rank, i in enumerate(sorted(range(len(candidates)), key=lambda i: similarities[i], reverse=True))}
+    fused = [
+        (chunk, 1 / (RRF_K + lexical_rank) + 1 / (RRF_K + dense_rank[lexical_rank]))
+        for lexical_rank, (chunk, _) in enumerate(candidates)
+    ]
+    fused.sort(key=lambda item: item[1], reverse=True)
+    return fused + rest
+
+
+def select_chunks(ranked: List[Tuple[KBChunk, float]], max_tokens: int) -> List[KBChunk]:
+    """Greedily take the best chunks that fit in the token budget."""
+    selected, used = [], 0
+    for chunk, _ in ranked:
+        if used + chunk.token_count > max_tokens:
+            continue
+        selected.append(chunk)
+        used += chunk.token_count
+    return selected
+
+
+def format_context(selected: List[KBChunk]) -> Optional[str]:
+    """Render selected chunks grouped by entry (most relevant entry first, chunks in document order)."""
+    if not selected:
+        return None
+    by_entry: Dict[str, List[KBChunk]] = {}
+    for chunk in selected:
+        by_entry.setdefault(chunk.entry_id, []).append(chunk)
+
+    context_text = ""
+    for chunks in by_entry.values():
+        chunks.sort(key=lambda c: c.chunk_index)
+        context_text += f"\n\n## {chunks[0].entry_name}\n"
+        if chunks[0].entry_description:
+            context_text += f"{chunks[0].entry_description}\n\n"
+        context_text += "\n\n[...]\n\n".join(c.content for c in chunks)
+    return KB_CONTEXT_HEADER + context_text
+
+
+async def store_entry_chunks(client, entry_id: str, agent_id: str, content: str) -> List[Dict[str, Any]]:
+    """(Re)chunk an entry and replace its stored chunks. Returns the inserted rows."""
+    rows = [
+        {
+            'entry_id': entry_id,
+            'agent_id': agent_id,
+            'chunk_index': i,
+            'content': chunk,
+            'token_count': estimate_tokens(chunk),
+        }
+        for i, chunk in enumerate(chunk_text(content))
+    ]
+    await client.table('agent_knowledge_base_chunks').delete().eq('entry_id', entry_id).execute()
+    if rows:
+        await client.table('agent_knowledge_base_chunks').insert(rows).execute()
+    return rows
+
+
+async def index_entry(client, entry_id: str, agent_id: str, content: str):
+    """Best-effort ``store_entry_chunks``; on failure the entry is chunked lazily at retrieval time."""
+    try:
+        await store_entry_chunks(client, entry_id, agent_id, content)
+    except Exception as e:
+        logger.warning(f"Failed to chunk knowledge base entry {entry_id}: {e}")
+
+
+async def index_entries(client, agent_id: str, entries: List[Tuple[str, str]]):
+    """Best-effort chunking of newly created entries, given as (entry_id, content), in one insert.
+    
+    Entries with a ``content_hash`` get the chunks of an identical entry of the same
+    account copied instead of being chunked again.
+    """
+    if not entries:
+        return
+    try:
+        copied = await client.rpc('copy_agent_kb_chunks', {'p_entry_ids': [entry_id for entry_id, _ in entries]}).execute()
+        reused = {row['copied_entry_id'] for row in copied.data or []}
+        entries = [(entry_id, content) for entry_id, content in entries if entry_id not in reused]
+    except Exception as e:
+        logger.warning(f"Failed to reuse knowledge base chunks: {e}")
+    rows = [
+        {
+            'entry_id': entry_id,
+            'agent_id': agent_id,
+            'chunk_index': i,
+            'content': chunk,
+            'token_count': estimate_tokens(chunk),
+        }
+        for entry_id, content in entries
+        for i, chunk in enumerate(chunk_text(content))
+    ]
+    if not rows:
+        return
+    try:
+        await client.table('agent_knowledge_base_chunks').insert(rows).execute()
+    except Exception as e:
+        logger.warning(f"Failed to chunk {len(entries)} knowledge base entries: {e}")
+
+
+async def load_agent_chunks(client, agent_id: str) -> List[KBChunk]:
+    """Load the retrievable chunks of an agent, chunking legacy entries on first use."""
+    result = await client.rpc('get_agent_kb_chunks', {'p_agent_id': agent_id}).execute()
+
+    chunks: List[KBChunk] = []
+    for row in result.data or []:
+        if row['chunk_id'] is not None:
+            chunks.append(KBChunk(
+                chunk_id=row['chunk_id'],
+                entry_id=row['entry_id'],
+                entry_name=row['entry_name'],
+                entry_description=row.get('entry_description'),
+                chunk_index=row['chunk_index'],
+                content=row['content'],
+                token_count=row['token_count'] or 0,
+            ))
+            continue
+
+        # Entry created before chunking existed
+        try:
+            stored = await store_entry_chunks(client, row['entry_id'], agent_id, row['content'])
+        except Exception as e:
+            logger.warning(f"Failed to store chunks for knowledge base entry {row['entry_id']}: {e}")
+            stored = [
+                {'chunk_index': i, 'content': c, 'token_count': estimate_tokens(c)}
+                for i, c in enumerate(chunk_text(row['content']))
+            ]
+        chunks.extend(
+            KBChunk(
+                entry_id=row['entry_id'],
+                entry_name=row['entry_name'],
+                entry_description=row.get('entry_description'),
+                chunk_index=s['chunk_index'],
+                content=s['content'],
+                token_count=s['token_count'],
+            )
+            for s in stored
+        )
+    return chunks
+
+
+_local_indexes: "OrderedDict[Tuple[str, int], BM25Index]" = OrderedDict()
+
+
+def _revision_key(agent_id: str) -> str:
+    return f"kb_revision:{agent_id}"
+
+
+def _chunks_key(agent_id: str) -> str:
+    return f"kb_chunks:{agent_id}"
+
+
+async def bump_kb_revision(agent_id: str):
+    """Invalidate the cached chunks and indexes of an agent after its knowledge base changed."""
+    try:
+        client = await redis.get_client()
+        await client.incr(_revision_key(agent_id))
+        await client.delete(_chunks_key(agent_id))
+    except Exception as e:
+        logger.warning(f"Failed to bump knowledge base revision for agent {agent_id}: {e}")
+
+
+async def get_agent_kb_index(client, agent_id: str) -> BM25Index:
+    """Return the agent's BM25 index, reading the revision and cached chunks in one round trip.
+
+    Indexes are memoized per process by (agent, revision); chunks are shared across
+    processes through Redis, tagged with the revision they were loaded at. A payload
+    from an older revision is ignored, so a bump invalidates every process at once.
+    """
+    revision: Optional[int] = None
+    payload = None
+    try:
+        redis_client = await redis.get_client()
+        raw_revision, raw_payload = await redis_client.mget(_revision_key(agent_id), _chunks_key(agent_id))
+        revision = int(raw_revision or 0)
+        index = _local_indexes.get((agent_id, revision))
+        if index is not None:
+            _local_indexes.move_to_end((agent_id, revision))
+            return index
+        if raw_payload:
+            payload = json.loads(raw_payload)
+            if payload.get('revision') != revision:
+                payload = None
+    except Exception as e:
+        logger.warning(f"Knowledge base cache unavailable for agent {agent_id}: {e}")
+
+    if payload is not None:
+        chunks = [KBChunk(**c) for c in payload['chunks']]
+    else:
+        chunks = await load_agent_chunks(client, agent_id)
+        if revision is not None:
+            try:
+                data = json.dumps({'revision': revision, 'chunks': [asdict(c) for c in chunks]})
+                await redis_client.set(_chunks_key(agent_id), data, ex=KB_CHUNKS_TTL)
+            except Exception as e:
+                logger.warning(f"Failed to cache knowledge base chunks for agent {agent_id}: {e}")
+
+    index = await run_blocking(BM25Index, chunks)
+    if revision is not None:
+        _local_indexes[(agent_id, revision)] = index
+        while len(_local_indexes) > MAX_LOCAL_INDEXES:
+            _local_indexes.popitem(last=False)
+    return index
+
+
+async def retrieve_agent_kb_context(
+    client,
+    agent_id: str,
+    query: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+) -> Optional[str]:
+    """Build the knowledge base prompt section most relevant to ``query``.
+
+    Args:
+        client: Supabase client
+        agent_id: Agent whose knowledge base is searched
+        query: The user's message; without one (or without lexical matches) the
+            most recent entries are used, as before
+        max_tokens: Token budget for the selected chunks (``KB_CONTEXT_MAX_TOKENS``)
+
+    Returns:
+        Formatted context, or None if the agent has no eligible entries
+    """
+    max_tokens = max_tokens or config.KB_CONTEXT_MAX_TOKENS
+    index = await get_agent_kb_index(client, agent_id)
+    chunks = index.chunks
+    if not chunks:
+        return None
+
+    ranked: List[Tuple[KBChunk, float]] = []
+    if query and query.strip():
+        ranked = index.search(query)
+        if ranked:
+            ranked = await run_blocking(_embedding_rerank, query, ranked)
+
+    if not ranked:
+        # Chunks arrive newest entry first, matching the previous behaviour
+        ranked = [(chunk, 0.0) for chunk in chunks]
+
+    selected = select_chunks(ranked, max_tokens)
+    logger.debug(
+        f"Selected {len(selected)}/{len(chunks)} knowledge base chunks for agent {agent_id} "
+        f"({sum(c.token_count for c in selected)}/{max_tokens} tokens)"
+    )
+    if selected:
+        tokens_by_entry: Dict[str, int] = defaultdict(int)
+        for chunk in selected:
+            tokens_by_entry[chunk.entry_id] += chunk.token_count
+        kb_usage_logger.log(agent_id, tokens_by_entry)
+    return format_context(selected)
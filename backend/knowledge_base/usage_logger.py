@@ -0,0 +1,81 @@
+"""
+Batched, off-critical-path logging of knowledge base usage.
+
+Injecting knowledge base context into a prompt used to insert one
+``agent_knowledge_base_usage_log`` row per entry before the first LLM call.
+Callers now hand the rows to ``kb_usage_logger``, which buffers them and writes
+them in a single insert from a background task.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from services.supabase import DBConnection
+from utils.logger import logger
+
+FLUSH_INTERVAL_SECONDS = 5.0
+MAX_BATCH_SIZE = 500
+# Rows kept when the database is unreachable; older ones are dropped
+MAX_BUFFERED_ROWS = 5000
+
+
+class KBUsageLogger:
+    """Buffers usage rows and flushes them periodically or when a batch fills up."""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL_SECONDS, max_batch: int = MAX_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._rows: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def log(self, agent_id: str, tokens_by_entry: Dict[str, int], usage_type: str = 'context_injection'):
+        """Queue usage rows for the given entries. Never blocks and never raises."""
+        self._rows.extend(
+            {'entry_id': entry_id, 'agent_id': agent_id, 'usage_type': usage_type, 'tokens_used': tokens}
+            for entry_id, tokens in tokens_by_entry.items()
+        )
+        if len(self._rows) > MAX_BUFFERED_ROWS:
+            dropped = len(self._rows) - MAX_BUFFERED_ROWS
+            del self._rows[:dropped]
+            logger.warning(f"Dropped {dropped} buffered knowledge base usage rows")
+        try:
+            self._ensure_task()
+        except RuntimeError:
+            # No running loop; rows are written by the next flush
+            return
+        if len(self._rows) >= self.max_batch:
+            self._wake.set()
+
+    def _ensure_task(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while self._rows:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered rows now."""
+        while self._rows:
+            batch, self._rows = self._rows[:self.max_batch], self._rows[self.max_batch:]
+            try:
+                client = await DBConnection().client
+                await client.table('agent_knowledge_base_usage_log').insert(batch).execute()
+                logger.debug(f"Wrote {len(batch)} knowledge base usage rows")
+            except Exception as e:
+                logger.warning(f"Failed to write {len(batch)} knowledge base usage rows, will retry: {e}")
+                self._rows[:0] = batch
+                return
+
+
+kb_usage_logger = KBUsageLogger()
@@ -8,6 +8,7 @@ import httpx
 import json
 import asyncio
 from utils.logger import logger
+from services.http_client import get_http_client
 
 class AppSlug:
     def __init__(self, value: str):
@@ -92,11 +93,8 @@ class AppService:
         self._semaphore = asyncio.Semaphore(10)
 
     async def _get_session(self) -> httpx.AsyncClient:
-        if self.session is None or self.session.is_closed:
-            self.session = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0),
-                headers={"User-Agent": "Suna-Pipedream-Client/1.0"}
-            )
+        # Shared pooled client: all Pipedream services reuse the same connections
+        self.session = get_http_client(self.base_url, headers={"User-Agent": "Suna-Pipedream-Client/1.0"})
         return self.session
     
     async def _ensure_access_token(self) -> str:
@@ -401,8 +399,8 @@ class AppService:
         return apps
 
     async def close(self):
-        if self.session and not self.session.is_closed:
-            await self.session.aclose()
+        # The pooled client is shared and closed on application shutdown
+        self.session = None
     
     async def __aenter__(self):
         return self
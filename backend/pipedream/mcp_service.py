@@ -9,6 +9,7 @@ from enum import Enum
 
 import httpx
 from utils.logger import logger
+from services.http_client import get_http_client
 
 try:
     from mcp import ClientSession
@@ -99,11 +100,8 @@ class MCPService:
         self.token_expires_at = None
 
     async def _get_session(self) -> httpx.AsyncClient:
-        if self.session is None or self.session.is_closed:
-            self.session = httpx.AsyncClient(
-                timeout=httpx.Timeout(30.0),
-                headers={"User-Agent": "Suna-Pipedream-Client/1.0"}
-            )
+        # Shared pooled client: all Pipedream services reuse the same connections
+        self.session = get_http_client(self.base_url, headers={"User-Agent": "Suna-Pipedream-Client/1.0"})
         return self.session
 
     async def _ensure_access_token(self) -> str:
@@ -347,8 +345,8 @@ class MCPService:
             raise MCPConnectionError(str(e))
 
     async def close(self):
-        if self.session and not self.session.is_closed:
-            await self.session.aclose()
+        # The pooled client is shared and closed on application shutdown
+        self.session = None
 
 
 _mcp_service = None
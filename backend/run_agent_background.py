@@ -19,6 +19,9 @@ from dramatiq.brokers.redis import RedisBroker
 import os
 from services.langfuse import langfuse
 from utils.retry import retry
+from utils.offload import start_loop_lag_monitor
+from utils.metrics import start_metrics_server
+from knowledge_base.jobs import run_kb_job
 
 import sentry_sdk
 from typing import Dict, Any
@@ -42,6 +45,8 @@ async def initialize():
         instance_id = str(uuid.uuid4())[:8]
     await retry(lambda: redis.initialize_async())
     await db.initialize()
+    start_loop_lag_monitor()
+    start_metrics_server()
 
     _initialized = True
     logger.debug(f"Initialized agent API with instance ID: {instance_id}")
@@ -52,6 +57,27 @@ async def check_health(key: str):
     structlog.contextvars.clear_contextvars()
     await redis.set(key, "healthy", ex=redis.REDIS_KEY_TTL)
 
+async def _run_kb_job(actor, job_id: str, attempt: int):
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(kb_job_id=job_id)
+
+    await initialize()
+    retry = await run_kb_job(job_id, attempt)
+    if retry:
+        # The broker has no Retries middleware; re-send with a delay instead
+        delay_ms, next_attempt = retry
+        actor.send_with_options(args=(job_id, next_attempt), delay=delay_ms)
+
+@dramatiq.actor(queue_name="kb_processing")
+async def process_kb_file(job_id: str, attempt: int = 0):
+    """Process a small knowledge base upload."""
+    await _run_kb_job(process_kb_file, job_id, attempt)
+
+@dramatiq.actor(queue_name="kb_processing_large", priority=10)
+async def process_kb_archive(job_id: str, attempt: int = 0):
+    """Process a large upload or archive; runs after queued small uploads."""
+    await _run_kb_job(process_kb_archive, job_id, attempt)
+
 @dramatiq.actor
 async def run_agent_background(
     agent_run_id: str,
@@ -1,7 +1,20 @@
 import express from 'express';
+import { randomUUID } from 'crypto';
+import { promises as fs } from 'fs';
+import * as path from 'path';
 import { Stagehand, type LogLine, type Page } from '@browserbasehq/stagehand';
 import { FileChooser } from 'playwright';
 
+// Full-resolution screenshots are written here and returned by path; the caller
+// downloads the raw bytes instead of receiving them base64-encoded in the JSON body
+const SCREENSHOT_DIR = '/tmp/browser-screenshots';
+// Older screenshots are deleted once more than this many exist
+const MAX_SCREENSHOTS = 20;
+const THUMBNAIL_SCALE = 0.25;
+const THUMBNAIL_QUALITY = 60;
+const MAX_BATCH_ACTIONS = 20;
+const MAX_BATCH_WAIT_SECONDS = 10;
+
 const app = express();
 app.use(express.json());
 
@@ -11,8 +24,42 @@ interface BrowserActionResult {
     error?: string;
     url: string;
     title: string;
-    screenshot_base64?: string;
+    screenshot_path?: string;
+    screenshot_size?: number;
+    thumbnail_base64?: string;
+    action?: string;
+}
+
+// One step of a /batch request. `act`/`extract` use Stagehand; `click`/`type`
+// take a selector and run directly through Playwright without a model call.
+interface BatchAction {
+    type: 'navigate' | 'act' | 'extract' | 'click' | 'type' | 'wait' | 'screenshot';
+    url?: string;
     action?: string;
+    instruction?: string;
+    variables?: Record<string, string>;
+    iframes?: boolean;
+    selector?: string;
+    text?: string;
+    seconds?: number;
+}
+
+interface BatchStepResult {
+    type: string;
+    success: boolean;
+    message: string;
+    action?: string;
+    extraction?: unknown;
+    screenshot_path?: string;
+    screenshot_size?: number;
+}
+
+interface PageState {
+    url: string;
+    title: string;
+    screenshot_path?: string;
+    screenshot_size?: number;
+    thumbnail_base64?: string;
 }
 
 class BrowserAutomation {
@@ -21,6 +68,7 @@ class BrowserAutomation {
     private stagehand: Stagehand | null;
     public browserInitialized: boolean;
     private page: Page | null;
+    private screenshots: string[] = [];
     constructor() {
         this.router = express.Router();
         this.browserInitialized = false;
@@ -31,6 +79,7 @@ class BrowserAutomation {
         this.router.post('/screenshot', this.screenshot.bind(this));
         this.router.post('/act', this.act.bind(this));
         this.router.post('/extract', this.extract.bind(this));
+        this.router.post('/batch', this.batch.bind(this));
 
     }
 
@@ -133,29 +182,64 @@ class BrowserAutomation {
         }
     }
 
-    async get_stagehand_state() {
+    async capture_screenshot(page: Page): Promise<{screenshot_path: string, screenshot_size: number}> {
+        await fs.mkdir(SCREENSHOT_DIR, { recursive: true });
+        const screenshot_path = path.join(SCREENSHOT_DIR, `${Date.now()}-${randomUUID().slice(0, 8)}.png`);
+        const buffer = await page.screenshot({ fullPage: false, path: screenshot_path });
+
+        this.screenshots.push(screenshot_path);
+        for (const old of this.screenshots.splice(0, Math.max(0, this.screenshots.length - MAX_SCREENSHOTS))) {
+            fs.unlink(old).catch(() => {});
+        }
+        return { screenshot_path, screenshot_size: buffer.length };
+    }
+
+    async capture_thumbnail(page: Page): Promise<string | undefined> {
+        // Downscaled by the browser itself, so no image library is needed here
+        try {
+            const viewport = page.viewportSize() || { width: 1024, height: 768 };
+            const session = await page.context().newCDPSession(page);
+            try {
+                const { data } = await session.send('Page.captureScreenshot', {
+                    format: 'jpeg',
+                    quality: THUMBNAIL_QUALITY,
+                    clip: { x: 0, y: 0, width: viewport.width, height: viewport.height, scale: THUMBNAIL_SCALE },
+                });
+                return data;
+            } finally {
+                await session.detach();
+            }
+        } catch (error) {
+            console.error("Error capturing thumbnail", error);
+            return undefined;
+        }
+    }
+
+    async get_stagehand_state(): Promise<PageState> {
         try{
             const health = this.health();
             if (this.page && health.status === "healthy") {
-                const screenshot_base64 = await this.page.screenshot({ fullPage: false }).then(buffer => buffer.toString('base64'));
+                const [screenshot, thumbnail_base64] = await Promise.all([
+                    this.capture_screenshot(this.page),
+                    this.capture_thumbnail(this.page),
+                ]);
                 const page_info = {
                     url: await this.page.url(),
                     title: await this.page.title(),
-                    screenshot_base64: screenshot_base64,
+                    ...screenshot,
+                    thumbnail_base64,
                 };
                 return page_info;
             }
             return {
                 url: "",
                 title: "",
-                screenshot_base64: "",
             }
         } catch (error) {
             console.error("Error capturing stagehand state", error);
             return {
                 url: "",
                 title: "",
-                screenshot_base64: "",
             }
         }
     }
@@ -170,9 +254,7 @@ class BrowserAutomation {
                     success: true,
                     message: "Navigated to " + url,
                     error: "",
-                    url: page_info.url,
-                    title: page_info.title,
-                    screenshot_base64: page_info?.screenshot_base64,
+                    ...page_info,
                 }
                 res.json(result);
             } else {
@@ -188,9 +270,7 @@ class BrowserAutomation {
             res.status(500).json({
                 success: false,
                 message: "Failed to navigate to " + req.body.url,
-                url: page_info.url,
-                title: page_info.title,
-                screenshot_base64: page_info.screenshot_base64,
+                ...page_info,
                 error
             })
         }
@@ -203,9 +283,7 @@ class BrowserAutomation {
                 const result: BrowserActionResult = {
                     success: true,
                     message: "Screenshot taken",
-                    url: page_info.url,
-                    title: page_info.title,
-                    screenshot_base64: page_info.screenshot_base64,
+                    ...page_info,
                 }
                 res.json(result);
             } else {
@@ -246,9 +324,7 @@ class BrowserAutomation {
                     success: result.success,
                     message: result.message,
                     action: result.action,
-                    url: page_info.url,
-                    title: page_info.title,
-                    screenshot_base64: page_info.screenshot_base64,
+                    ...page_info,
                 }
                 res.json(response);
             } else {
@@ -263,9 +339,7 @@ class BrowserAutomation {
             res.status(500).json({
                 success: false,
                 message: "Failed to act",
-                url: page_info.url,
-                title: page_info.title,
-                screenshot_base64: page_info.screenshot_base64,
+                ...page_info,
                 error
             })
         } finally {
@@ -286,9 +360,7 @@ class BrowserAutomation {
                     success: result.success,
                     message: `Extracted result for: ${instruction}`,
                     action: result.extraction,
-                    url: page_info.url,
-                    title: page_info.title,
-                    screenshot_base64: page_info.screenshot_base64,
+                    ...page_info,
                 }
                 res.json(response);
             }
@@ -298,9 +370,93 @@ class BrowserAutomation {
             res.status(500).json({
                 success: false,
                 message: "Failed to extract",
-                url: page_info.url,
-                title: page_info.title,
-                screenshot_base64: page_info.screenshot_base64,
+                ...page_info,
+                error
+            })
+        }
+    }
+
+    async run_batch_step(page: Page, step: BatchAction): Promise<BatchStepResult> {
+        const type = step.type;
+        try {
+            switch (type) {
+                case 'navigate':
+                    await page.goto(step.url as string, { waitUntil: 'domcontentloaded', timeout: 30000 });
+                    return { type, success: true, message: "Navigated to " + step.url };
+                case 'act': {
+                    const result = await page.act({ action: step.action as string, iframes: step.iframes ?? true, variables: step.variables });
+                    return { type, success: result.success, message: result.message, action: result.action };
+                }
+                case 'extract': {
+                    const result = await page.extract({ instruction: step.instruction as string, iframes: step.iframes });
+                    return { type, success: true, message: `Extracted result for: ${step.instruction}`, extraction: result.extraction };
+                }
+                case 'click':
+                    await page.click(step.selector as string, { timeout: 10000 });
+                    return { type, success: true, message: "Clicked " + step.selector };
+                case 'type':
+                    await page.fill(step.selector as string, step.text ?? '', { timeout: 10000 });
+                    return { type, success: true, message: "Typed into " + step.selector };
+                case 'wait': {
+                    const seconds = Math.min(Math.max(step.seconds ?? 1, 0), MAX_BATCH_WAIT_SECONDS);
+                    await page.waitForTimeout(seconds * 1000);
+                    return { type, success: true, message: `Waited ${seconds}s` };
+                }
+                case 'screenshot':
+                    return { type, success: true, message: "Screenshot taken", ...(await this.capture_screenshot(page)) };
+                default:
+                    return { type, success: false, message: `Unknown action type: ${type}` };
+            }
+        } catch (error) {
+            console.error(`Batch step ${type} failed`, error);
+            return { type, success: false, message: error instanceof Error ? error.message : String(error) };
+        }
+    }
+
+    // Runs a sequence of actions in one request and returns the page state (and
+    // screenshot) once at the end, instead of one round trip per action
+    async batch(req: express.Request, res: express.Response): Promise<void> {
+        try {
+            if (!(this.page && this.browserInitialized)) {
+                res.status(500).json({
+                    "status": "error",
+                    "message": "Browser not initialized"
+                })
+                return;
+            }
+
+            const { actions, stop_on_error = true } = req.body as { actions?: BatchAction[], stop_on_error?: boolean };
+            if (!Array.isArray(actions) || actions.length === 0 || actions.length > MAX_BATCH_ACTIONS) {
+                res.status(400).json({
+                    success: false,
+                    message: `actions must be a list of 1 to ${MAX_BATCH_ACTIONS} steps`
+                })
+                return;
+            }
+
+            const steps: BatchStepResult[] = [];
+            for (const step of actions) {
+                const result = await this.run_batch_step(this.page, step);
+                steps.push(result);
+                if (!result.success && stop_on_error) {
+                    break;
+                }
+            }
+
+            const page_info = await this.get_stagehand_state();
+            res.json({
+                success: steps.every(step => step.success),
+                message: `Ran ${steps.length} of ${actions.length} actions`,
+                steps,
+                ...page_info,
+            });
+        } catch (error) {
+            console.error(error);
+            const page_info = await this.get_stagehand_state();
+            res.status(500).json({
+                success: false,
+                message: "Failed to run batch",
+                ...page_info,
                 error
             })
         }
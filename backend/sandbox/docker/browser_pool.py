@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Shared headless Chromium pool for the presentation export routers
+
+The PDF and PPTX converters render every slide in a page from this pool instead
+of launching (and tearing down) a browser per request:
+
+- browsers are launched on first use and kept running between requests
+- each browser has a single context (1920x1080, device scale factor 1) that all
+  of its pages are opened in, so cached fonts and images are reused
+- at most BROWSER_POOL_MAX_PAGES pages are open per browser; further renders
+  wait for a free page
+- a browser is retired after BROWSER_POOL_RECYCLE_AFTER renders (or when it
+  crashes) and closed once its open pages are done, which caps its memory
+
+Usage:
+    from browser_pool import browser_pool, wait_until_ready
+
+    async with browser_pool.page() as page:
+        await page.goto(url, wait_until="load")
+        await wait_until_ready(page)
+        await page.pdf(...)
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+
+
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "1"))
+BROWSER_POOL_MAX_PAGES = int(os.environ.get("BROWSER_POOL_MAX_PAGES", "6"))
+BROWSER_POOL_RECYCLE_AFTER = int(os.environ.get("BROWSER_POOL_RECYCLE_AFTER", "200"))
+# Upper bound for each readiness signal (network idle, fonts, images)
+PAGE_READY_TIMEOUT_MS = 5000
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--force-device-scale-factor=1',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-web-security',
+    '--disable-features=TranslateUI',
+    '--disable-ipc-flooding-protection'
+]
+
+# Resolves once fonts are loaded, images are decoded and two frames have been
+# rendered, or after the given timeout
+PAGE_READY_SCRIPT = r"""
+    async (timeoutMs) => {
+        const ready = (async () => {
+            await document.fonts.ready;
+            await Promise.all(Array.from(document.images).map(img => {
+                if (img.complete) {
+                    return img.decode().catch(() => {});
+                }
+                return new Promise(resolve => {
+                    img.addEventListener('load', resolve, { once: true });
+                    img.addEventListener('error', resolve, { once: true });
+                }).then(() => img.decode().catch(() => {}));
+            }));
+            // Fonts and images may have changed the layout
+            await document.fonts.ready;
+            await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+        })();
+        await Promise.race([ready, new Promise(resolve => setTimeout(resolve, timeoutMs))]);
+    }
+"""
+
+
+async def wait_until_ready(page, timeout_ms: int = PAGE_READY_TIMEOUT_MS) -> None:
+    """Wait until a loaded page has settled, instead of sleeping a fixed time.
+
+    Waits for pending network requests, loaded fonts, decoded images and two
+    animation frames, each bounded by timeout_ms.
+    """
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    except Exception:
+        pass
+    try:
+        await page.evaluate(PAGE_READY_SCRIPT, timeout_ms)
+    except Exception as e:
+        print(f"Page readiness check failed: {e}")
+
+
+class _PooledBrowser:
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.open_pages = 0
+        self.renders = 0
+        self.retiring = False
+        self.connected = True
+        browser.on("disconnected", self._on_disconnected)
+
+    def _on_disconnected(self, _browser) -> None:
+        print("⚠️ Pooled browser disconnected")
+        self.connected = False
+
+    @property
+    def usable(self) -> bool:
+        return self.connected and not self.retiring
+
+
+class BrowserPool:
+    def __init__(self, size: int, max_pages: int, recycle_after: int):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.recycle_after = max(1, recycle_after)
+        self._browsers: List[_PooledBrowser] = []
+        self._launching = 0
+        self._playwright = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    def _lock(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+            self._start_lock = asyncio.Lock()
+        return self._condition
+
+    async def _launch(self) -> _PooledBrowser:
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+        print("🌐 Launching pooled browser...")
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        try:
+            context = await browser.new_context(viewport=VIEWPORT, device_scale_factor=1)
+        except Exception:
+            await browser.close()
+            raise
+        return _PooledBrowser(browser, context)
+
+    async def _close_browser(self, pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.context.close()
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+
+    async def _acquire(self) -> _PooledBrowser:
+        condition = self._lock()
+        async with condition:
+            while True:
+                # A crashed browser has nothing left to close once its pages are done
+                self._browsers = [b for b in self._browsers if b.connected or b.open_pages]
+                candidates = [b for b in self._browsers if b.usable and b.open_pages < self.max_pages]
+                if candidates:
+                    pooled = min(candidates, key=lambda b: b.open_pages)
+                    pooled.open_pages += 1
+                    return pooled
+                if sum(1 for b in self._browsers if b.usable) + self._launching < self.size:
+                    self._launching += 1
+                    break
+                await condition.wait()
+
+        try:
+            pooled = await self._launch()
+        except Exception:
+            async with condition:
+                self._launching -= 1
+                condition.notify_all()
+            raise
+
+        async with condition:
+            self._launching -= 1
+            pooled.open_pages += 1
+            self._browsers.append(pooled)
+            condition.notify_all()
+        return pooled
+
+    async def _release(self, pooled: _PooledBrowser) -> None:
+        condition = self._lock()
+        retired = None
+        async with condition:
+            pooled.open_pages -= 1
+            pooled.renders += 1
+            if pooled.renders >= self.recycle_after:
+                pooled.retiring = True
+            if not pooled.usable and pooled.open_pages == 0:
+                self._browsers.remove(pooled)
+                retired = pooled
+            condition.notify_all()
+        if retired:
+            print(f"♻️ Recycling pooled browser after {retired.renders} renders")
+            await self._close_browser(retired)
+
+    @asynccontextmanager
+    async def page(self):
+        """Open a page in a pooled browser; it is closed when the block exits."""
+        pooled = await self._acquire()
+        page = None
+        try:
+            page = await pooled.context.new_page()
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            await self._release(pooled)
+
+    def stats(self) -> Dict:
+        return {
+            "browsers": len(self._browsers),
+            "open_pages": sum(b.open_pages for b in self._browsers),
+            "renders": [b.renders for b in self._browsers],
+        }
+
+    async def close(self) -> None:
+        """Close all browsers and stop Playwright (on app shutdown)."""
+        browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            await self._close_browser(pooled)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool(BROWSER_POOL_SIZE, BROWSER_POOL_MAX_PAGES, BROWSER_POOL_RECYCLE_AFTER)
@@ -7,23 +7,19 @@ Provides PDF conversion endpoints as a FastAPI router that can be included in ot
 
 import json
 import asyncio
+import shutil
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterator, Dict
 import tempfile
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
-
-try:
-    from PyPDF2 import PdfWriter, PdfReader
-except ImportError:
-    raise ImportError("PyPDF2 is not installed. Please install it with: pip install PyPDF2")
+from browser_pool import browser_pool, wait_until_ready
+from pdf_merge import StreamingPdfMerger
+from slide_cache import slide_cache
 
 
 # Create router
@@ -33,10 +29,14 @@ router = APIRouter(prefix="/presentation", tags=["pdf-conversion"])
 output_dir = Path("generated_pdfs")
 output_dir.mkdir(exist_ok=True)
 
+# Part of the slide render cache key; bump when the rendering below changes
+PDF_CACHE_VARIANT = "pdf-1"
+
 
 class ConvertRequest(BaseModel):
     presentation_path: str = Field(..., description="Path to the presentation folder containing metadata.json")
     download: bool = Field(False, description="If true, returns the PDF file directly. If false, returns JSON with download URL.")
+    progressive: bool = Field(False, description="With download=true, stream the PDF while later slides are still rendering. A rendering error then ends the stream early instead of returning an error status.")
 
 
 class ConvertResponse(BaseModel):
@@ -106,101 +106,114 @@ class PresentationToPDFAPI:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def render_slide_to_pdf(self, browser, slide_info: Dict, temp_dir: Path) -> Path:
-        """Render a single HTML slide to PDF using Playwright."""
+    async def render_slide_to_pdf(self, slide_info: Dict, temp_dir: Path) -> Path:
+        """Render a single HTML slide to PDF in a pooled browser page.
+
+        Unchanged slides are taken from the slide render cache.
+        """
         html_path = slide_info['path']
         slide_num = slide_info['number']
-        
-        print(f"Rendering slide {slide_num}: {slide_info['title']}")
-        
-        # Create new page with exact presentation dimensions
-        page = await browser.new_page()
+        slide_dir = temp_dir / f"slide_{slide_num:02d}"
+        temp_pdf_path = slide_dir / "page.pdf"
         
         try:
-            # Set exact viewport to 1920x1080
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Override device pixel ratio for exact dimensions
-            await page.evaluate("""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
-            
-            # Navigate to the HTML file
-            file_url = f"file://{html_path.absolute()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=30000)
-            
-            # Wait for fonts and dynamic content to load
-            await page.wait_for_timeout(3000)
+            cache_key = slide_cache.key(PDF_CACHE_VARIANT, html_path)
+            if slide_cache.restore(cache_key, slide_dir):
+                print(f"  ✓ Slide {slide_num} unchanged, using cached page")
+                return temp_pdf_path
+
+            print(f"Rendering slide {slide_num}: {slide_info['title']}")
+            slide_dir.mkdir(exist_ok=True)
+
+            # Pooled pages have a 1920x1080 viewport at device scale factor 1
+            async with browser_pool.page() as page:
+                await page.emulate_media(media='screen')
+                
+                # Navigate to the HTML file
+                file_url = f"file://{html_path.absolute()}"
+                await page.goto(file_url, wait_until="load", timeout=30000)
+                
+                # Wait for fonts, images and pending requests instead of a fixed delay
+                await wait_until_ready(page)
             
-            # Ensure exact slide dimensions
-            await page.evaluate("""
-                () => {
-                    const slideContainer = document.querySelector('.slide-container');
-                    if (slideContainer) {
-                        slideContainer.style.width = '1920px';
-                        slideContainer.style.height = '1080px';
-                        slideContainer.style.transform = 'none';
-                        slideContainer.style.maxWidth = 'none';
-                        slideContainer.style.maxHeight = 'none';
-                    }
+                # Ensure exact slide dimensions
+                await page.evaluate("""
+                    () => {
+                        const slideContainer = document.querySelector('.slide-container');
+                        if (slideContainer) {
+                            slideContainer.style.width = '1920px';
+                            slideContainer.style.height = '1080px';
+                            slideContainer.style.transform = 'none';
+                            slideContainer.style.maxWidth = 'none';
+                            slideContainer.style.maxHeight = 'none';
+                        }
                     
-                    document.body.style.margin = '0';
-                    document.body.style.padding = '0';
-                    document.body.style.width = '1920px';
-                    document.body.style.height = '1080px';
-                    document.body.style.overflow = 'hidden';
-                }
-            """)
-            
-            await page.wait_for_timeout(1000)
-            
-            # Generate PDF for this slide
-            temp_pdf_path = temp_dir / f"slide_{slide_num:02d}.pdf"
+                        document.body.style.margin = '0';
+                        document.body.style.padding = '0';
+                        document.body.style.width = '1920px';
+                        document.body.style.height = '1080px';
+                        document.body.style.overflow = 'hidden';
+                    }
+                """)
             
-            await page.pdf(
-                path=str(temp_pdf_path),
-                width="1920px",
-                height="1080px",
-                margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-                print_background=True,
-                prefer_css_page_size=False
-            )
+                # Generate PDF for this slide
+                await page.pdf(
+                    path=str(temp_pdf_path),
+                    width="1920px",
+                    height="1080px",
+                    margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
+                    print_background=True,
+                    prefer_css_page_size=False
+                )
             
+            slide_cache.store(cache_key, slide_dir)
             print(f"  ✓ Slide {slide_num} rendered")
             return temp_pdf_path
             
         except Exception as e:
             raise RuntimeError(f"Error rendering slide {slide_num}: {e}")
-        finally:
-            await page.close()
     
-    def combine_pdfs(self, pdf_paths: List[Path], output_path: Path) -> None:
-        """Combine multiple PDF files into a single PDF."""
-        print(f"Combining {len(pdf_paths)} PDFs...")
-        
-        pdf_writer = PdfWriter()
+    async def stream_pdf(self) -> AsyncIterator[bytes]:
+        """Render the slides and yield the merged PDF as it is produced.
         
+        Slides render concurrently (the browser pool limits how many pages are open)
+        and are merged in slide order, one slide PDF in memory at a time, so the
+        first bytes are available as soon as the first slide is rendered.
+        load_metadata() must have been called.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            print(f"📄 Processing {len(self.slides_info)} slides concurrently...")
+            tasks = [
+                asyncio.create_task(self.render_slide_to_pdf(slide_info, temp_path))
+                for slide_info in self.slides_info
+            ]
+            merger = StreamingPdfMerger()
+            try:
+                yield merger.header()
+                # slides_info is sorted by slide number
+                for task in tasks:
+                    pdf_path = await task
+                    yield await asyncio.to_thread(merger.add_pdf, pdf_path)
+                yield merger.trailer()
+            except Exception as e:
+                print(f"❌ PDF stream failed after {merger.page_count} slides: {e}")
+                raise
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def write_pdf(self, output_path: Path) -> None:
+        """Render the slides and write the merged PDF to output_path."""
         try:
-            for pdf_path in pdf_paths:
-                if pdf_path.exists():
-                    with open(pdf_path, 'rb') as pdf_file:
-                        pdf_reader = PdfReader(pdf_file)
-                        for page in pdf_reader.pages:
-                            pdf_writer.add_page(page)
-            
-            # Write the combined PDF
             with open(output_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
-            
-            print(f"✅ PDF created: {output_path}")
-            
-        except Exception as e:
-            raise RuntimeError(f"Error combining PDFs: {e}")
+                async for chunk in self.stream_pdf():
+                    output_file.write(chunk)
+        except BaseException:
+            output_path.unlink(missing_ok=True)
+            raise
+        print(f"✅ PDF created: {output_path}")
     
     async def convert_to_pdf(self, store_locally: bool = True) -> tuple:
         """Main conversion method with concurrent processing."""
@@ -208,62 +221,24 @@ class PresentationToPDFAPI:
         
         # Load metadata
         self.load_metadata()
+        presentation_name = self.metadata.get('presentation_name', 'presentation')
         
-        # Create temporary directory for intermediate files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Launch browser
-            async with async_playwright() as p:
-                print("🌐 Launching browser...")
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling'
-                    ]
-                )
-                
-                try:
-                    # Process all slides concurrently using asyncio.gather
-                    print(f"📄 Processing {len(self.slides_info)} slides concurrently...")
-                    
-                    tasks = [
-                        self.render_slide_to_pdf(browser, slide_info, temp_path)
-                        for slide_info in self.slides_info
-                    ]
-                    
-                    # Wait for all slides to be processed concurrently
-                    pdf_paths = await asyncio.gather(*tasks)
-                    
-                finally:
-                    await browser.close()
-            
-            # Create output path
-            presentation_name = self.metadata.get('presentation_name', 'presentation')
-            temp_output_path = temp_path / f"{presentation_name}.pdf"
-            
-            # Combine all PDFs (sort by slide number to maintain order)
-            sorted_pdf_paths = sorted(pdf_paths, key=lambda p: int(p.stem.split('_')[1]))
-            self.combine_pdfs(sorted_pdf_paths, temp_output_path)
-            
-            if store_locally:
-                # Store in the static files directory for URL serving
-                timestamp = int(asyncio.get_event_loop().time())
-                filename = f"{presentation_name}_{timestamp}.pdf"
-                final_output = output_dir / filename
-                import shutil
-                shutil.copy2(temp_output_path, final_output)
-                return final_output, len(self.slides_info)
-            else:
-                # For direct download, read file content into memory (no local storage)
-                with open(temp_output_path, 'rb') as f:
-                    pdf_content = f.read()
-                return pdf_content, len(self.slides_info), presentation_name
+        if store_locally:
+            # Store in the static files directory for URL serving
+            timestamp = int(asyncio.get_event_loop().time())
+            final_output = output_dir / f"{presentation_name}_{timestamp}.pdf"
+            await self.write_pdf(final_output)
+            return final_output, len(self.slides_info)
+        
+        # For direct download, the file is served from a temporary directory that the caller removes
+        download_dir = Path(tempfile.mkdtemp(prefix="pdf_download_"))
+        try:
+            pdf_path = download_dir / f"{presentation_name}.pdf"
+            await self.write_pdf(pdf_path)
+        except BaseException:
+            shutil.rmtree(download_dir, ignore_errors=True)
+            raise
+        return pdf_path, len(self.slides_info), presentation_name
 
 
 @router.post("/convert-to-pdf")
@@ -272,7 +247,8 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
     Convert HTML presentation to PDF with concurrent processing.
     
     Takes a presentation folder path and returns either:
-    - PDF file directly (if download=true) - uses presentation name as filename
+    - PDF file directly (if download=true) - uses presentation name as filename;
+      with progressive=true it is streamed while later slides are still rendering
     - JSON response with download URL (if download=false, default)
     """
     try:
@@ -282,15 +258,29 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
         converter = PresentationToPDFAPI(request.presentation_path)
         
         # If download is requested, don't store locally and return file directly
+        if request.download and request.progressive:
+            # Load metadata up front so missing or invalid presentations still get an error status
+            converter.load_metadata()
+            presentation_name = converter.metadata.get('presentation_name', 'presentation')
+            
+            print(f"✨ Streaming PDF for: {presentation_name}")
+            
+            return StreamingResponse(
+                converter.stream_pdf(),
+                media_type="application/pdf",
+                headers={"Content-Disposition": f"attachment; filename=\"{presentation_name}.pdf\""}
+            )
+        
         if request.download:
-            pdf_content, total_slides, presentation_name = await converter.convert_to_pdf(store_locally=False)
+            pdf_path, total_slides, presentation_name = await converter.convert_to_pdf(store_locally=False)
             
             print(f"✨ Direct download conversion completed for: {presentation_name}")
             
-            return Response(
-                content=pdf_content,
+            return FileResponse(
+                pdf_path,
                 media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename=\"{presentation_name}.pdf\""}
+                filename=f"{presentation_name}.pdf",
+                background=BackgroundTask(shutil.rmtree, pdf_path.parent, ignore_errors=True)
             )
         
         # Otherwise, store locally and return JSON with download URL
@@ -320,4 +310,4 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
 @router.get("/health")
 async def pdf_health_check():
     """PDF service health check endpoint."""
-    return {"status": "healthy", "service": "HTML to PDF Converter"}
\ No newline at end of file
+    return {"status": "healthy", "service": "HTML to PDF Converter", "browser_pool": browser_pool.stats()}
\ No newline at end of file
@@ -9,20 +9,19 @@ Uses smart batching and resource cleanup to handle large presentations efficient
 import json
 import asyncio
 import os
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 import tempfile
 import shutil
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+from browser_pool import browser_pool, wait_until_ready
+from slide_cache import slide_cache
 
 try:
     from pptx import Presentation
@@ -40,6 +39,219 @@ router = APIRouter(prefix="/presentation", tags=["pptx-conversion"])
 output_dir = Path("generated_pptx")
 output_dir.mkdir(exist_ok=True)
 
+SLIDE_WIDTH = 1920
+SLIDE_HEIGHT = 1080
+# Slides analyzed at the same time, each in its own page
+SLIDE_CONCURRENCY = int(os.environ.get("PPTX_SLIDE_CONCURRENCY", "4"))
+# Part of the slide render cache key; bump when analyze_slide or its scripts change
+PPTX_CACHE_VARIANT = "pptx-1"
+ANALYSIS_MANIFEST = "analysis.json"
+# Walks the DOM once and returns the text, icon and visual elements of the slide.
+# Icons and visual elements are tagged with a data-pptx-id attribute so they can
+# be hidden for the captures without searching the DOM by position.
+SLIDE_ANALYSIS_SCRIPT = r"""
+    () => {
+        let nextId = 0;
+        const round = (value) => Math.round(value * 100) / 100;
+        const textOnlyTags = ['H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'P', 'A', 'SPAN',
+                              'STRONG', 'EM', 'U', 'BUTTON', 'LABEL', 'SMALL', 'CODE'];
+        const icons = [];
+        const visuals = [];
+        const texts = [];
+
+        function elementGeometry(element, rect, depth) {
+            if (!element.dataset.pptxId) {
+                element.dataset.pptxId = String(nextId++);
+            }
+            return {
+                id: element.dataset.pptxId,
+                x: round(rect.left),
+                y: round(rect.top),
+                width: round(rect.width),
+                height: round(rect.height),
+                tag: element.tagName.toLowerCase(),
+                className: typeof element.className === 'string' ? element.className : '',
+                depth: depth
+            };
+        }
+
+        function isIcon(element) {
+            // Font Awesome icons
+            return element.classList.contains('fas') ||
+                   element.classList.contains('far') ||
+                   element.classList.contains('fab') ||
+                   element.classList.contains('fa');
+        }
+
+        function hasActualVisualContent(element, computed) {
+            // Always include explicit visual elements
+            if (['IMG', 'SVG', 'CANVAS', 'VIDEO', 'IFRAME'].includes(element.tagName)) {
+                return true;
+            }
+            // Background images and gradients
+            if (computed.backgroundImage && computed.backgroundImage !== 'none') {
+                return true;
+            }
+            // Meaningful background colors
+            const bgColor = computed.backgroundColor;
+            if (bgColor && !['rgba(0, 0, 0, 0)', 'transparent', 'inherit', 'initial', 'unset'].includes(bgColor)) {
+                return true;
+            }
+            // Borders
+            if (computed.borderStyle && computed.borderStyle !== 'none' && computed.borderStyle !== 'initial' &&
+                computed.borderWidth && computed.borderWidth !== '0px') {
+                return true;
+            }
+            // Box shadows
+            if (computed.boxShadow && computed.boxShadow !== 'none' && computed.boxShadow !== 'initial') {
+                return true;
+            }
+            // Gradients and images set through the background shorthand
+            return Boolean(computed.background &&
+                (computed.background.includes('gradient') || computed.background.includes('url(')));
+        }
+
+        function extractText(element, computed, rect) {
+            // Direct text content (not from children)
+            const textNodes = Array.from(element.childNodes)
+                .filter(node => node.nodeType === Node.TEXT_NODE && node.textContent.trim());
+            if (!textNodes.length) {
+                return;
+            }
+            const fontSizeMatch = computed.fontSize.match(/([0-9.]+)px/);
+            const actualFontSize = fontSizeMatch ? parseFloat(fontSizeMatch[1]) : 16;
+            const textStyle = {
+                fontFamily: computed.fontFamily,
+                fontSize: computed.fontSize,
+                fontWeight: computed.fontWeight,
+                fontStyle: computed.fontStyle,
+                color: computed.color,
+                textAlign: computed.textAlign,
+                lineHeight: computed.lineHeight,
+                letterSpacing: computed.letterSpacing,
+                textShadow: computed.textShadow,
+                webkitTextStroke: computed.webkitTextStroke,
+                webkitTextFillColor: computed.webkitTextFillColor,
+                background: computed.background,
+                backgroundImage: computed.backgroundImage,
+                webkitBackgroundClip: computed.webkitBackgroundClip,
+                textDecoration: computed.textDecoration,
+                textTransform: computed.textTransform
+            };
+            // Use the position of each text node rather than the container
+            for (const node of textNodes) {
+                const range = document.createRange();
+                range.selectNodeContents(node);
+                const textRect = range.getBoundingClientRect();
+                const box = textRect.width && textRect.height ? textRect : rect;
+                texts.push({
+                    text: node.textContent.trim(),
+                    x: round(box.left),
+                    y: round(box.top),
+                    width: round(box.width),
+                    height: round(box.height),
+                    actualFontSizePx: actualFontSize,
+                    tag: element.tagName.toLowerCase(),
+                    style: textStyle
+                });
+            }
+        }
+
+        function walk(element, depth, inTextTag) {
+            const computed = window.getComputedStyle(element);
+            const rect = element.getBoundingClientRect();
+
+            // Skip hidden elements and elements without dimensions
+            if (rect.width === 0 || rect.height === 0) return;
+            if (computed.display === 'none' || computed.visibility === 'hidden') return;
+
+            extractText(element, computed, rect);
+
+            if (isIcon(element)) {
+                icons.push({ type: 'icon', ...elementGeometry(element, rect, depth) });
+            }
+
+            // Text-only elements and their children are recreated as text boxes
+            inTextTag = inTextTag || textOnlyTags.includes(element.tagName);
+            // Very large elements are likely backgrounds
+            const isLikelyBackground = rect.width > 1200 || rect.height > 900;
+            if (!inTextTag && !isLikelyBackground && hasActualVisualContent(element, computed)) {
+                visuals.push({
+                    type: 'visual',
+                    ...elementGeometry(element, rect, depth),
+                    hasBackground: computed.backgroundImage !== 'none' ||
+                                   (computed.backgroundColor !== 'rgba(0, 0, 0, 0)' &&
+                                    computed.backgroundColor !== 'transparent'),
+                    hasBorder: computed.borderStyle !== 'none',
+                    hasShadow: computed.boxShadow !== 'none'
+                });
+            }
+
+            for (const child of element.children) {
+                walk(child, depth + 1, inTextTag);
+            }
+        }
+
+        walk(document.body, 0, false);
+
+        // Background elements first, then top to bottom, left to right
+        visuals.sort((a, b) => {
+            if (a.depth !== b.depth) return a.depth - b.depth;
+            if (Math.abs(a.y - b.y) < 5) return a.x - b.x;
+            return a.y - b.y;
+        });
+        texts.sort((a, b) => {
+            if (Math.abs(a.y - b.y) < 5) return a.x - b.x;
+            return a.y - b.y;
+        });
+
+        return { icons, visuals, texts };
+    }
+"""
+
+# Makes all text transparent. With clipBackgrounds, backgrounds clipped to text
+# (gradient text) are removed as well.
+HIDE_TEXT_SCRIPT = r"""
+    (clipBackgrounds) => {
+        if (!document.getElementById('pptx-no-transitions')) {
+            // Restyling must take effect immediately for the next screenshot
+            const style = document.createElement('style');
+            style.id = 'pptx-no-transitions';
+            style.textContent = '*, *::before, *::after { transition: none !important; }';
+            document.head.appendChild(style);
+        }
+        for (const element of [document.body, ...document.body.querySelectorAll('*')]) {
+            if (!element.textContent || !element.textContent.trim()) continue;
+            element.style.color = 'transparent';
+            element.style.textShadow = 'none';
+            element.style.webkitTextStroke = 'none';
+            element.style.webkitTextFillColor = 'transparent';
+            if (clipBackgrounds && window.getComputedStyle(element).webkitBackgroundClip === 'text') {
+                element.style.background = 'transparent';
+                element.style.webkitBackgroundClip = 'initial';
+            }
+        }
+    }
+"""
+
+# Hides the elements matching a selector, or restores their original inline visibility
+SET_HIDDEN_SCRIPT = r"""
+    ({ selector, hidden }) => {
+        window.__pptxVisibility = window.__pptxVisibility || new Map();
+        for (const element of document.querySelectorAll(selector)) {
+            if (hidden) {
+                if (!window.__pptxVisibility.has(element)) {
+                    window.__pptxVisibility.set(element, element.style.visibility);
+                }
+                element.style.visibility = 'hidden';
+            } else if (window.__pptxVisibility.has(element)) {
+                element.style.visibility = window.__pptxVisibility.get(element);
+                window.__pptxVisibility.delete(element);
+            }
+        }
+    }
+"""
+
 
 class ConvertRequest(BaseModel):
     presentation_path: str = Field(..., description="Path to the presentation folder containing metadata.json")
@@ -133,6 +345,8 @@ class OptimizedHTMLToPPTXConverter:
         self.metadata_path = self.presentation_dir / "metadata.json"
         self.metadata = None
         self.slides_info = []
+        # Analysis time per slide number (ms) of the last conversion
+        self.slide_timings: Dict[int, Optional[int]] = {}
         
         # Validate inputs
         if not self.presentation_dir.exists():
@@ -185,763 +399,236 @@ class OptimizedHTMLToPPTXConverter:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def extract_visual_elements(self, page, html_path: Path, temp_dir: Path) -> List[Dict]:
-        """Extract all visual elements (non-text) as individual images with positioning."""
-        visual_elements = []
+    async def capture_element(self, page, data: Dict, element_path: Path, hide_descendants: bool = False) -> bool:
+        """Screenshot the viewport area of an element. Returns False if the area is too small."""
+        # Ensure coordinates are within viewport bounds
+        x = max(0, min(data['x'], SLIDE_WIDTH))
+        y = max(0, min(data['y'], SLIDE_HEIGHT))
+        width = min(data['width'], SLIDE_WIDTH - x)
+        height = min(data['height'], SLIDE_HEIGHT - y)
+        
+        # Skip if area is too small
+        if width < 5 or height < 5:
+            return False
         
+        if hide_descendants:
+            # Temporarily hide child elements to prevent interference
+            await page.evaluate(SET_HIDDEN_SCRIPT, {'selector': f'[data-pptx-id="{data["id"]}"] *', 'hidden': True})
         try:
-            # Set viewport and load HTML
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            await page.set_content(html_content, wait_until="domcontentloaded", timeout=10000)
-            await page.wait_for_timeout(1000)
-            
-            def handle_console(msg):
-                print(f"BROWSER CONSOLE: {msg.text}")
-
-            page.on("console", handle_console)
-            
-            # Step 1: First extract icons BEFORE making text transparent
-            icon_data = await page.evaluate(r"""
-                () => {
-                    function isIcon(element) {
-                        // Check for Font Awesome icons
-                        if (element.classList.contains('fas') || 
-                            element.classList.contains('far') || 
-                            element.classList.contains('fab') || 
-                            element.classList.contains('fa')) {
-                            return true;
-                        }
-                        
-                        return false;
-                    }
-                    
-                    function extractIconElements(element, depth = 0) {
-                        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-                        
-                        const computed = window.getComputedStyle(element);
-                        const rect = element.getBoundingClientRect();
-                        
-                        // Skip if no dimensions or hidden
-                        if (rect.width === 0 || rect.height === 0) return [];
-                        if (computed.display === 'none' || computed.visibility === 'hidden') return [];
-                        
-                        const results = [];
-                        
-                        // Check if this element is an icon
-                        if (isIcon(element)) {
-                            console.log('ICON ELEMENT FOUND:', element.tagName, element.textContent?.trim().substring(0, 30));
-                            
-                            results.push({
-                                type: 'icon',
-                                x: Math.round(rect.left * 100) / 100,
-                                y: Math.round(rect.top * 100) / 100,
-                                width: Math.round(rect.width * 100) / 100,
-                                height: Math.round(rect.height * 100) / 100,
-                                tag: element.tagName.toLowerCase(),
-                                className: element.className,
-                                id: element.id,
-                                depth: depth,
-                                // Add debug info
-                                debugInfo: {
-                                    textContent: element.textContent?.trim().substring(0, 50) || 'No text'
-                                }
-                            });
-                        }
-                        
-                        // Process children for nested icons
-                        Array.from(element.children).forEach(child => {
-                            results.push(...extractIconElements(child, depth + 1));
-                        });
-                        
-                        return results;
-                    }
-                    
-                    // Execute icon extraction
-                    const allIconElements = extractIconElements(document.body);
-                    
-                    return allIconElements;
-                }
-            """)
-            
-            # Capture icons as visual elements
-            print(f"🔍 Total icon elements found: {len(icon_data) if icon_data else 0}")
-            icon_visual_elements = []
-            
-            for i, data in enumerate(icon_data or []):
-                if data and data['type'] == 'icon':
-                    try:
-                        # Ensure coordinates are within viewport bounds
-                        x = max(0, min(data['x'], 1920))
-                        y = max(0, min(data['y'], 1080))
-                        width = min(data['width'], 1920 - x)
-                        height = min(data['height'], 1080 - y)
-                        
-                        # Skip if area is too small
-                        if width < 5 or height < 5:
-                            continue
-                        
-                        # Capture the icon
-                        element_path = temp_dir / f"icon_element_{html_path.stem}_{i:03d}.png"
-                        await page.screenshot(
-                            path=str(element_path),
-                            full_page=False,
-                            clip={"x": x, "y": y, "width": width, "height": height}
-                        )
-                        
-                        icon_element = {
-                            'type': 'visual',  # Treat as visual element for consistency
-                            'x': data['x'],
-                            'y': data['y'],
-                            'width': data['width'],
-                            'height': data['height'],
-                            'tag': data['tag'],
-                            'image_path': element_path,
-                            'depth': data['depth'],
-                            'isIcon': True
-                        }
-                        
-                        icon_visual_elements.append(icon_element)
-                        
-                    except Exception as e:
-                        print(f"Failed to capture icon element {i}: {e}")
-            
-            # Step 2: Now make all text transparent while preserving visual styling
-            await page.evaluate(r"""
-                () => {
-                    function makeTextTransparent(element) {
-                        if (element.nodeType === Node.ELEMENT_NODE) {
-                            const computed = window.getComputedStyle(element);
-                            
-                            // If element has text content, make it transparent
-                            if (element.textContent && element.textContent.trim()) {
-                                element.style.color = 'transparent';
-                                element.style.textShadow = 'none';
-                                element.style.webkitTextStroke = 'none';
-                                element.style.webkitTextFillColor = 'transparent';
-                            }
-                            
-                            // Process children
-                            Array.from(element.children).forEach(makeTextTransparent);
-                        }
-                    }
-                    
-                    makeTextTransparent(document.body);
-                }
-            """)
-            
-            await page.wait_for_timeout(500)
-            
-            # Step 3: Extract other visual elements by depth and visual properties
-            visual_data = await page.evaluate(r"""
-                () => {
-                    function hasActualVisualContent(element, computed) {
-                        
-                        // Always include explicit visual elements
-                        if (['IMG', 'SVG', 'CANVAS', 'VIDEO', 'IFRAME'].includes(element.tagName)) {
-                            return true;
-                        }
-                        
-                        // 2. Check for actual background images and gradients (not just 'none')
-                        if (computed.backgroundImage && computed.backgroundImage !== 'none') {
-                            return true;
-                        }
-                        
-                        // 3. Check for meaningful background colors (not just transparent)
-                        const bgColor = computed.backgroundColor;
-                        if (bgColor && 
-                            bgColor !== 'rgba(0, 0, 0, 0)' && 
-                            bgColor !== 'transparent' && 
-                            bgColor !== 'inherit' &&
-                            bgColor !== 'initial' &&
-                            bgColor !== 'unset') {
-                            return true;
-                        }
-                        
-                        // 4. Check for borders (but ignore default/none)
-                        if (computed.borderStyle && 
-                            computed.borderStyle !== 'none' && 
-                            computed.borderStyle !== 'initial' &&
-                            computed.borderWidth && 
-                            computed.borderWidth !== '0px') {
-                            return true;
-                        }
-                        
-                        // 5. Check for box shadows
-                        if (computed.boxShadow && 
-                            computed.boxShadow !== 'none' && 
-                            computed.boxShadow !== 'initial') {
-                            return true;
-                        }
-                        
-                        // 6. Check for gradients in background (comprehensive check)
-                        if (computed.background && 
-                            (computed.background.includes('gradient') || 
-                            computed.background.includes('url('))) {
-                            return true;
-                        }
-                        
-                        // Also check backgroundImage for gradients (browsers often store gradients here)
-                        if (computed.backgroundImage && 
-                            (computed.backgroundImage.includes('gradient') ||
-                            computed.backgroundImage.includes('url('))) {
-                            return true;
-                        }
-                        
-                        return false;
-                    }
-                                    
-                    function shouldSkipElement(element, computed) {
-                        // Skip text-only elements
-                        const textOnlyTags = ['H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'P', 'A', 'SPAN', 
-                                            'STRONG', 'EM', 'U', 'BUTTON', 'LABEL', 'SMALL', 'CODE'];
-                        if (textOnlyTags.includes(element.tagName)) {
-                            return true;
-                        }
-                        
-                        // Skip hidden elements
-                        if (computed.display === 'none' || computed.visibility === 'hidden') {
-                            return true;
-                        }
-                        
-                        return false;
-                    }
-                                                
-                    function extractVisualElements(element, depth = 0) {
-                        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-                        
-                        const computed = window.getComputedStyle(element);
-                        const rect = element.getBoundingClientRect();
-                        
-                        // Skip if no dimensions
-                        if (rect.width === 0 || rect.height === 0) {
-                            return [];
-                        }
-                        
-                        // Skip if should be filtered out
-                        if (shouldSkipElement(element, computed)) {
-                            return [];
-                        }
-                        
-                        const results = [];
-                        
-                        // Check if element has actual visual content
-                        if (hasActualVisualContent(element, computed)) {
-                            console.log('VISUAL ELEMENT FOUND:', element.tagName, element.textContent?.trim().substring(0, 30));
-                            console.log('backgroundImage:', computed.backgroundImage);
-                            console.log('backgroundColor:', computed.backgroundColor);
-                            console.log('borderStyle:', computed.borderStyle);
-                            
-                            // Skip very large elements that are likely backgrounds
-                            const isLikelyBackground = rect.width > 1200 || rect.height > 900;
-                            
-                            if (!isLikelyBackground) {
-                                results.push({
-                                    type: 'visual',
-                                    x: Math.round(rect.left * 100) / 100,
-                                    y: Math.round(rect.top * 100) / 100,
-                                    width: Math.round(rect.width * 100) / 100,
-                                    height: Math.round(rect.height * 100) / 100,
-                                    tag: element.tagName.toLowerCase(),
-                                    className: element.className,
-                                    id: element.id,
-                                    depth: depth,
-                                    hasBackground: computed.backgroundImage !== 'none' || 
-                                                (computed.backgroundColor !== 'rgba(0, 0, 0, 0)' && 
-                                                computed.backgroundColor !== 'transparent'),
-                                    hasBorder: computed.borderStyle !== 'none',
-                                    hasShadow: computed.boxShadow !== 'none',
-                                    // Add debug info
-                                    debugInfo: {
-                                        backgroundColor: computed.backgroundColor,
-                                        backgroundImage: computed.backgroundImage,
-                                        borderStyle: computed.borderStyle,
-                                        textContent: element.textContent?.trim().substring(0, 50) || 'No text'
-                                    }
-                                });
-                            }
-                        }
-                        
-                        // Process children for nested elements
-                        Array.from(element.children).forEach(child => {
-                            results.push(...extractVisualElements(child, depth + 1));
-                        });
-                        
-                        return results;
-                    }
-                    
-                    // Actually execute the extraction and return results
-                    const allVisualElements = extractVisualElements(document.body);
-                    
-                    // Sort by depth (background elements first) then by position
-                    allVisualElements.sort((a, b) => {
-                        if (a.depth !== b.depth) return a.depth - b.depth;
-                        if (Math.abs(a.y - b.y) < 5) return a.x - b.x;
-                        return a.y - b.y;
-                    });
-                    
-                    return allVisualElements;
-                }
-            """)
-            
-            # Debug: Log what we found in Python console
-            print(f"🔍 Total visual elements found: {len(visual_data) if visual_data else 0}")
-            if visual_data:
-                for i, data in enumerate(visual_data):  # Show first 5
-                    print(f"🔍 Element {i}: {data['tag']} - {data.get('className', 'No class')}")
-                    print(f"   Position: ({data['x']}, {data['y']}) {data['width']}x{data['height']}")
-                    print(f"   Has background: {data.get('hasBackground', False)}")
-                    print(f"   Has border: {data.get('hasBorder', False)}")
-                    print(f"   Has shadow: {data.get('hasShadow', False)}")
-                    print("--- 🔍", data)
-            
-            # Step 3: Capture each visual element as an image
-            for i, data in enumerate(visual_data or []):
-                if data and data['type'] == 'visual':
-                    try:
-                        # Ensure coordinates are within viewport bounds
-                        x = max(0, min(data['x'], 1920))
-                        y = max(0, min(data['y'], 1080))
-                        width = min(data['width'], 1920 - x)
-                        height = min(data['height'], 1920 - y)
-                        
-                        # Skip if area is too small
-                        if width < 5 or height < 5:
-                            continue
-                        
-                        # Temporarily hide child elements to prevent interference
-                        await page.evaluate(r"""
-                            (elementData) => {
-                                // Find the element to capture
-                                const elements = document.querySelectorAll('*');
-                                for (let el of elements) {
-                                    const rect = el.getBoundingClientRect();
-                                    if (Math.abs(rect.left - elementData.x) < 2 && 
-                                        Math.abs(rect.top - elementData.y) < 2 &&
-                                        Math.abs(rect.width - elementData.width) < 2 &&
-                                        Math.abs(rect.height - elementData.height) < 2) {
-                                        
-                                        // Store original visibility of children
-                                        const children = el.querySelectorAll('*');
-                                        children.forEach(child => {
-                                            child.setAttribute('data-original-visibility', child.style.visibility);
-                                            child.style.visibility = 'hidden';
-                                        });
-                                        
-                                        // Mark this element for restoration
-                                        el.setAttribute('data-capture-in-progress', 'true');
-                                        break;
-                                    }
-                                }
-                            }
-                        """, data)
-                        
-                        # Capture the element
-                        element_path = temp_dir / f"visual_element_{html_path.stem}_{i:03d}.png"
-                        await page.screenshot(
-                            path=str(element_path),
-                            full_page=False,
-                            clip={"x": x, "y": y, "width": width, "height": height}
-                        )
-                        
-                        # Restore child elements visibility
-                        await page.evaluate(r"""
-                            (elementData) => {
-                                const elements = document.querySelectorAll('*');
-                                for (let el of elements) {
-                                    if (el.getAttribute('data-capture-in-progress')) {
-                                        // Restore children visibility
-                                        const children = el.querySelectorAll('*');
-                                        children.forEach(child => {
-                                            const originalVisibility = child.getAttribute('data-original-visibility');
-                                            if (originalVisibility) {
-                                                child.style.visibility = originalVisibility;
-                                                child.removeAttribute('data-original-visibility');
-                                            } else {
-                                                child.style.visibility = 'visible';
-                                            }
-                                        });
-                                        
-                                        // Clean up
-                                        el.removeAttribute('data-capture-in-progress');
-                                        break;
-                                    }
-                                }
-                            }
-                        """, data)
-                        
-                        visual_element = {
-                            'type': 'visual',
-                            'x': data['x'],
-                            'y': data['y'],
-                            'width': data['width'],
-                            'height': data['height'],
-                            'tag': data['tag'],
-                            'image_path': element_path,
-                            'depth': data['depth'],
-                            'hasBackground': data.get('hasBackground', False),
-                            'hasBorder': data.get('hasBorder', False),
-                            'hasShadow': data.get('hasShadow', False)
-                        }
-                        
-                        visual_elements.append(visual_element)
-                        
-                    except Exception as e:
-                        print(f"Failed to capture visual element {i}: {e}")
-                        # Ensure we restore visibility even if capture fails
-                        try:
-                            await page.evaluate(r"""
-                                (elementData) => {
-                                    const elements = document.querySelectorAll('*');
-                                    for (let el of elements) {
-                                        if (el.getAttribute('data-capture-in-progress')) {
-                                            const children = el.querySelectorAll('*');
-                                            children.forEach(child => {
-                                                const originalVisibility = child.getAttribute('data-original-visibility');
-                                                if (originalVisibility) {
-                                                    child.style.visibility = originalVisibility;
-                                                    child.removeAttribute('data-original-visibility');
-                                                } else {
-                                                    child.style.visibility = 'visible';
-                                                }
-                                            });
-                                            el.removeAttribute('data-capture-in-progress');
-                                            break;
-                                        }
-                                    }
-                                }
-                            """, data)
-                        except:
-                            pass
-                        continue
-            
-            # Add the previously captured icon elements to our visual elements collection
-            if icon_visual_elements:
-                print(f"Adding {len(icon_visual_elements)} icon elements to visual elements")
-                visual_elements.extend(icon_visual_elements)
-            
-            return visual_elements
-            
-        except Exception as e:
-            print(f"Visual element extraction failed: {e}")
-            return []
-
-    async def capture_clean_background(self, page, html_path: Path, temp_dir: Path, visual_elements: List[Dict]) -> Path:
-        """Capture the clean background with visual elements temporarily hidden."""
+            await page.screenshot(
+                path=str(element_path),
+                full_page=False,
+                clip={"x": x, "y": y, "width": width, "height": height}
+            )
+        finally:
+            if hide_descendants:
+                await page.evaluate(SET_HIDDEN_SCRIPT, {'selector': f'[data-pptx-id="{data["id"]}"] *', 'hidden': False})
+        return True
+    
+    async def analyze_slide(self, page, html_path: Path, temp_dir: Path) -> Dict:
+        """Analyze a slide with a single page load.
+        
+        Text, icon and visual element geometry are extracted in one DOM evaluation.
+        The page is then only restyled for the captures: icons are captured with
+        the text still visible, visual elements with the text transparent, and the
+        clean background with the text and all captured elements hidden.
+        """
+        await page.set_viewport_size({"width": SLIDE_WIDTH, "height": SLIDE_HEIGHT})
+        await page.emulate_media(media='screen')
+        
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        
+        await page.set_content(html_content, wait_until="load", timeout=10000)
+        await wait_until_ready(page)
+        
+        slide_data = await page.evaluate(SLIDE_ANALYSIS_SCRIPT)
+        icon_data = slide_data.get('icons') or []
+        visual_data = slide_data.get('visuals') or []
+        print(f"🔍 {html_path.name}: {len(slide_data.get('texts') or [])} text, {len(icon_data)} icon, {len(visual_data)} visual elements")
+        
+        # Analyses with failed captures are not cached
+        complete = True
+        
+        # Step 1: Capture icons BEFORE making text transparent
+        icon_visual_elements = []
+        for i, data in enumerate(icon_data):
+            try:
+                element_path = temp_dir / f"icon_element_{html_path.stem}_{i:03d}.png"
+                if not await self.capture_element(page, data, element_path):
+                    continue
+                icon_visual_elements.append({
+                    'type': 'visual',  # Treat as visual element for consistency
+                    'id': data['id'],
+                    'x': data['x'],
+                    'y': data['y'],
+                    'width': data['width'],
+                    'height': data['height'],
+                    'tag': data['tag'],
+                    'image_path': element_path,
+                    'depth': data['depth'],
+                    'isIcon': True
+                })
+            except Exception as e:
+                print(f"Failed to capture icon element {i}: {e}")
+                complete = False
+        
+        # Step 2: Make all text transparent and capture each visual element without its children
+        await page.evaluate(HIDE_TEXT_SCRIPT, False)
+        visual_elements = []
+        for i, data in enumerate(visual_data):
+            try:
+                element_path = temp_dir / f"visual_element_{html_path.stem}_{i:03d}.png"
+                if not await self.capture_element(page, data, element_path, hide_descendants=True):
+                    continue
+                visual_elements.append({
+                    'type': 'visual',
+                    'id': data['id'],
+                    'x': data['x'],
+                    'y': data['y'],
+                    'width': data['width'],
+                    'height': data['height'],
+                    'tag': data['tag'],
+                    'image_path': element_path,
+                    'depth': data['depth'],
+                    'hasBackground': data.get('hasBackground', False),
+                    'hasBorder': data.get('hasBorder', False),
+                    'hasShadow': data.get('hasShadow', False)
+                })
+            except Exception as e:
+                print(f"Failed to capture visual element {i}: {e}")
+                complete = False
+        visual_elements.extend(icon_visual_elements)
+        
+        # Step 3: Capture the clean background with text invisible and visual elements hidden
+        background_path = temp_dir / f"clean_background_{html_path.stem}.png"
         try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
-            
-            # Load HTML content directly
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            await page.set_content(html_content, wait_until="domcontentloaded", timeout=10000)
-            
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
-            
-            # Make text completely invisible AND hide visual elements to get clean background
-            await page.evaluate(r"""
-                (visualElementsData) => {
-                    // Function to make text completely invisible
-                    function makeTextInvisible(element) {
-                        if (element.nodeType === Node.TEXT_NODE) return;
-                        if (element.nodeType === Node.ELEMENT_NODE) {
-                            const computedStyle = window.getComputedStyle(element);
-                            const hasText = element.textContent && element.textContent.trim();
-                            if (hasText) {
-                                // Make text completely invisible
-                                element.style.color = 'transparent';
-                                element.style.textShadow = 'none';
-                                element.style.webkitTextStroke = 'none';
-                                element.style.webkitTextFillColor = 'transparent';
-                                
-                                // Also hide any background text effects
-                                if (computedStyle.webkitBackgroundClip === 'text') {
-                                    element.style.background = 'transparent';
-                                    element.style.webkitBackgroundClip = 'initial';
-                                }
-                            }
-                            Array.from(element.children).forEach(makeTextInvisible);
-                        }
-                    }
-                    
-                    // Function to hide visual elements (but preserve main background)
-                    function hideVisualElements() {
-                        visualElementsData.forEach(visualData => {
-                            // Skip very large elements that are likely the main background
-                            if (visualData.width > 1000 || visualData.height > 800) {
-                                return;
-                            }
-                            
-                            // Find elements that match the visual element criteria
-                            const elements = document.querySelectorAll('*');
-                            for (let el of elements) {
-                                const rect = el.getBoundingClientRect();
-                                if (Math.abs(rect.left - visualData.x) < 5 && 
-                                    Math.abs(rect.top - visualData.y) < 5 &&
-                                    Math.abs(rect.width - visualData.width) < 5 &&
-                                    Math.abs(rect.height - visualData.height) < 5) {
-                                    
-                                    // Hide this visual element
-                                    el.style.visibility = 'hidden';
-                                    break;
-                                }
-                            }
-                        });
-                    }
-                    
-                    // Apply both transformations
-                    makeTextInvisible(document.body);
-                    hideVisualElements();
-                }
-            """, visual_elements or [])
-            
-            # Reduced wait time
-            await page.wait_for_timeout(500)
-            
-            # Take clean background screenshot
-            background_path = temp_dir / f"clean_background_{html_path.stem}.png"
+            await page.evaluate(HIDE_TEXT_SCRIPT, True)
+            # Very large elements are likely the main background and stay visible
+            hidden_ids = [v['id'] for v in visual_elements if v['width'] <= 1000 and v['height'] <= 800]
+            if hidden_ids:
+                selector = ', '.join(f'[data-pptx-id="{element_id}"]' for element_id in hidden_ids)
+                await page.evaluate(SET_HIDDEN_SCRIPT, {'selector': selector, 'hidden': True})
             await page.screenshot(
                 path=str(background_path),
                 full_page=False,
-                clip={"x": 0, "y": 0, "width": 1920, "height": 1080}
+                clip={"x": 0, "y": 0, "width": SLIDE_WIDTH, "height": SLIDE_HEIGHT}
             )
-            
-            return background_path
-            
         except Exception as e:
+            print(f"Clean background capture failed: {e}")
+            complete = False
             # Create a simple white background as fallback
             from PIL import Image
-            background_path = temp_dir / f"clean_background_{html_path.stem}.png"
-            blank_bg = Image.new('RGB', (1920, 1080), color='white')
+            blank_bg = Image.new('RGB', (SLIDE_WIDTH, SLIDE_HEIGHT), color='white')
             blank_bg.save(background_path)
-            return background_path
+        
+        try:
+            text_elements = self.build_text_elements(slide_data.get('texts') or [])
+        except Exception as e:
+            print(f"Text element extraction failed: {e}")
+            text_elements = []
+            complete = False
+        
+        return {
+            'visual_elements': visual_elements,
+            'background_path': background_path,
+            'text_elements': text_elements,
+            'complete': complete,
+        }
+    
+    def save_analysis_manifest(self, slide_analysis: Dict, slide_dir: Path) -> None:
+        """Write the analysis of a slide to slide_dir, next to its captured images, for the slide cache."""
+        manifest = {
+            'visual_elements': [
+                {**element, 'image_path': Path(element['image_path']).name}
+                for element in slide_analysis['visual_elements']
+            ],
+            'background_path': Path(slide_analysis['background_path']).name,
+            'text_elements': [asdict(element) for element in slide_analysis['text_elements']],
+        }
+        with open(slide_dir / ANALYSIS_MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
     
-    async def extract_text_elements(self, page, html_path: Path) -> List[TextElement]:
-        """Extract all text elements with precise positioning for editable text boxes."""
+    def load_analysis_manifest(self, slide_dir: Path) -> Dict:
+        """Read a slide analysis written by save_analysis_manifest."""
+        with open(slide_dir / ANALYSIS_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return {
+            'visual_elements': [
+                {**element, 'image_path': slide_dir / element['image_path']}
+                for element in manifest['visual_elements']
+            ],
+            'background_path': slide_dir / manifest['background_path'],
+            'text_elements': [TextElement(**element) for element in manifest['text_elements']],
+        }
+    
+    def build_text_elements(self, text_data: List[Dict]) -> List[TextElement]:
+        """Convert the text data extracted from the page into TextElement objects with enhanced styling."""
         text_elements = []
         
-        try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
-            
-            # Load HTML content directly
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            await page.set_content(html_content, wait_until="domcontentloaded", timeout=10000)
-            
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
-            
-            # Extract all text elements with precise positioning and styling
-            text_data = await page.evaluate(r"""
-                () => {
-                    function extractTextFromElement(element) {
-                        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-                        
-                        const computedStyle = window.getComputedStyle(element);
-                        const rect = element.getBoundingClientRect();
-                        
-                        // Skip hidden elements
-                        if (computedStyle.display === 'none' || computedStyle.visibility === 'hidden') return [];
-                        if (rect.width === 0 || rect.height === 0) return [];
-                        
-                        const results = [];
-                        
-                        // Get direct text content (not from children)
-                        let directText = '';
-                        for (let node of element.childNodes) {
-                            if (node.nodeType === Node.TEXT_NODE) {
-                                directText += node.textContent;
-                            }
-                        }
-                        directText = directText.trim();
-                        
-                        // If this element has direct text content, extract it with styling
-                        if (directText && directText.length > 0) {
-                            const fontSizeMatch = computedStyle.fontSize.match(/([0-9.]+)px/);
-                            const actualFontSize = fontSizeMatch ? parseFloat(fontSizeMatch[1]) : 16;
-                            
-                            // Get the actual text node position, not the container
-                            const textNodes = [];
-                            for (let node of element.childNodes) {
-                                if (node.nodeType === Node.TEXT_NODE && node.textContent.trim()) {
-                                    const range = document.createRange();
-                                    range.selectNodeContents(node);
-                                    const textRect = range.getBoundingClientRect();
-                                    textNodes.push({
-                                        text: node.textContent.trim(),
-                                        rect: textRect
-                                    });
-                                }
-                            }
-                            
-                            // Enhanced styling extraction
-                            const textStyle = {
-                                fontFamily: computedStyle.fontFamily,
-                                fontSize: computedStyle.fontSize,
-                                fontWeight: computedStyle.fontWeight,
-                                fontStyle: computedStyle.fontStyle,
-                                color: computedStyle.color,
-                                textAlign: computedStyle.textAlign,
-                                lineHeight: computedStyle.lineHeight,
-                                letterSpacing: computedStyle.letterSpacing,
-                                textShadow: computedStyle.textShadow,
-                                webkitTextStroke: computedStyle.webkitTextStroke,
-                                webkitTextFillColor: computedStyle.webkitTextFillColor,
-                                background: computedStyle.background,
-                                backgroundImage: computedStyle.backgroundImage,
-                                webkitBackgroundClip: computedStyle.webkitBackgroundClip,
-                                textDecoration: computedStyle.textDecoration,
-                                textTransform: computedStyle.textTransform
-                            };
-                            
-                            // Use text node position if available, otherwise fall back to container
-                            if (textNodes.length > 0) {
-                                textNodes.forEach(textNode => {
-                                    results.push({
-                                        text: textNode.text,
-                                        x: Math.round(textNode.rect.left * 100) / 100,
-                                        y: Math.round(textNode.rect.top * 100) / 100,
-                                        width: Math.round(textNode.rect.width * 100) / 100,
-                                        height: Math.round(textNode.rect.height * 100) / 100,
-                                        actualFontSizePx: actualFontSize,
-                                        tag: element.tagName.toLowerCase(),
-                                        style: textStyle
-                                    });
-                                });
-                            } else {
-                                // Fallback to container position
-                                results.push({
-                                    text: directText,
-                                    x: Math.round(rect.left * 100) / 100,
-                                    y: Math.round(rect.top * 100) / 100,
-                                    width: Math.round(rect.width * 100) / 100,
-                                    height: Math.round(rect.height * 100) / 100,
-                                    actualFontSizePx: actualFontSize,
-                                    tag: element.tagName.toLowerCase(),
-                                    style: textStyle
-                                });
-                            }
-                        }
-                        
-                        // Process children for nested text
-                        Array.from(element.children).forEach(child => {
-                            results.push(...extractTextFromElement(child));
-                        });
-                        
-                        return results;
+        for data in text_data or []:
+            if data and data['text']:
+                style = data.get('style', {})
+                
+                # Parse font family
+                font_family = style.get('fontFamily', 'Arial')
+                if font_family:
+                    font_family = font_family.split(',')[0].strip().strip('"\'')
+                    font_family_map = {
+                        'roboto': 'Roboto', 'arial': 'Arial', 'helvetica': 'Helvetica',
+                        'sans-serif': 'Arial', 'serif': 'Times New Roman', 'monospace': 'Courier New',
+                        'jetbrains mono': 'Courier New', 'courier new': 'Courier New'
                     }
-                    
-                    // Start extraction from body
-                    const allTextElements = extractTextFromElement(document.body);
-                    
-                    // Sort by position (top to bottom, left to right)
-                    allTextElements.sort((a, b) => {
-                        if (Math.abs(a.y - b.y) < 5) {
-                            return a.x - b.x;
-                        }
-                        return a.y - b.y;
-                    });
-                    
-                    return allTextElements;
-                }
-            """)
-            
-            # Convert to TextElement objects with enhanced styling
-            for data in text_data or []:
-                if data and data['text']:
-                    style = data.get('style', {})
-                    
-                    # Parse font family
-                    font_family = style.get('fontFamily', 'Arial')
-                    if font_family:
-                        font_family = font_family.split(',')[0].strip().strip('"\'')
-                        font_family_map = {
-                            'roboto': 'Roboto', 'arial': 'Arial', 'helvetica': 'Helvetica',
-                            'sans-serif': 'Arial', 'serif': 'Times New Roman', 'monospace': 'Courier New',
-                            'jetbrains mono': 'Courier New', 'courier new': 'Courier New'
-                        }
-                        font_family = font_family_map.get(font_family.lower(), font_family)
+                    font_family = font_family_map.get(font_family.lower(), font_family)
+                else:
+                    font_family = 'Arial'
+                
+                # Parse line height
+                line_height = 1.2
+                line_height_str = style.get('lineHeight', 'normal')
+                if line_height_str and line_height_str != 'normal':
+                    if line_height_str.endswith('px'):
+                        px_value = float(line_height_str[:-2])
+                        line_height = px_value / data['actualFontSizePx']
                     else:
-                        font_family = 'Arial'
-                    
-                    # Parse line height
-                    line_height = 1.2
-                    line_height_str = style.get('lineHeight', 'normal')
-                    if line_height_str and line_height_str != 'normal':
-                        if line_height_str.endswith('px'):
-                            px_value = float(line_height_str[:-2])
-                            line_height = px_value / data['actualFontSizePx']
+                        try:
+                            line_height = float(line_height_str)
+                        except:
+                            line_height = 1.2
+                
+                # Parse color - handle complex color scenarios
+                color = style.get('color', '#000000')
+                
+                # Handle gradient text (webkit background clip)
+                if style.get('webkitBackgroundClip') == 'text' and style.get('backgroundImage'):
+                    bg_image = style.get('backgroundImage', '')
+                    if 'linear-gradient' in bg_image:
+                        import re
+                        color_match = re.search(r'#[0-9a-fA-F]{6}', bg_image)
+                        if color_match:
+                            color = color_match.group(0)
                         else:
-                            try:
-                                line_height = float(line_height_str)
-                            except:
-                                line_height = 1.2
-                    
-                    # Parse color - handle complex color scenarios
-                    color = style.get('color', '#000000')
-                    
-                    # Handle gradient text (webkit background clip)
-                    if style.get('webkitBackgroundClip') == 'text' and style.get('backgroundImage'):
-                        bg_image = style.get('backgroundImage', '')
-                        if 'linear-gradient' in bg_image:
-                            import re
-                            color_match = re.search(r'#[0-9a-fA-F]{6}', bg_image)
-                            if color_match:
-                                color = color_match.group(0)
-                            else:
-                                color = '#3B82F6'  # Default blue for gradients
-                    
-                    text_element = TextElement(
-                        text=data['text'],
-                        x=data['x'],
-                        y=data['y'],
-                        width=data['width'],
-                        height=data['height'],
-                        font_family=font_family,
-                        font_size=data['actualFontSizePx'] * 0.75,  # Convert px to points
-                        font_weight=style.get('fontWeight', 'normal'),
-                        color=color,
-                        text_align=style.get('textAlign', 'left'),
-                        line_height=line_height,
-                        tag=data['tag'],
-                        style=style
-                    )
-                    
-                    text_elements.append(text_element)
-            
-            return text_elements
-            
-        except Exception:
-            return []
+                            color = '#3B82F6'  # Default blue for gradients
+                
+                text_element = TextElement(
+                    text=data['text'],
+                    x=data['x'],
+                    y=data['y'],
+                    width=data['width'],
+                    height=data['height'],
+                    font_family=font_family,
+                    font_size=data['actualFontSizePx'] * 0.75,  # Convert px to points
+                    font_weight=style.get('fontWeight', 'normal'),
+                    color=color,
+                    text_align=style.get('textAlign', 'left'),
+                    line_height=line_height,
+                    tag=data['tag'],
+                    style=style
+                )
+                
+                text_elements.append(text_element)
+        
+        return text_elements
     
     def create_text_box(self, slide, text_element: TextElement) -> None:
         """Create an editable text box in PowerPoint with exact positioning and enhanced styling."""
@@ -1109,124 +796,82 @@ class OptimizedHTMLToPPTXConverter:
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # Launch browser for processing
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling',
-                        '--disable-backgrounding-occluded-windows',
-                        '--disable-renderer-backgrounding',
-                        '--disable-features=VizDisplayCompositor',
-                        '--disable-extensions',
-                        '--disable-plugins',
-                        '--disable-web-security',
-                        '--disable-features=TranslateUI',
-                        '--disable-ipc-flooding-protection'
-                    ]
-                )
-                
-                try:
-                    # Process all slides in parallel
-                    # Create semaphore to limit concurrent operations
-                    semaphore = asyncio.Semaphore(2)  # Reduced to 2 for optimal performance
+            # Process all slides in parallel
+            # Create semaphore to limit concurrent operations
+            semaphore = asyncio.Semaphore(SLIDE_CONCURRENCY)
+            
+            async def process_single_slide(slide_info: Dict) -> Dict:
+                """Process a single slide with controlled concurrency."""
+                async with semaphore:
+                    slide_num = slide_info['number']
+                    slide_dir = temp_path / f"slide_{slide_num:02d}"
                     
-                    async def process_single_slide(slide_info: Dict) -> Dict:
-                        """Process a single slide with controlled concurrency."""
-                        async with semaphore:
-                            slide_num = slide_info['number']
-                            
+                    try:
+                        started = time.perf_counter()
+                        cache_key = slide_cache.key(PPTX_CACHE_VARIANT, slide_info['path'], (SLIDE_WIDTH, SLIDE_HEIGHT))
+                        slide_analysis = None
+                        if slide_cache.restore(cache_key, slide_dir):
                             try:
-                                # Create a new page for this slide
-                                page = await browser.new_page()
-                                
-                                # Set exact viewport dimensions
-                                await page.set_viewport_size({"width": 1920, "height": 1080})
-                                await page.emulate_media(media='screen')
-                                
-                                # Force device pixel ratio to 1
-                                await page.evaluate(r"""
-                                    () => {
-                                        Object.defineProperty(window, 'devicePixelRatio', {
-                                            get: () => 1
-                                        });
-                                    }
-                                """)
-                                
-                                try:
-                                    # Extract visual elements
-                                    visual_elements = await self.extract_visual_elements(page, slide_info['path'], temp_path)
-                                    
-                                    # Capture clean background
-                                    background_path = await self.capture_clean_background(page, slide_info['path'], temp_path, visual_elements)
-                                    
-                                    # Extract text elements
-                                    text_elements = await self.extract_text_elements(page, slide_info['path'])
-                                    
-                                    slide_analysis = {
-                                        'slide_info': slide_info,
-                                        'visual_elements': visual_elements,
-                                        'background_path': background_path,
-                                        'text_elements': text_elements
-                                    }
-                                    
-                                    return slide_analysis
-                                    
-                                except Exception as e:
-                                    return {
-                                        'slide_info': slide_info,
-                                        'visual_elements': [],
-                                        'background_path': None,
-                                        'text_elements': [],
-                                        'error': str(e)
-                                    }
-                                    
-                                finally:
-                                    # Always close the page to free memory
-                                    await page.close()
-                                    
+                                slide_analysis = self.load_analysis_manifest(slide_dir)
+                                slide_analysis['cached'] = True
                             except Exception as e:
-                                return {
-                                    'slide_info': slide_info,
-                                    'visual_elements': [],
-                                    'background_path': None,
-                                    'text_elements': [],
-                                    'error': f"Page creation failed: {str(e)}"
-                                }
-                    
-                    # Launch ALL slides in parallel
-                    parallel_tasks = [
-                        process_single_slide(slide_info) 
-                        for slide_info in self.slides_info
-                    ]
-                    
-                    # Wait for ALL slides to complete in parallel
-                    slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
-                    
-                    # Handle any top-level exceptions
-                    processed_analyses = []
-                    for i, result in enumerate(slide_analyses):
-                        if isinstance(result, Exception):
-                            error_analysis = {
-                                'slide_info': self.slides_info[i],
-                                'visual_elements': [],
-                                'background_path': None,
-                                'text_elements': [],
-                                'error': str(result)
-                            }
-                            processed_analyses.append(error_analysis)
-                        else:
-                            processed_analyses.append(result)
-                    
-                    all_slide_analyses = processed_analyses
-                    
-                finally:
-                    await browser.close()
+                                print(f"Ignoring unreadable cached analysis of slide {slide_num}: {e}")
+                                shutil.rmtree(slide_dir, ignore_errors=True)
+                        
+                        if slide_analysis is None:
+                            slide_dir.mkdir(exist_ok=True)
+                            # Pooled pages have a 1920x1080 viewport at device scale factor 1
+                            async with browser_pool.page() as page:
+                                slide_analysis = await self.analyze_slide(page, slide_info['path'], slide_dir)
+                            if slide_analysis['complete']:
+                                self.save_analysis_manifest(slide_analysis, slide_dir)
+                                slide_cache.store(cache_key, slide_dir)
+                        
+                        slide_analysis['slide_info'] = slide_info
+                        slide_analysis['analysis_ms'] = round((time.perf_counter() - started) * 1000)
+                        source = "loaded from cache" if slide_analysis.get('cached') else "analyzed"
+                        print(f"Slide {slide_num} {source} in {slide_analysis['analysis_ms']}ms")
+                        
+                        return slide_analysis
+                            
+                    except Exception as e:
+                        return {
+                            'slide_info': slide_info,
+                            'visual_elements': [],
+                            'background_path': None,
+                            'text_elements': [],
+                            'error': str(e)
+                        }
+            
+            # Launch ALL slides in parallel
+            parallel_tasks = [
+                process_single_slide(slide_info) 
+                for slide_info in self.slides_info
+            ]
+            
+            # Wait for ALL slides to complete in parallel
+            slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+            
+            # Handle any top-level exceptions
+            processed_analyses = []
+            for i, result in enumerate(slide_analyses):
+                if isinstance(result, Exception):
+                    error_analysis = {
+                        'slide_info': self.slides_info[i],
+                        'visual_elements': [],
+                        'background_path': None,
+                        'text_elements': [],
+                        'error': str(result)
+                    }
+                    processed_analyses.append(error_analysis)
+                else:
+                    processed_analyses.append(result)
+            
+            all_slide_analyses = processed_analyses
+            self.slide_timings = {
+                analysis['slide_info']['number']: analysis.get('analysis_ms')
+                for analysis in all_slide_analyses
+            }
             
             # Build PPTX presentation
             # Create new PowerPoint presentation
@@ -1363,4 +1008,75 @@ async def pptx_health_check():
     return {
         "status": "healthy", 
         "service": "HTML to PPTX Converter"
-    }
\ No newline at end of file
+    }
+
+
+def _write_benchmark_deck(target_dir: Path, slide_count: int) -> None:
+    """Write a synthetic deck with text, cards, gradients and an image per slide."""
+    slides = {}
+    for number in range(1, slide_count + 1):
+        cards = "".join(
+            f'''<div class="card"><h3>Metric {i}</h3><p>Value {number * i}</p><span class="badge">+{i}%</span></div>'''
+            for i in range(1, 7)
+        )
+        html = f'''<!DOCTYPE html>
+<html><head><style>
+  body {{ margin: 0; width: 1920px; height: 1080px; font-family: Arial, sans-serif;
+         background: linear-gradient(135deg, #0f172a, #1e3a8a); color: white; }}
+  h1 {{ position: absolute; left: 120px; top: 80px; font-size: 72px; margin: 0; }}
+  .grid {{ position: absolute; left: 120px; top: 260px; display: grid;
+           grid-template-columns: repeat(3, 500px); gap: 40px; }}
+  .card {{ background: rgba(255,255,255,0.1); border: 2px solid #60a5fa; border-radius: 16px;
+           padding: 32px; box-shadow: 0 8px 24px rgba(0,0,0,0.3); }}
+  .badge {{ background: #22c55e; border-radius: 8px; padding: 4px 12px; }}
+  img {{ position: absolute; right: 120px; top: 60px; width: 160px; height: 160px; }}
+</style></head><body>
+  <h1>Benchmark slide {number}</h1>
+  <img src="data:image/svg+xml;utf8,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 10 10'><circle cx='5' cy='5' r='5' fill='orange'/></svg>">
+  <div class="grid">{cards}</div>
+</body></html>'''
+        slide_path = target_dir / f"slide_{number:02d}.html"
+        slide_path.write_text(html, encoding="utf-8")
+        slides[str(number)] = {"title": f"Slide {number}", "filename": slide_path.name, "file_path": str(slide_path)}
+    (target_dir / "metadata.json").write_text(
+        json.dumps({"presentation_name": "benchmark", "slides": slides}), encoding="utf-8"
+    )
+
+
+async def _run_benchmark(presentation_dir: Optional[str], slide_count: int, runs: int) -> None:
+    try:
+        with tempfile.TemporaryDirectory() as deck_dir:
+            if not presentation_dir:
+                _write_benchmark_deck(Path(deck_dir), slide_count)
+                presentation_dir = deck_dir
+            # The first run includes launching the pooled browser
+            for run in range(1, runs + 1):
+                converter = OptimizedHTMLToPPTXConverter(presentation_dir)
+                started = time.perf_counter()
+                _, total_slides, _ = await converter.convert_to_pptx(store_locally=False)
+                total_ms = (time.perf_counter() - started) * 1000
+                print(f"run {run}: {total_slides} slides converted in {total_ms:.0f}ms (concurrency {SLIDE_CONCURRENCY})")
+    finally:
+        await browser_pool.close()
+
+    print(f"\n{'slide':>5}  {'analysis ms':>11}")
+    for number, analysis_ms in sorted(converter.slide_timings.items()):
+        print(f"{number:>5}  {analysis_ms if analysis_ms is not None else 'failed':>11}")
+    timings = [ms for ms in converter.slide_timings.values() if ms is not None]
+    if timings:
+        print(f"\nmean {sum(timings) / len(timings):.0f}ms per slide, max {max(timings)}ms")
+
+
+if __name__ == "__main__":
+    # Benchmark: python html_to_pptx_router.py [presentation_dir] [--slides N] [--runs N]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark HTML to PPTX conversion per slide")
+    parser.add_argument("presentation_dir", nargs="?", help="Presentation folder with metadata.json (default: a generated deck)")
+    parser.add_argument("--slides", type=int, default=30, help="Number of slides of the generated deck")
+    parser.add_argument("--runs", type=int, default=2, help="Conversions to run; per-slide times are from the last one")
+    parser.add_argument("--cache", action="store_true", help="Use the slide render cache, so later runs reuse unchanged slides")
+    args = parser.parse_args()
+    if not args.cache:
+        slide_cache.max_bytes = 0
+    asyncio.run(_run_benchmark(args.presentation_dir, args.slides, max(1, args.runs)))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Incremental PDF concatenation for the PDF export router
+
+PyPDF2's PdfWriter keeps every merged page (and the readers they came from) in
+memory until the whole document is written. StreamingPdfMerger instead copies
+the pages of one input PDF at a time and returns their serialized objects right
+away, so merging a deck needs memory for a single slide only and the output can
+be sent to the client while later slides are still rendering. The page tree,
+catalog and cross-reference table are written at the end.
+
+Usage:
+    from pdf_merge import StreamingPdfMerger
+
+    merger = StreamingPdfMerger()
+    with open(output_path, 'wb') as output:
+        output.write(merger.header())
+        for pdf_path in pdf_paths:
+            output.write(merger.add_pdf(pdf_path))
+        output.write(merger.trailer())
+"""
+
+import io
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+except ImportError:
+    raise ImportError("PyPDF2 is not installed. Please install it with: pip install PyPDF2")
+
+
+class StreamingPdfMerger:
+    """Concatenate PDFs page by page, emitting the output as it is produced."""
+
+    # Object numbers reserved for the page tree and catalog written by trailer()
+    PAGES_ID = 1
+    CATALOG_ID = 2
+
+    def __init__(self):
+        self._offset = 0
+        self._next_id = 3
+        self._xref: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _write_object(self, output: io.BytesIO, object_id: int, obj) -> None:
+        self._xref[object_id] = self._offset + output.tell()
+        output.write(f"{object_id} 0 obj\n".encode())
+        obj.write_to_stream(output, None)
+        output.write(b"\nendobj\n")
+
+    def header(self) -> bytes:
+        return self._emit(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def add_pdf(self, pdf_path: Path) -> bytes:
+        """Append all pages of a PDF file and return the bytes to write for them."""
+        reader = PdfReader(str(pdf_path))
+        root = reader.trailer['/Root']
+        # References to the source's page tree and catalog resolve to the merged ones
+        mapping: Dict[Tuple[int, int], int] = {}
+        if isinstance(root, IndirectObject):
+            mapping[(root.idnum, root.generation)] = self.CATALOG_ID
+        pages_ref = root.get_object().raw_get('/Pages')
+        if isinstance(pages_ref, IndirectObject):
+            mapping[(pages_ref.idnum, pages_ref.generation)] = self.PAGES_ID
+
+        pending: List[Tuple[int, object]] = []
+
+        def remap(obj):
+            if isinstance(obj, IndirectObject):
+                key = (obj.idnum, obj.generation)
+                if key not in mapping:
+                    mapping[key] = self._next_id
+                    self._next_id += 1
+                    pending.append((mapping[key], obj.get_object()))
+                return IndirectObject(mapping[key], 0, None)
+            if isinstance(obj, DictionaryObject):
+                if isinstance(obj, StreamObject):
+                    # Recomputed from the stream data when written
+                    obj.pop(NameObject('/Length'), None)
+                for name in list(obj.keys()):
+                    obj[name] = remap(obj.raw_get(name))
+            elif isinstance(obj, ArrayObject):
+                for i, item in enumerate(obj):
+                    obj[i] = remap(item)
+            return obj
+
+        output = io.BytesIO()
+        for page in reader.pages:
+            page_ref = page.indirect_ref
+            page_id = self._next_id
+            self._next_id += 1
+            if page_ref is not None:
+                mapping[(page_ref.idnum, page_ref.generation)] = page_id
+            # Inherited attributes are already copied into the page by PdfReader
+            page.pop(NameObject('/Parent'), None)
+            remap(page)
+            page[NameObject('/Parent')] = IndirectObject(self.PAGES_ID, 0, None)
+            self._write_object(output, page_id, page)
+            self._page_ids.append(page_id)
+
+            while pending:
+                object_id, obj = pending.pop()
+                self._write_object(output, object_id, remap(obj))
+
+        return self._emit(output.getvalue())
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def trailer(self) -> bytes:
+        """Page tree, catalog, cross-reference table and trailer that end the document."""
+        output = io.BytesIO()
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self._page_ids)
+        for object_id, body in (
+            (self.PAGES_ID, f"<< /Type /Pages /Kids [ {kids} ] /Count {len(self._page_ids)} >>"),
+            (self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>"),
+        ):
+            self._xref[object_id] = self._offset + output.tell()
+            output.write(f"{object_id} 0 obj\n{body}\nendobj\n".encode())
+
+        xref_offset = self._offset + output.tell()
+        size = self._next_id
+        output.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, size):
+            if object_id in self._xref:
+                output.write(f"{self._xref[object_id]:010d} 00000 n \n".encode())
+            else:
+                output.write(b"0000000000 65535 f \n")
+        output.write(
+            f"trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+        return self._emit(output.getvalue())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of per-slide render artifacts for the presentation export routers
+
+A deck is usually exported again after editing one or two slides. Slides are
+cached under a key that hashes the renderer variant, the viewport, the slide
+HTML and the contents of the local assets it references (images, stylesheets,
+scripts, fonts), so only changed slides are rendered again:
+
+- PDF export caches the rendered PDF page of each slide
+- PPTX export caches the slide analysis: the clean background PNG, the visual
+  element PNGs and the extracted text/visual element JSON
+
+Entries are written to a temporary directory and renamed into place, and are
+hard-linked (or copied) into the request's temp directory when used, so pruning
+the cache never affects a conversion in progress. The least recently used
+entries are removed once the cache exceeds SLIDE_CACHE_MAX_BYTES (0 disables the
+cache).
+
+Usage:
+    from slide_cache import slide_cache
+
+    key = slide_cache.key("pdf-1", html_path, viewport=(1920, 1080))
+    if not slide_cache.restore(key, temp_dir / "slide_01"):
+        ...render into temp_dir / "slide_01"...
+        slide_cache.store(key, temp_dir / "slide_01")
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+SLIDE_CACHE_DIR = Path(os.environ.get("SLIDE_CACHE_DIR", "/tmp/slide_render_cache"))
+SLIDE_CACHE_MAX_BYTES = int(os.environ.get("SLIDE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Pruning scans the whole cache, so it runs at most this often
+PRUNE_INTERVAL_SECONDS = 60
+
+# src="...", href="..." and url(...) references in HTML and inline CSS
+ASSET_REFERENCE_PATTERN = re.compile(
+    r"""(?:\bsrc|\bhref)\s*=\s*["']([^"']+)["']|url\(\s*["']?([^"')]+?)["']?\s*\)""",
+    re.IGNORECASE,
+)
+
+
+class SlideRenderCache:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._asset_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._last_prune = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _file_hash(self, path: Path) -> str:
+        """Hash of a file's contents, memoized by path, size and mtime."""
+        stat = path.stat()
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._asset_hashes.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            self._asset_hashes[memo_key] = digest
+        return digest
+
+    def _local_asset(self, reference: str, base_dir: Path) -> Optional[Path]:
+        reference = reference.strip()
+        if not reference or reference.startswith(('#', 'data:', 'javascript:', 'mailto:')):
+            return None
+        parsed = urlparse(reference)
+        if parsed.scheme and parsed.scheme != 'file':
+            # Remote assets are keyed by their URL only
+            return None
+        path = Path(unquote(parsed.path))
+        path = path if path.is_absolute() else base_dir / path
+        return path if path.is_file() else None
+
+    def key(self, variant: str, html_path: Path, viewport: Tuple[int, int] = (1920, 1080)) -> str:
+        """Cache key of a slide: renderer variant, viewport, HTML and referenced local assets."""
+        html = html_path.read_bytes()
+        hasher = hashlib.sha256()
+        hasher.update(f"{variant}\0{viewport[0]}x{viewport[1]}\0".encode())
+        hasher.update(html)
+
+        references = set()
+        for match in ASSET_REFERENCE_PATTERN.finditer(html.decode('utf-8', errors='replace')):
+            references.add(match.group(1) or match.group(2))
+        for reference in sorted(references):
+            hasher.update(b"\0" + reference.encode())
+            asset = self._local_asset(reference, html_path.parent)
+            if asset is not None:
+                try:
+                    hasher.update(self._file_hash(asset).encode())
+                except OSError:
+                    pass
+        return hasher.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def restore(self, key: str, target_dir: Path) -> bool:
+        """Link the files of a cached entry into target_dir. Returns False on a cache miss."""
+        if not self.enabled:
+            return False
+        entry_dir = self._entry_dir(key)
+        try:
+            files = list(entry_dir.iterdir())
+        except FileNotFoundError:
+            return False
+        try:
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for cached_file in files:
+                target = target_dir / cached_file.name
+                try:
+                    os.link(cached_file, target)
+                except OSError:
+                    shutil.copy2(cached_file, target)
+            # Directory mtime is the LRU timestamp
+            os.utime(entry_dir)
+            return True
+        except OSError as e:
+            print(f"Slide cache entry {key} could not be restored: {e}")
+            shutil.rmtree(target_dir, ignore_errors=True)
+            return False
+
+    def store(self, key: str, source_dir: Path) -> None:
+        """Store the files in source_dir as the cache entry for key."""
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(key)
+        try:
+            entry_dir.parent.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=entry_dir.parent))
+            for source_file in source_dir.iterdir():
+                if source_file.is_file():
+                    try:
+                        os.link(source_file, staging / source_file.name)
+                    except OSError:
+                        shutil.copy2(source_file, staging / source_file.name)
+            try:
+                staging.rename(entry_dir)
+            except OSError:
+                # Stored concurrently by another conversion
+                shutil.rmtree(staging, ignore_errors=True)
+        except OSError as e:
+            print(f"Slide cache entry {key} could not be stored: {e}")
+            return
+        self.prune()
+
+    def prune(self) -> None:
+        """Remove the least recently used entries while the cache is over its size limit."""
+        now = time.monotonic()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+
+        entries = []
+        total = 0
+        for entry_dir in self.root.glob("*/*"):
+            if not entry_dir.is_dir() or entry_dir.name.startswith('.'):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in entry_dir.iterdir())
+                entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+                total += size
+            except OSError:
+                continue
+
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+
+slide_cache = SlideRenderCache(SLIDE_CACHE_DIR, SLIDE_CACHE_MAX_BYTES)
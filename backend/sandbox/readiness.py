@@ -0,0 +1,124 @@
+"""
+Readiness probing for in-sandbox services.
+
+Instead of sleeping for a fixed amount of time after a sandbox is created or
+started, callers ask for the services they actually need and this module polls
+them concurrently with exponential backoff, returning as soon as all of them
+respond (or the deadline passes).
+
+Usage:
+    from sandbox.readiness import wait_for_services
+
+    report = await wait_for_services(sandbox, ("supervisord", "browser_api"))
+    if not report.ready:
+        logger.warning(f"Sandbox services not ready: {report.pending}")
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from daytona_sdk import AsyncSandbox
+from utils.logger import logger
+
+# Shell probes executed inside the sandbox. Each must exit 0 once the service is up.
+# HTTP probes only require that something answers on the port; any status code counts.
+SERVICE_PROBES: Dict[str, str] = {
+    # Match the process name exactly: with -f the probe's own shell command line matches.
+    # supervisord.conf has no control socket, so supervisorctl cannot be used here.
+    "supervisord": "pgrep -x supervisord > /dev/null",
+    "browser_api": "curl -s -o /dev/null -m 2 -w '%{http_code}' http://localhost:8003/ | grep -qv '^000$'",
+    "http_server": "curl -s -o /dev/null -m 2 -w '%{http_code}' http://localhost:8080/ | grep -qv '^000$'",
+    "stagehand_api": "curl -s -o /dev/null -m 2 -w '%{http_code}' http://localhost:8004/api | grep -qv '^000$'",
+    "vnc": "curl -s -o /dev/null -m 2 -w '%{http_code}' http://localhost:6080/ | grep -qv '^000$'",
+}
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+INITIAL_BACKOFF_SECONDS = 0.25
+MAX_BACKOFF_SECONDS = 2.0
+
+
+@dataclass
+class ReadinessReport:
+    """Outcome of a readiness wait.
+
+    Attributes:
+        phases (Dict[str, float]): Seconds spent in each startup phase
+            (e.g. ``create``, ``start``, ``supervisord``), in the order recorded
+        pending (List[str]): Services that did not become ready before the deadline
+    """
+    phases: Dict[str, float] = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)
+
+    @property
+    def ready(self) -> bool:
+        return not self.pending
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = round(seconds, 3)
+
+    def merge(self, other: "ReadinessReport"):
+        self.phases.update(other.phases)
+        self.pending.extend(s for s in other.pending if s not in self.pending)
+
+
+async def _probe_until_ready(sandbox: AsyncSandbox, service: str, deadline: float) -> Optional[float]:
+    """Poll a single service until it responds. Returns seconds waited, or None on timeout."""
+    command = SERVICE_PROBES[service]
+    started = time.monotonic()
+    backoff = INITIAL_BACKOFF_SECONDS
+
+    while True:
+        try:
+            response = await sandbox.process.exec(command, timeout=5)
+            if response.exit_code == 0:
+                return time.monotonic() - started
+        except Exception as e:
+            logger.debug(f"Readiness probe for {service} in sandbox {sandbox.id} failed: {e}")
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(backoff, remaining))
+        backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+
+async def wait_for_services(
+    sandbox: AsyncSandbox,
+    services: Iterable[str],
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> ReadinessReport:
+    """Wait until the given in-sandbox services respond, probing them concurrently.
+
+    Args:
+        sandbox: The sandbox to probe
+        services: Names from ``SERVICE_PROBES`` that the caller depends on
+        timeout: Overall deadline in seconds shared by all probes
+
+    Returns:
+        ReadinessReport with per-service timings; services that timed out are
+        listed in ``pending`` rather than raising, so callers can degrade gracefully.
+    """
+    report = ReadinessReport()
+    wanted = list(dict.fromkeys(services))
+    unknown = [s for s in wanted if s not in SERVICE_PROBES]
+    if unknown:
+        raise ValueError(f"Unknown sandbox services: {', '.join(unknown)}")
+    if not wanted:
+        return report
+
+    deadline = time.monotonic() + timeout
+    results = await asyncio.gather(*(_probe_until_ready(sandbox, s, deadline) for s in wanted))
+
+    for service, waited in zip(wanted, results):
+        if waited is None:
+            report.pending.append(service)
+        else:
+            report.record(service, waited)
+
+    if report.ready:
+        logger.debug(f"Sandbox {sandbox.id} services ready: {report.phases}")
+    else:
+        logger.warning(f"Sandbox {sandbox.id} services not ready after {timeout}s: {report.pending} (ready: {report.phases})")
+    return report
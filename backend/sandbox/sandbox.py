@@ -1,5 +1,8 @@
+import time
+from typing import Iterable
 from daytona_sdk import AsyncDaytona, DaytonaConfig, CreateSandboxFromSnapshotParams, AsyncSandbox, SessionExecuteRequest, Resources, SandboxState
 from dotenv import load_dotenv
+from sandbox.readiness import ReadinessReport, wait_for_services
 from utils.logger import logger
 from utils.config import config
 from utils.config import Configuration
@@ -30,8 +33,12 @@ else:
 
 daytona = AsyncDaytona(daytona_config)
 
-async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
-    """Retrieve a sandbox by ID, check its state, and start it if needed."""
+async def get_or_start_sandbox(sandbox_id: str, services: Iterable[str] = ()) -> AsyncSandbox:
+    """Retrieve a sandbox by ID, check its state, and start it if needed.
+
+    If the sandbox had to be started, waits until the given in-sandbox
+    ``services`` (see ``sandbox.readiness.SERVICE_PROBES``) respond.
+    """
     
     logger.debug(f"Getting or starting sandbox with ID: {sandbox_id}")
 
@@ -42,14 +49,19 @@ async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
         if sandbox.state == SandboxState.ARCHIVED or sandbox.state == SandboxState.STOPPED:
             logger.debug(f"Sandbox is in {sandbox.state} state. Starting...")
             try:
+                previous_state = sandbox.state
+                report = ReadinessReport()
+                started = time.monotonic()
                 await daytona.start(sandbox)
-                # Wait a moment for the sandbox to initialize
-                # sleep(5)
                 # Refresh sandbox state after starting
                 sandbox = await daytona.get(sandbox_id)
+                report.record("start", time.monotonic() - started)
                 
                 # Start supervisord in a session when restarting
                 await start_supervisord_session(sandbox)
+
+                report.merge(await wait_for_services(sandbox, services))
+                logger.info(f"Sandbox {sandbox_id} started from {previous_state} with phase timings: {report.phases}")
             except Exception as e:
                 logger.error(f"Error starting sandbox: {e}")
                 raise e
@@ -78,8 +90,11 @@ async def start_supervisord_session(sandbox: AsyncSandbox):
         logger.error(f"Error starting supervisord session: {str(e)}")
         raise e
 
-async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
-    """Create a new sandbox with all required services configured and running."""
+async def create_sandbox(password: str, project_id: str = None, services: Iterable[str] = ()) -> AsyncSandbox:
+    """Create a new sandbox with all required services configured and running.
+
+    Waits until the given in-sandbox ``services`` respond before returning.
+    """
     
     logger.debug("Creating new Daytona sandbox environment")
     logger.debug("Configuring sandbox with snapshot and environment variables")
@@ -116,11 +131,17 @@ async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
     )
     
     # Create the sandbox
+    report = ReadinessReport()
+    started = time.monotonic()
     sandbox = await daytona.create(params)
+    report.record("create", time.monotonic() - started)
     logger.debug(f"Sandbox created with ID: {sandbox.id}")
     
     # Start supervisord in a session for new sandbox
     await start_supervisord_session(sandbox)
+
+    report.merge(await wait_for_services(sandbox, services))
+    logger.info(f"Sandbox {sandbox.id} created with phase timings: {report.phases}")
     
     logger.debug(f"Sandbox environment successfully initialized")
     return sandbox
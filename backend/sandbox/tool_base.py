@@ -1,6 +1,9 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import json
+import shlex
 import uuid
-import asyncio
+
+import httpx
 
 from agentpress.thread_manager import ThreadManager
 from agentpress.tool import Tool
@@ -9,12 +12,43 @@ from sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox
 from utils.logger import logger
 from utils.files_utils import clean_path
 from utils.config import config
+from services.http_client import get_shared_http_client
+
+# Statuses of the preview proxy when it can't reach the in-sandbox service
+PROXY_ERROR_STATUSES = frozenset({502, 503, 504})
+# Failures raised before a request was sent, so it is safe to make it again with curl
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ProxyError, httpx.PoolTimeout)
+# Shared client for all preview links; every sandbox and port has its own origin
+PREVIEW_HTTP_CLIENT = "sandbox-preview"
+
+class SandboxServiceError(Exception):
+    """A call to an in-sandbox HTTP service failed.
+
+    ``exit_code`` is curl's exit code when the call was made with curl, else None.
+    """
+
+    def __init__(self, port: int, exit_code: Optional[int], output: str):
+        if exit_code is None:
+            super().__init__(f"Request to sandbox port {port} failed: {output}")
+        else:
+            super().__init__(f"Request to sandbox port {port} failed (curl exit code {exit_code}): {output}")
+        self.port = port
+        self.exit_code = exit_code
+
 
 class SandboxToolsBase(Tool):
     """Base class for all sandbox tools that provides project-based sandbox access."""
     
     # Class variable to track if sandbox URLs have been printed
     _urls_printed = False
+
+    # In-sandbox services (see sandbox.readiness.SERVICE_PROBES) this tool needs
+    # before it can run. Only probed when the sandbox is created or (re)started.
+    required_services: Tuple[str, ...] = ("supervisord",)
+
+    # Sandbox tools mutate shared sandbox state, so their calls stay ordered
+    # (see agentpress.tool_executor).
+    default_resource_class = "sandbox"
     
     def __init__(self, project_id: str, thread_manager: Optional[ThreadManager] = None):
         super().__init__()
@@ -24,6 +58,8 @@ class SandboxToolsBase(Tool):
         self._sandbox = None
         self._sandbox_id = None
         self._sandbox_pass = None
+        self._service_endpoints: Dict[int, Tuple[str, Dict[str, str]]] = {}
+        self._direct_http_failed = False
 
     async def _ensure_sandbox(self) -> AsyncSandbox:
         """Ensure we have a valid sandbox instance, retrieving it from the project if needed.
@@ -48,13 +84,9 @@ class SandboxToolsBase(Tool):
                 if not sandbox_info.get('id'):
                     logger.debug(f"No sandbox recorded for project {self.project_id}; creating lazily")
                     sandbox_pass = str(uuid.uuid4())
-                    sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
+                    sandbox_obj = await create_sandbox(sandbox_pass, self.project_id, services=self.required_services)
                     sandbox_id = sandbox_obj.id
                     
-                    # Wait 5 seconds for services to start up
-                    logger.info(f"Waiting 5 seconds for sandbox {sandbox_id} services to initialize...")
-                    await asyncio.sleep(5)
-                    
                     # Gather preview links and token (best-effort parsing)
                     try:
                         vnc_link = await sandbox_obj.get_preview_link(6080)
@@ -91,12 +123,12 @@ class SandboxToolsBase(Tool):
                     # Store local metadata and ensure sandbox is ready
                     self._sandbox_id = sandbox_id
                     self._sandbox_pass = sandbox_pass
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
+                    self._sandbox = await get_or_start_sandbox(self._sandbox_id, services=self.required_services)
                 else:
                     # Use existing sandbox metadata
                     self._sandbox_id = sandbox_info['id']
                     self._sandbox_pass = sandbox_info.get('pass')
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
+                    self._sandbox = await get_or_start_sandbox(self._sandbox_id, services=self.required_services)
 
             except Exception as e:
                 logger.error(f"Error retrieving/creating sandbox for project {self.project_id}: {str(e)}", exc_info=True)
@@ -118,6 +150,79 @@ class SandboxToolsBase(Tool):
             raise RuntimeError("Sandbox ID not initialized. Call _ensure_sandbox() first.")
         return self._sandbox_id
 
+    async def _get_service_endpoint(self, port: int) -> Tuple[str, Dict[str, str]]:
+        """Base URL and auth headers of an in-sandbox service, resolved once via its preview link."""
+        endpoint = self._service_endpoints.get(port)
+        if endpoint is None:
+            await self._ensure_sandbox()
+            preview_link = await self.sandbox.get_preview_link(port)
+            url = preview_link.url if hasattr(preview_link, 'url') else str(preview_link)
+            token = getattr(preview_link, 'token', None)
+            headers = {"X-Daytona-Preview-Token": token} if token else {}
+            endpoint = self._service_endpoints[port] = (url.rstrip('/'), headers)
+        return endpoint
+
+    async def _call_sandbox_service(
+        self,
+        port: int,
+        path: str,
+        params: Optional[dict] = None,
+        method: str = "POST",
+        timeout: float = 30,
+    ) -> str:
+        """Call an HTTP service running inside the sandbox and return the response body.
+
+        Requests go straight to the service's preview link over the shared
+        keep-alive connection pool, instead of spawning ``curl`` in the sandbox
+        through the exec API for every call. If the preview link can't be reached
+        (or ``SANDBOX_DIRECT_HTTP`` is off), the call is made with ``curl`` inside
+        the sandbox, and this tool instance keeps using ``curl`` from then on.
+
+        Actions (non-GET calls) are not idempotent: once a request may have reached
+        the service (read timeout, gateway error status, proxy error page), it is
+        not made again with ``curl`` but raised as SandboxServiceError. GET calls
+        fall back to ``curl`` on any of these.
+        """
+        await self._ensure_sandbox()
+
+        if config.SANDBOX_DIRECT_HTTP and not self._direct_http_failed:
+            try:
+                base_url, headers = await self._get_service_endpoint(port)
+                client = get_shared_http_client(name=PREVIEW_HTTP_CLIENT)
+                if method == "GET":
+                    response = await client.get(f"{base_url}{path}", params=params, headers=headers, timeout=timeout)
+                else:
+                    response = await client.request(method, f"{base_url}{path}", json=params, headers=headers, timeout=timeout)
+                if response.status_code in PROXY_ERROR_STATUSES or (
+                    response.is_error and "json" not in response.headers.get("content-type", "")
+                ):
+                    raise httpx.HTTPStatusError(
+                        f"Preview link returned status {response.status_code}",
+                        request=response.request,
+                        response=response,
+                    )
+                return response.text
+            except NOT_SENT_ERRORS as e:
+                logger.warning(f"Direct connection to sandbox {self._sandbox_id} port {port} failed, using curl: {e}")
+                self._direct_http_failed = True
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if method != "GET":
+                    raise SandboxServiceError(port, None, f"{type(e).__name__}: {e}") from e
+                logger.warning(f"Direct request to sandbox {self._sandbox_id} port {port} failed, using curl: {e}")
+                self._direct_http_failed = True
+
+        url = f"http://localhost:{port}{path}"
+        if method == "GET" and params:
+            url = f"{url}?{httpx.QueryParams(params)}"
+        curl_cmd = f"curl -s -X {method} {shlex.quote(url)} -H 'Content-Type: application/json'"
+        if method != "GET" and params:
+            curl_cmd += f" -d {shlex.quote(json.dumps(params))}"
+
+        response = await self.sandbox.process.exec(curl_cmd, timeout=int(timeout))
+        if response.exit_code != 0:
+            raise SandboxServiceError(port, response.exit_code, response.result)
+        return response.result
+
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace."""
         cleaned_path = clean_path(path, self.workspace_path)
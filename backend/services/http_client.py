@@ -0,0 +1,197 @@
+"""
+Shared, pooled HTTP clients for outbound calls.
+
+Creating an ``httpx.AsyncClient`` per request throws away keep-alive connections
+and pays a new TCP and TLS handshake every time. This module keeps one pooled
+client per upstream origin (scheme + host + port) and event loop, with HTTP/2
+where the ``h2`` package is available, bounded keep-alive pools, default
+timeouts and connection-level retries. Per-origin request counts, latency and
+new connection/TLS handshake counts are tracked for observability.
+
+Usage:
+    from services.http_client import get_http_client
+
+    client = get_http_client("https://api.firecrawl.dev")
+    response = await client.post("https://api.firecrawl.dev/v1/scrape", json=payload)
+
+SDKs that take a single ``http_client`` for all of their upstreams can use
+``get_shared_http_client()`` instead; its metrics are still kept per origin.
+Callers with an unbounded set of origins (e.g. one per sandbox preview link)
+use a named shared client, ``get_shared_http_client(name="sandbox-preview")``,
+whose metrics are kept under that name.
+
+Like plain httpx clients, they don't follow redirects; callers that should
+opt in per request with ``follow_redirects=True``.
+
+Clients are shared: never close them or use them as a context manager. Call
+``close_http_clients()`` on shutdown.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from utils.logger import logger
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+# Retries of failed connection attempts (httpx never retries once a request was sent)
+DEFAULT_CONNECT_RETRIES = 2
+# Key of the client returned by get_shared_http_client()
+SHARED_CLIENT_KEY = "*"
+
+
+@dataclass
+class HostMetrics:
+    """Request and connection counters for one upstream origin."""
+    requests: int = 0
+    errors: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency_ms / self.requests if self.requests else 0.0
+
+
+_clients: Dict[Tuple[Optional[int], str], httpx.AsyncClient] = {}
+_metrics: Dict[str, HostMetrics] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _loop_id() -> Optional[int]:
+    # Connections are bound to the loop that opened them; workers may run several loops.
+    try:
+        return id(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+
+
+def _make_hooks(origin: Optional[str]):
+    """Metrics hooks for a client; without an origin, metrics are kept per request origin."""
+
+    async def on_request(request: httpx.Request):
+        metrics = _metrics.setdefault(origin or _origin(str(request.url)), HostMetrics())
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                metrics.new_connections += 1
+            elif event_name == "connection.start_tls.complete":
+                metrics.tls_handshakes += 1
+
+        request.extensions["trace"] = trace
+        request.extensions["request_started_at"] = time.monotonic()
+        request.extensions["request_metrics"] = metrics
+
+    async def on_response(response: httpx.Response):
+        metrics = response.request.extensions["request_metrics"]
+        started = response.request.extensions.get("request_started_at")
+        latency_ms = (time.monotonic() - started) * 1000 if started else 0.0
+        metrics.requests += 1
+        metrics.total_latency_ms += latency_ms
+        metrics.max_latency_ms = max(metrics.max_latency_ms, latency_ms)
+        if response.status_code >= 500:
+            metrics.errors += 1
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def get_http_client(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """Get the shared pooled client for the origin of ``url``.
+
+    Args:
+        url: Any URL (or bare host) on the upstream
+        headers: Default headers, applied only when the client for this origin is
+            first created; pass per-request headers for anything caller-specific
+
+    Returns:
+        A long-lived httpx.AsyncClient. Do not close it.
+    """
+    origin = _origin(url)
+    key = (_loop_id(), origin)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = _create_client(origin, headers, DEFAULT_TIMEOUT, DEFAULT_LIMITS)
+        logger.debug(f"Created pooled HTTP client for {origin} (http2={HTTP2_AVAILABLE})")
+    return client
+
+
+def get_shared_http_client(
+    timeout: Optional[httpx.Timeout] = None,
+    limits: Optional[httpx.Limits] = None,
+    name: Optional[str] = None,
+) -> httpx.AsyncClient:
+    """Get the pooled client shared by callers that reach several upstreams through one client object.
+
+    Meant for SDKs that accept a single ``http_client`` (e.g. the OpenAI SDK
+    used by LiteLLM). Connections are still pooled per origin, and metrics are
+    tracked per origin of each request.
+
+    Args:
+        timeout: Default timeout, applied only when the client is first created
+        limits: Connection pool limits, applied only when the client is first created
+        name: Get a separate shared client, whose metrics are all kept under this
+            name instead of per origin; for callers with an unbounded set of origins
+
+    Returns:
+        A long-lived httpx.AsyncClient. Do not close it.
+    """
+    key = (_loop_id(), name or SHARED_CLIENT_KEY)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = _create_client(name, None, timeout or DEFAULT_TIMEOUT, limits or DEFAULT_LIMITS)
+        logger.debug(f"Created shared pooled HTTP client {key[1]} (http2={HTTP2_AVAILABLE})")
+    return client
+
+
+def _create_client(
+    origin: Optional[str],
+    headers: Optional[Dict[str, str]],
+    timeout: httpx.Timeout,
+    limits: httpx.Limits,
+) -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_AVAILABLE,
+        limits=limits,
+        retries=DEFAULT_CONNECT_RETRIES,
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=timeout,
+        headers=headers,
+        event_hooks=_make_hooks(origin),
+    )
+
+
+def get_http_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of per-origin request, latency and connection metrics."""
+    return {
+        origin: {**asdict(m), "avg_latency_ms": round(m.avg_latency_ms, 2)}
+        for origin, m in _metrics.items()
+    }
+
+
+async def close_http_clients():
+    """Close all pooled clients owned by the current event loop."""
+    loop_id = _loop_id()
+    for key in [k for k in _clients if k[0] == loop_id]:
+        client = _clients.pop(key)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client for {key[1]}: {e}")
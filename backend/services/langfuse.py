@@ -1,5 +1,6 @@
 import os
 from langfuse import Langfuse
+from services.trace_export import TraceExporter
 
 public_key = os.getenv("LANGFUSE_PUBLIC_KEY")
 secret_key = os.getenv("LANGFUSE_SECRET_KEY")
@@ -9,4 +10,5 @@ enabled = False
 if public_key and secret_key:
     enabled = True
 
-langfuse = Langfuse(enabled=enabled)
+# Trace calls are queued and exported in the background (see services/trace_export.py)
+langfuse = TraceExporter(Langfuse(enabled=enabled), enabled=enabled)
@@ -8,15 +8,28 @@ This module provides a unified interface for making API calls to different LLM p
 - Retry logic with exponential backoff
 - Model-specific configurations
 - Comprehensive error handling and logging
+- Provider routers built once per (api_base, api_key) and reused across calls,
+  with LLM traffic over the shared pooled HTTP client (see services.http_client)
+- Latency-aware routing between equivalent endpoints (a model and its OpenRouter
+  equivalent) and optional hedged streaming requests
 """
 
-from typing import Union, Dict, Any, Optional, AsyncGenerator, List
+from typing import Union, Dict, Any, Optional, AsyncGenerator, AsyncIterator, List, Tuple, Deque
+from dataclasses import dataclass, field
+from collections import defaultdict, deque
+import asyncio
 import os
+import statistics
+import time
+import httpx
 import litellm
 from litellm.router import Router
 from litellm.files.main import ModelResponse
+from services.trace_export import ExportedTrace
 from utils.logger import logger
 from utils.config import config
+from utils.metrics import LLM_TIME_TO_FIRST_TOKEN
+from services.http_client import get_shared_http_client
 
 # litellm.set_verbose=True
 # Let LiteLLM auto-adjust params and drop unsupported ones (e.g., GPT-5 temperature!=1)
@@ -25,7 +38,38 @@ litellm.drop_params = True
 
 # Constants
 MAX_RETRIES = 3
-provider_router = None
+# Anthropic accepts at most 4 cache_control breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+# Conversation cache breakpoints sit on every CACHE_BREAKPOINT_STRIDE-th message
+CACHE_BREAKPOINT_STRIDE = 8
+# Streams can run for minutes; the OpenAI SDK also sets its own per-request timeouts
+LLM_HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=500, max_keepalive_connections=100, keepalive_expiry=120.0)
+
+
+@dataclass
+class ProviderRouterStats:
+    """Usage counters for one provider router."""
+    api_base: Optional[str]
+    calls: int = 0
+    errors: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+# Model health used for routing: samples older than HEALTH_WINDOW_SECONDS are
+# ignored, so an endpoint routed away from is tried again once they expire
+HEALTH_WINDOW_SECONDS = 300
+HEALTH_MAX_SAMPLES = 50
+HEALTH_MIN_SAMPLES = 5
+# Route to the equivalent endpoint above this error rate...
+UNHEALTHY_ERROR_RATE = 0.3
+# ...or when the median time to first token is this many times the equivalent's
+SLOW_TTFT_FACTOR = 2.0
+
+
+# Provider routers by (api_base, api_key), built on first use
+_provider_routers: Dict[Tuple[Optional[str], Optional[str]], Router] = {}
+_provider_router_stats: Dict[Tuple[Optional[str], Optional[str]], ProviderRouterStats] = {}
 
 
 class LLMError(Exception):
@@ -72,15 +116,14 @@ def setup_api_keys() -> None:
         logger.warning(f"Missing AWS credentials for Bedrock integration - access_key: {bool(aws_access_key)}, secret_key: {bool(aws_secret_key)}, region: {aws_region}")
 
 
-def setup_provider_router(openai_compatible_api_key: str = None, openai_compatible_api_base: str = None):
-    global provider_router
+def _build_provider_router(openai_compatible_api_key: Optional[str], openai_compatible_api_base: Optional[str]) -> Router:
     model_list = [
         {
             "model_name": "openai-compatible/*", # support OpenAI-Compatible LLM provider
             "litellm_params": {
                 "model": "openai/*",
-                "api_key": openai_compatible_api_key or config.OPENAI_COMPATIBLE_API_KEY,
-                "api_base": openai_compatible_api_base or config.OPENAI_COMPATIBLE_API_BASE,
+                "api_key": openai_compatible_api_key,
+                "api_base": openai_compatible_api_base,
             },
         },
         {
@@ -90,9 +133,146 @@ def setup_provider_router(openai_compatible_api_key: str = None, openai_compatib
             },
         },
     ]
-    provider_router = Router(model_list=model_list)
+    return Router(model_list=model_list)
+
+
+def _provider_router_key(api_key: Optional[str], api_base: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    return (api_base or config.OPENAI_COMPATIBLE_API_BASE, api_key or config.OPENAI_COMPATIBLE_API_KEY)
+
+
+def get_provider_router(openai_compatible_api_key: Optional[str] = None, openai_compatible_api_base: Optional[str] = None) -> Router:
+    """Get the router for the given OpenAI-compatible credentials (defaults from config).
+
+    Routers are built once per (api_base, api_key) and reused, so the provider
+    clients they cache keep their connections alive between calls.
+    """
+    key = _provider_router_key(openai_compatible_api_key, openai_compatible_api_base)
+    router = _provider_routers.get(key)
+    if router is None:
+        api_base, api_key = key
+        router = _provider_routers[key] = _build_provider_router(api_key, api_base)
+        _provider_router_stats[key] = ProviderRouterStats(api_base=api_base)
+        logger.debug(f"Created provider router for OpenAI-compatible base {api_base} ({len(_provider_routers)} routers)")
+    return router
+
+
+def _use_pooled_http_client() -> None:
+    """Make the OpenAI SDK clients LiteLLM creates share the pooled, instrumented HTTP client.
+
+    LiteLLM caches its SDK clients for an hour; clients created after that reuse
+    the same connection pool instead of handshaking again. Providers LiteLLM
+    calls with its own HTTP handler (e.g. Anthropic) keep a per-provider pool
+    inside LiteLLM.
+    """
+    litellm.aclient_session = get_shared_http_client(LLM_HTTP_TIMEOUT, LLM_HTTP_LIMITS)
+
+
+def get_provider_router_metrics() -> List[Dict[str, Any]]:
+    """Snapshot of provider router usage; connection reuse is in services.http_client.get_http_metrics()."""
+    now = time.time()
+    return [
+        {
+            "api_base": stats.api_base,
+            "calls": stats.calls,
+            "errors": stats.errors,
+            "age_seconds": round(now - stats.created_at),
+        }
+        for stats in _provider_router_stats.values()
+    ]
+
+
+@dataclass
+class ModelHealth:
+    """Rolling time-to-first-token and error samples of one model."""
+    ttft_ms: Deque[Tuple[float, float]] = field(default_factory=lambda: deque(maxlen=HEALTH_MAX_SAMPLES))
+    outcomes: Deque[Tuple[float, bool]] = field(default_factory=lambda: deque(maxlen=HEALTH_MAX_SAMPLES))
+
+    def record_ttft(self, ttft_ms: float) -> None:
+        self.ttft_ms.append((time.monotonic(), ttft_ms))
+
+    def record_outcome(self, error: bool) -> None:
+        self.outcomes.append((time.monotonic(), error))
+
+    @staticmethod
+    def _recent(samples: Deque[Tuple[float, Any]]) -> List[Any]:
+        cutoff = time.monotonic() - HEALTH_WINDOW_SECONDS
+        return [value for recorded_at, value in samples if recorded_at >= cutoff]
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        """Recent error rate, or None without enough recent calls."""
+        outcomes = self._recent(self.outcomes)
+        return sum(outcomes) / len(outcomes) if len(outcomes) >= HEALTH_MIN_SAMPLES else None
+
+    @property
+    def median_ttft_ms(self) -> Optional[float]:
+        """Recent median time to first token, or None without enough recent samples."""
+        samples = self._recent(self.ttft_ms)
+        return statistics.median(samples) if len(samples) >= HEALTH_MIN_SAMPLES else None
+
+
+_model_health: Dict[str, ModelHealth] = defaultdict(ModelHealth)
+
+
+def get_model_health_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of the recent error rate and median TTFT per model."""
+    return {
+        model: {
+            "error_rate": health.error_rate,
+            "median_ttft_ms": health.median_ttft_ms,
+            "calls": len(health._recent(health.outcomes)),
+        }
+        for model, health in _model_health.items()
+    }
+
+
+def _route_model(model_name: str) -> Tuple[str, Optional[str], str]:
+    """Choose between a model and its equivalent endpoint.
+
+    Only models listed in OPENROUTER_EQUIVALENTS are routed or hedged; the
+    provider-wide defaults of get_openrouter_fallback name a different model.
+
+    Returns:
+        (model to call, the other endpoint or None, reason for the choice)
+    """
+    alternative = OPENROUTER_EQUIVALENTS.get(model_name)
+    if alternative is None:
+        return model_name, None, "no equivalent endpoint"
+    if not config.LLM_LATENCY_ROUTING:
+        return model_name, alternative, "latency routing disabled"
+
+    primary, other = _model_health[model_name], _model_health[alternative]
+    primary_errors, other_errors = primary.error_rate, other.error_rate
+    if primary_errors is not None and primary_errors > UNHEALTHY_ERROR_RATE and (other_errors is None or other_errors < primary_errors):
+        return alternative, model_name, f"error rate {primary_errors:.0%} on {model_name}"
+
+    primary_ttft, other_ttft = primary.median_ttft_ms, other.median_ttft_ms
+    if (
+        primary_ttft is not None and other_ttft is not None
+        and primary_ttft > SLOW_TTFT_FACTOR * other_ttft
+        and (other_errors or 0) <= UNHEALTHY_ERROR_RATE
+    ):
+        return alternative, model_name, f"median TTFT {primary_ttft:.0f}ms on {model_name} vs {other_ttft:.0f}ms"
+    return model_name, alternative, "requested endpoint healthy"
+
+
+def _trace_event(trace: Optional[ExportedTrace], name: str, message: str, level: str = "DEFAULT") -> None:
+    if trace is None:
+        return
+    try:
+        trace.event(name=name, level=level, status_message=message)
+    except Exception as e:
+        logger.debug(f"Failed to record trace event {name}: {e}")
 
 
+# Models and the same model served through OpenRouter
+OPENROUTER_EQUIVALENTS = {
+    "anthropic/claude-3-7-sonnet-latest": "openrouter/anthropic/claude-3.7-sonnet",
+    "anthropic/claude-sonnet-4-20250514": "openrouter/anthropic/claude-sonnet-4",
+    "xai/grok-4": "openrouter/x-ai/grok-4",
+    "gemini/gemini-2.5-pro": "openrouter/google/gemini-2.5-pro",
+}
+
 def get_openrouter_fallback(model_name: str) -> Optional[str]:
     """Get OpenRouter fallback model for a given model name."""
     # Skip if already using OpenRouter
@@ -100,12 +280,7 @@ def get_openrouter_fallback(model_name: str) -> Optional[str]:
         return None
     
     # Map models to their OpenRouter equivalents
-    fallback_mapping = {
-        "anthropic/claude-3-7-sonnet-latest": "openrouter/anthropic/claude-3.7-sonnet",
-        "anthropic/claude-sonnet-4-20250514": "openrouter/anthropic/claude-sonnet-4",
-        "xai/grok-4": "openrouter/x-ai/grok-4",
-        "gemini/gemini-2.5-pro": "openrouter/google/gemini-2.5-pro",
-    }
+    fallback_mapping = OPENROUTER_EQUIVALENTS
     
     # Check for exact match first
     if model_name in fallback_mapping:
@@ -140,31 +315,82 @@ def _configure_token_limits(params: Dict[str, Any], model_name: str, max_tokens:
     param_name = "max_completion_tokens" if (is_openai_o_series or is_openai_gpt5) else "max_tokens"
     params[param_name] = max_tokens
 
-def _apply_anthropic_caching(messages: List[Dict[str, Any]]) -> None:
-    """Apply Anthropic caching to the messages."""
+def _mark_cache_breakpoint(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Copy of a message with cache_control on its last block, or None if it has nothing to cache."""
+    content = message.get("content")
+    cache_control = {"type": "ephemeral"}
+
+    if isinstance(content, str):
+        if not content:
+            return None
+        if message.get("role") == "tool":
+            # LiteLLM reads message-level cache_control for tool results
+            return {**message, "cache_control": cache_control}
+        return {**message, "content": [{"type": "text", "text": content, "cache_control": cache_control}]}
+
+    if isinstance(content, list):
+        cacheable_types = ("text",) if message.get("role") == "assistant" else ("text", "image_url")
+        for i in range(len(content) - 1, -1, -1):
+            item = content[i]
+            # Empty text blocks are dropped before the request is sent
+            if isinstance(item, dict) and item.get("type") in cacheable_types and (item.get("type") != "text" or item.get("text")):
+                marked_content = list(content)
+                marked_content[i] = {**item, "cache_control": cache_control}
+                return {**message, "content": marked_content}
+    return None
+
+
+def _has_cache_breakpoint(message: Dict[str, Any]) -> bool:
+    content = message.get("content")
+    if "cache_control" in message:
+        return True
+    return isinstance(content, list) and any(isinstance(item, dict) and "cache_control" in item for item in content)
 
-    # Apply cache control to the first 4 text blocks across all messages
-    cache_control_count = 0
-    max_cache_control_blocks = 3
-    
-    for message in messages:
-        if cache_control_count >= max_cache_control_blocks:
-            break
-            
-        content = message.get("content")
-        
-        if isinstance(content, str):
-            message["content"] = [
-                {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
-            ]
-            cache_control_count += 1
-        elif isinstance(content, list):
-            for item in content:
-                if cache_control_count >= max_cache_control_blocks:
-                    break
-                if isinstance(item, dict) and item.get("type") == "text" and "cache_control" not in item:
-                    item["cache_control"] = {"type": "ephemeral"}
-                    cache_control_count += 1
+
+def _plan_cache_breakpoints(messages: List[Dict[str, Any]], budget: int) -> List[int]:
+    """Indices of the messages to place cache breakpoints on, oldest first.
+
+    Breakpoints go on the system prompt, on the latest message boundaries that
+    are multiples of CACHE_BREAKPOINT_STRIDE (a prefix that stays identical, and
+    cached, for several turns while the thread grows), and on the last message,
+    so that the next turn can read everything up to it from the cache.
+    """
+    if budget <= 0 or not messages:
+        return []
+    last = len(messages) - 1
+    has_system = messages[0].get("role") == "system"
+    stride_budget = max(0, budget - 1 - int(has_system))
+    boundaries = [i for i in range(CACHE_BREAKPOINT_STRIDE, last, CACHE_BREAKPOINT_STRIDE)]
+    candidates = ([0] if has_system else []) + (boundaries[-stride_budget:] if stride_budget else []) + [last]
+
+    planned: List[int] = []
+    for index in candidates:
+        # Move back to the nearest message with something to cache, after the previous breakpoint
+        floor = planned[-1] if planned else -1
+        while index > floor and _mark_cache_breakpoint(messages[index]) is None:
+            index -= 1
+        if index > floor:
+            planned.append(index)
+    return planned[:budget]
+
+
+def _apply_anthropic_caching(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the messages with rolling Anthropic prompt cache breakpoints.
+
+    Marked messages are copies, so the caller's message dicts (e.g. a system
+    prompt reused across runs) are left unchanged. Breakpoints already present
+    count towards the provider limit of MAX_CACHE_BREAKPOINTS.
+    """
+    messages = list(messages)
+    existing = sum(1 for message in messages if _has_cache_breakpoint(message))
+    planned = [
+        index for index in _plan_cache_breakpoints(messages, MAX_CACHE_BREAKPOINTS - existing)
+        if not _has_cache_breakpoint(messages[index])
+    ]
+    for index in planned:
+        messages[index] = _mark_cache_breakpoint(messages[index])
+    logger.debug(f"Cache breakpoints at messages {planned} of {len(messages)} ({existing} already set)")
+    return messages
 
 def _configure_anthopic(params: Dict[str, Any], model_name: str, messages: List[Dict[str, Any]]) -> None:
     """Configure Anthropic-specific parameters."""
@@ -175,7 +401,7 @@ def _configure_anthopic(params: Dict[str, Any], model_name: str, messages: List[
         "anthropic-beta": "output-128k-2025-02-19"
     }
     logger.debug("Added Anthropic-specific headers")
-    _apply_anthropic_caching(messages)
+    params["messages"] = _apply_anthropic_caching(messages)
 
 def _configure_openrouter(params: Dict[str, Any], model_name: str) -> None:
     """Configure OpenRouter-specific parameters."""
@@ -322,8 +548,6 @@ def prepare_params(
             raise LLMError(
                 "OPENAI_COMPATIBLE_API_KEY and OPENAI_COMPATIBLE_API_BASE is required for openai-compatible models. If just updated the environment variables,  wait a few minutes or restart the service to ensure they are loaded."
             )
-        
-        setup_provider_router(api_key, api_base)
 
     # Handle token limits
     _configure_token_limits(params, resolved_model_name, max_tokens)
@@ -336,7 +560,7 @@ def prepare_params(
     # Add Bedrock-specific parameters
     _configure_bedrock(params, resolved_model_name, model_id)
     
-    _add_fallback_model(params, resolved_model_name, messages)
+    _add_fallback_model(params, resolved_model_name, params["messages"])
     # Add OpenAI GPT-5 specific parameters
     _configure_openai_gpt5(params, resolved_model_name)
     # Add Kimi K2-specific parameters
@@ -345,6 +569,157 @@ def prepare_params(
 
     return params
 
+async def _acompletion(params: Dict[str, Any], model_name: str, api_key: Optional[str], api_base: Optional[str]):
+    """Make the call through the provider router for the call's credentials."""
+    _use_pooled_http_client()
+    # Only openai-compatible models need a router for their own credentials
+    if model_name.startswith("openai-compatible/"):
+        router = get_provider_router(api_key, api_base)
+        stats = _provider_router_stats[_provider_router_key(api_key, api_base)]
+    else:
+        router = get_provider_router()
+        stats = _provider_router_stats[_provider_router_key(None, None)]
+    stats.calls += 1
+    try:
+        return await router.acompletion(**params)
+    except Exception:
+        stats.errors += 1
+        _model_health[params["model"]].record_outcome(error=True)
+        raise
+
+
+async def _observe_stream(stream: AsyncIterator, model: str, started: float) -> AsyncGenerator:
+    """Pass a response stream through, recording its time to first token and errors."""
+    health = _model_health[model]
+    received_first = False
+    try:
+        async for chunk in stream:
+            if not received_first:
+                received_first = True
+                ttft = time.monotonic() - started
+                health.record_ttft(ttft * 1000)
+                LLM_TIME_TO_FIRST_TOKEN.labels(model=model).observe(ttft)
+                health.record_outcome(error=False)
+            yield chunk
+    except Exception:
+        health.record_outcome(error=True)
+        raise
+
+
+async def _close_stream(iterator: AsyncIterator) -> None:
+    """Close an abandoned LiteLLM stream so its HTTP connection goes back to the pool.
+
+    LiteLLM's stream wrapper has no ``aclose``; the provider stream it wraps is
+    an OpenAI SDK stream (``close``, ``response``) or a response iterator over
+    the HTTP response's lines (``streaming_response``).
+    """
+    completion_stream = getattr(iterator, "completion_stream", None)
+    for target in (
+        iterator,
+        completion_stream,
+        getattr(completion_stream, "response", None),
+        getattr(completion_stream, "streaming_response", None),
+    ):
+        close = getattr(target, "aclose", None) or getattr(target, "close", None)
+        if close is None or not asyncio.iscoroutinefunction(close):
+            continue
+        try:
+            await close()
+        except Exception as e:
+            logger.debug(f"Failed to close abandoned LLM stream: {e}")
+
+
+async def _open_stream(params: Dict[str, Any], model_name: str, api_key: Optional[str], api_base: Optional[str]):
+    """Start a streaming call and wait for its first chunk.
+
+    Returns:
+        (stream iterator, first chunk or None, time the call was started)
+    """
+    started = time.monotonic()
+    stream = await _acompletion(params, model_name, api_key, api_base)
+    iterator = stream.__aiter__()
+    try:
+        first_chunk = await iterator.__anext__()
+    except StopAsyncIteration:
+        first_chunk = None
+    except asyncio.CancelledError:
+        # Lost a hedge while waiting for its first chunk
+        await _close_stream(iterator)
+        raise
+    except Exception:
+        _model_health[params["model"]].record_outcome(error=True)
+        raise
+    return iterator, first_chunk, started
+
+
+async def _resume_stream(iterator: AsyncIterator, first_chunk: Any, model: str) -> AsyncGenerator:
+    if first_chunk is not None:
+        yield first_chunk
+    try:
+        async for chunk in iterator:
+            yield chunk
+    except Exception:
+        _model_health[model].record_outcome(error=True)
+        raise
+
+
+async def _hedged_stream(
+    params: Dict[str, Any],
+    hedge_params: Dict[str, Any],
+    model_name: str,
+    api_key: Optional[str],
+    api_base: Optional[str],
+    trace: Optional[ExportedTrace],
+) -> AsyncGenerator:
+    """Start a streaming call, and a second one on the equivalent endpoint if the
+    first has not produced a token within LLM_HEDGE_TTFT_MS.
+
+    The stream that produces its first chunk first is returned; the other call is
+    cancelled. Raises the first call's error if both fail.
+    """
+    primary_model, hedge_model = params["model"], hedge_params["model"]
+    primary = asyncio.create_task(_open_stream(params, model_name, api_key, api_base))
+    started = {primary: time.monotonic()}
+    models = {primary: primary_model}
+    done, _ = await asyncio.wait({primary}, timeout=config.LLM_HEDGE_TTFT_MS / 1000)
+
+    winner = primary if primary in done and primary.exception() is None else None
+    if winner is None:
+        reason = "failed" if primary in done else f"no token after {config.LLM_HEDGE_TTFT_MS}ms"
+        logger.info(f"Hedging {primary_model} with {hedge_model}: {reason}")
+        _trace_event(trace, "llm_hedge_started", f"{primary_model} {reason}; started {hedge_model}")
+        hedge = asyncio.create_task(_open_stream(hedge_params, hedge_model, api_key, api_base))
+        started[hedge] = time.monotonic()
+        models[hedge] = hedge_model
+        pending = {hedge} if primary in done else {primary, hedge}
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            successful = [task for task in done if task.exception() is None]
+            winner = successful[0] if successful else None
+
+        for task in pending:
+            task.cancel()
+            # A cancelled call took at least this long to produce a token
+            _model_health[models[task]].record_ttft((time.monotonic() - started[task]) * 1000)
+        # Cancelled calls close their stream before they finish
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done | pending:
+            if task is not winner and not task.cancelled() and task.exception() is None:
+                await _close_stream(task.result()[0])
+        if winner is None:
+            _trace_event(trace, "llm_hedge_result", f"both {primary_model} and {hedge_model} failed", level="ERROR")
+            raise primary.exception()
+        _trace_event(trace, "llm_hedge_result", f"{models[winner]} produced the first token")
+
+    iterator, first_chunk, call_started = winner.result()
+    model = models[winner]
+    ttft = time.monotonic() - call_started
+    _model_health[model].record_ttft(ttft * 1000)
+    LLM_TIME_TO_FIRST_TOKEN.labels(model=model).observe(ttft)
+    _model_health[model].record_outcome(error=False)
+    return _resume_stream(iterator, first_chunk, model)
+
+
 async def make_llm_api_call(
     messages: List[Dict[str, Any]],
     model_name: str,
@@ -360,6 +735,7 @@ async def make_llm_api_call(
     model_id: Optional[str] = None,
     enable_thinking: Optional[bool] = False,
     reasoning_effort: Optional[str] = "low",
+    trace: Optional[ExportedTrace] = None,
 ) -> Union[Dict[str, Any], AsyncGenerator, ModelResponse]:
     """
     Make an API call to a language model using LiteLLM.
@@ -379,6 +755,11 @@ async def make_llm_api_call(
         model_id: Optional ARN for Bedrock inference profiles
         enable_thinking: Whether to enable thinking
         reasoning_effort: Level of reasoning effort
+        trace: Optional trace to record routing and hedging decisions on
+
+    The call goes to the healthiest of the model and its OpenRouter equivalent
+    (see _route_model). With LLM_HEDGE_ENABLED, streaming calls are hedged on
+    the equivalent endpoint when the first token is late.
 
     Returns:
         Union[Dict[str, Any], AsyncGenerator]: API response or stream
@@ -389,26 +770,52 @@ async def make_llm_api_call(
     """
     # debug <timestamp>.json messages
     logger.debug(f"Making LLM API call to model: {model_name} (Thinking: {enable_thinking}, Effort: {reasoning_effort})")
-    logger.debug(f"📡 API Call: Using model {model_name}")
-    params = prepare_params(
-        messages=messages,
-        model_name=model_name,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        response_format=response_format,
-        tools=tools,
-        tool_choice=tool_choice,
-        api_key=api_key,
-        api_base=api_base,
-        stream=stream,
-        top_p=top_p,
-        model_id=model_id,
-        enable_thinking=enable_thinking,
-        reasoning_effort=reasoning_effort,
-    )
+    from models import model_manager
+    requested_model = model_manager.resolve_model_id(model_name)
+    routed_model, alternative, reason = _route_model(requested_model)
+    if routed_model != requested_model:
+        logger.info(f"Routing {requested_model} to {routed_model}: {reason}")
+    _trace_event(trace, "llm_route", f"{requested_model} -> {routed_model} ({reason})")
+    logger.debug(f"📡 API Call: Using model {routed_model}")
+
+    def build_params(target_model: str) -> Dict[str, Any]:
+        return prepare_params(
+            messages=messages,
+            # The requested name keeps its openai-compatible/ prefix handling
+            model_name=model_name if target_model == requested_model else target_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            tools=tools,
+            tool_choice=tool_choice,
+            api_key=api_key,
+            api_base=api_base,
+            stream=stream,
+            top_p=top_p,
+            model_id=model_id,
+            enable_thinking=enable_thinking,
+            reasoning_effort=reasoning_effort,
+        )
+
+    params = build_params(routed_model)
+    if routed_model != requested_model:
+        # Fall back to the requested endpoint if the one routed to fails
+        params["fallbacks"] = [{"model": requested_model, "messages": params["messages"]}]
     try:
-        response = await provider_router.acompletion(**params)
-        logger.debug(f"Successfully received API response from {model_name}")
+        if stream and alternative and config.LLM_HEDGE_ENABLED:
+            hedge_params = build_params(alternative if routed_model == requested_model else requested_model)
+            # The hedge is the other endpoint; neither call falls back onto it
+            params.pop("fallbacks", None)
+            hedge_params.pop("fallbacks", None)
+            response = await _hedged_stream(params, hedge_params, model_name, api_key, api_base, trace)
+        else:
+            started = time.monotonic()
+            response = await _acompletion(params, model_name, api_key, api_base)
+            if stream:
+                response = _observe_stream(response, params["model"], started)
+            else:
+                _model_health[params["model"]].record_outcome(error=False)
+        logger.debug(f"Successfully received API response from {routed_model}")
         # logger.debug(f"Response: {response}")
         return response
 
@@ -418,4 +825,3 @@ async def make_llm_api_call(
 
 # Initialize API keys on module import
 setup_api_keys()
-setup_provider_router()
@@ -5,6 +5,7 @@ import asyncio
 from utils.logger import logger
 from typing import List, Any
 from utils.retry import retry
+from utils.metrics import REDIS_OPERATION_SECONDS, observe_seconds
 
 # Redis client and connection pool
 client: redis.Redis | None = None
@@ -144,7 +145,8 @@ async def delete(key: str):
 async def publish(channel: str, message: str):
     """Publish a message to a Redis channel."""
     redis_client = await get_client()
-    return await redis_client.publish(channel, message)
+    with observe_seconds(REDIS_OPERATION_SECONDS.labels(operation="publish")):
+        return await redis_client.publish(channel, message)
 
 
 async def create_pubsub():
@@ -157,7 +159,8 @@ async def create_pubsub():
 async def rpush(key: str, *values: Any):
     """Append one or more values to a list."""
     redis_client = await get_client()
-    return await redis_client.rpush(key, *values)
+    with observe_seconds(REDIS_OPERATION_SECONDS.labels(operation="rpush")):
+        return await redis_client.rpush(key, *values)
 
 
 async def lrange(key: str, start: int, end: int) -> List[str]:
@@ -0,0 +1,265 @@
+"""
+Bounded, batched export of Langfuse traces.
+
+Creating a Langfuse event or span validates and later serializes its whole
+payload, and the agent loop passes prompt message lists, tool outputs and XML
+content as input/output/metadata. TraceExporter wraps the Langfuse client with
+the subset of its API used here (trace, event, span, generation, update, end,
+flush) and keeps that work off the agent loop:
+
+- calls are recorded on a bounded in-memory queue and replayed against the
+  Langfuse client in batches by a background thread; when the queue is full,
+  calls are dropped and counted (utils.metrics.TRACE_EXPORT_DROPPED), as are
+  calls on a span or generation whose creation was dropped
+- payload fields are capped when the call is made: TRACE_FULL_PAYLOAD_PERCENT of
+  traces keep up to TRACE_PAYLOAD_MAX_CHARS per field, the others up to
+  TRACE_SAMPLED_OUT_PAYLOAD_MAX_CHARS; a trace's metadata records which it got
+- start and end times are taken when the call is made, not when it is exported
+
+Nothing is queued when Langfuse is disabled.
+
+Usage:
+    from services.langfuse import langfuse
+
+    trace = langfuse.trace(name="agent_run", session_id=thread_id)
+    trace.event(name="tool_started", level="DEFAULT", status_message="...")
+    span = trace.span(name="execute_tool.web_search", input=arguments)
+    span.end(output=result)
+    langfuse.flush()
+"""
+
+import atexit
+import dataclasses
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from utils.config import config
+from utils.logger import logger
+from utils.metrics import TRACE_EXPORT_DROPPED, TRACE_PAYLOADS_TRUNCATED
+
+# Keyword arguments holding user content, capped before they are queued
+PAYLOAD_FIELDS = ("input", "output", "metadata", "status_message", "model_parameters")
+# Seconds shutdown waits for the queue to drain at interpreter exit
+SHUTDOWN_TIMEOUT_SECONDS = 5
+# Dropped calls are logged at most this often
+DROP_LOG_INTERVAL_SECONDS = 60
+
+
+def _cap(value: Any, budget: List[int], truncated: List[bool]) -> Any:
+    """Copy value, keeping at most budget[0] characters of content.
+
+    Walks containers only until the budget is spent, so capping a large payload
+    costs time proportional to the cap, not to the payload.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        budget[0] -= 8
+        return value
+    if isinstance(value, str):
+        if len(value) <= budget[0]:
+            budget[0] -= len(value)
+            return value
+        kept = max(budget[0], 0)
+        budget[0] = 0
+        truncated[0] = True
+        return f"{value[:kept]}...[{len(value) - kept} chars truncated]"
+    if isinstance(value, dict):
+        capped = {}
+        for index, (key, item) in enumerate(value.items()):
+            if budget[0] <= 0:
+                truncated[0] = True
+                capped["..."] = f"[{len(value) - index} keys truncated]"
+                break
+            budget[0] -= len(str(key))
+            capped[key] = _cap(item, budget, truncated)
+        return capped
+    if isinstance(value, (list, tuple)):
+        capped = []
+        for index, item in enumerate(value):
+            if budget[0] <= 0:
+                truncated[0] = True
+                capped.append(f"...[{len(value) - index} items truncated]")
+                break
+            capped.append(_cap(item, budget, truncated))
+        return capped
+    if isinstance(value, datetime):
+        return value
+    if hasattr(value, "model_dump"):
+        return _cap(value.model_dump(), budget, truncated)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _cap(dataclasses.asdict(value), budget, truncated)
+    return _cap(str(value), budget, truncated)
+
+
+def cap_payload(value: Any, max_chars: int) -> Tuple[Any, bool]:
+    """Copy of a trace payload with at most max_chars characters of content.
+
+    Returns:
+        (capped payload, whether anything was cut)
+    """
+    truncated = [False]
+    return _cap(value, [max_chars], truncated), truncated[0]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class _Handle:
+    def __init__(self, exporter: "TraceExporter", full_payloads: bool):
+        self._exporter = exporter
+        self._full_payloads = full_payloads
+        # The Langfuse client object, set by the export thread once created
+        self._client = None
+
+    def _create(self, method: str, kwargs: Dict[str, Any]) -> "ExportedObservation":
+        kwargs.setdefault("start_time", _now())
+        child = ExportedObservation(self._exporter, self._full_payloads)
+        self._exporter._enqueue(self, method, kwargs, child)
+        return child
+
+    def event(self, **kwargs) -> "ExportedObservation":
+        return self._create("event", kwargs)
+
+    def span(self, **kwargs) -> "ExportedObservation":
+        return self._create("span", kwargs)
+
+    def generation(self, **kwargs) -> "ExportedObservation":
+        return self._create("generation", kwargs)
+
+    def update(self, **kwargs) -> None:
+        self._exporter._enqueue(self, "update", kwargs)
+
+
+class ExportedTrace(_Handle):
+    """Handle of a trace whose creation may still be queued."""
+
+
+class ExportedObservation(_Handle):
+    """Handle of a span, generation or event whose creation may still be queued."""
+
+    def end(self, **kwargs) -> None:
+        kwargs.setdefault("end_time", _now())
+        self._exporter._enqueue(self, "end", kwargs)
+
+
+# (object the call is made on, method name, keyword arguments, handle of the created object)
+_QueuedCall = Tuple[Optional[_Handle], str, Dict[str, Any], Optional[_Handle]]
+
+
+class TraceExporter:
+    def __init__(self, client, enabled: bool):
+        self.client = client
+        self.enabled = enabled
+        self._queue: Deque[_QueuedCall] = deque()
+        self._condition = threading.Condition()
+        self._exporting = False
+        self._draining = 0
+        self._thread: Optional[threading.Thread] = None
+        self._last_drop_log = 0.0
+
+    def trace(self, **kwargs) -> ExportedTrace:
+        """Start a trace; it keeps full payloads with TRACE_FULL_PAYLOAD_PERCENT probability."""
+        full_payloads = random.randrange(100) < config.TRACE_FULL_PAYLOAD_PERCENT
+        metadata = kwargs.get("metadata")
+        if metadata is None or isinstance(metadata, dict):
+            kwargs["metadata"] = {**(metadata or {}), "full_payloads": full_payloads}
+        kwargs.setdefault("timestamp", _now())
+        trace = ExportedTrace(self, full_payloads)
+        self._enqueue(None, "trace", kwargs, trace)
+        return trace
+
+    def _enqueue(
+        self,
+        target: Optional[_Handle],
+        method: str,
+        kwargs: Dict[str, Any],
+        result: Optional[_Handle] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        full_payloads = result._full_payloads if target is None else target._full_payloads
+        max_chars = config.TRACE_PAYLOAD_MAX_CHARS if full_payloads else config.TRACE_SAMPLED_OUT_PAYLOAD_MAX_CHARS
+        for field in PAYLOAD_FIELDS:
+            if kwargs.get(field) is not None:
+                kwargs[field], truncated = cap_payload(kwargs[field], max_chars)
+                if truncated:
+                    TRACE_PAYLOADS_TRUNCATED.inc()
+
+        with self._condition:
+            if len(self._queue) >= config.TRACE_EXPORT_QUEUE_SIZE:
+                self._dropped("queue_full")
+                return
+            self._queue.append((target, method, kwargs, result))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+            if len(self._queue) >= config.TRACE_EXPORT_BATCH_SIZE:
+                self._condition.notify_all()
+
+    def _dropped(self, reason: str) -> None:
+        TRACE_EXPORT_DROPPED.labels(reason=reason).inc()
+        now = time.monotonic()
+        if now - self._last_drop_log >= DROP_LOG_INTERVAL_SECONDS:
+            self._last_drop_log = now
+            logger.warning(f"Dropping trace calls ({reason}); see the trace_export_dropped metric")
+
+    def _export(self, call: _QueuedCall) -> None:
+        target, method, kwargs, result = call
+        parent = self.client if target is None else target._client
+        if parent is None:
+            # Its trace, span or generation was never created
+            self._dropped("parent_dropped")
+            return
+        try:
+            created = getattr(parent, method)(**kwargs)
+        except Exception as e:
+            logger.debug(f"Trace call {method} failed: {e}")
+            self._dropped("error")
+            return
+        if result is not None:
+            result._client = created
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._queue or (len(self._queue) < config.TRACE_EXPORT_BATCH_SIZE and not self._draining):
+                    self._condition.wait(config.TRACE_EXPORT_INTERVAL_MS / 1000)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), config.TRACE_EXPORT_BATCH_SIZE))]
+                self._exporting = bool(batch)
+            for call in batch:
+                self._export(call)
+            with self._condition:
+                self._exporting = False
+                self._condition.notify_all()
+
+    def _drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued call has been handed to the Langfuse client."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._draining += 1
+            self._condition.notify_all()
+            try:
+                while self._queue or self._exporting:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._draining -= 1
+        return True
+
+    def flush(self) -> None:
+        """Export all queued calls and send them to Langfuse (blocking)."""
+        if self._thread is None:
+            return
+        self._drain()
+        self.client.flush()
+
+    def shutdown(self) -> None:
+        if self._thread is not None and not self._drain(SHUTDOWN_TIMEOUT_SECONDS):
+            logger.warning(f"Trace export queue not drained at shutdown; {len(self._queue)} calls lost")
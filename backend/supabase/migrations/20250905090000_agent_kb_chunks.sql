@@ -0,0 +1,78 @@
+BEGIN;
+
+-- Chunks of agent knowledge base entries used for query-time retrieval
+CREATE TABLE IF NOT EXISTS agent_knowledge_base_chunks (
+    chunk_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    entry_id UUID NOT NULL REFERENCES agent_knowledge_base_entries(entry_id) ON DELETE CASCADE,
+    agent_id UUID NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    token_count INTEGER NOT NULL DEFAULT 0,
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+
+    CONSTRAINT agent_kb_chunks_entry_index_unique UNIQUE (entry_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_agent_kb_chunks_agent_id ON agent_knowledge_base_chunks(agent_id);
+CREATE INDEX IF NOT EXISTS idx_agent_kb_chunks_entry_id ON agent_knowledge_base_chunks(entry_id);
+
+ALTER TABLE agent_knowledge_base_chunks ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY agent_kb_chunks_user_access ON agent_knowledge_base_chunks
+    FOR ALL
+    USING (
+        EXISTS (
+            SELECT 1 FROM agents a
+            WHERE a.agent_id = agent_knowledge_base_chunks.agent_id
+            AND basejump.has_role_on_account(a.account_id) = true
+        )
+    );
+
+-- Chunks of every active prompt-eligible entry of an agent. Entries that have not
+-- been chunked yet (created before chunking existed) are returned once with a NULL
+-- chunk_id and their full content so the caller can chunk them lazily.
+CREATE OR REPLACE FUNCTION get_agent_kb_chunks(
+    p_agent_id UUID
+)
+RETURNS TABLE (
+    chunk_id UUID,
+    entry_id UUID,
+    entry_name VARCHAR(255),
+    entry_description TEXT,
+    chunk_index INTEGER,
+    content TEXT,
+    token_count INTEGER,
+    entry_created_at TIMESTAMPTZ
+)
+SECURITY DEFINER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        c.chunk_id,
+        e.entry_id,
+        e.name,
+        e.description,
+        COALESCE(c.chunk_index, 0),
+        COALESCE(c.content, e.content),
+        COALESCE(c.token_count, LENGTH(e.content) / 4),
+        e.created_at
+    FROM agent_knowledge_base_entries e
+    LEFT JOIN agent_knowledge_base_chunks c ON c.entry_id = e.entry_id
+    WHERE e.agent_id = p_agent_id
+    AND e.is_active = TRUE
+    AND e.usage_context IN ('always', 'contextual')
+    ORDER BY e.created_at DESC, c.chunk_index;
+END;
+$$;
+
+GRANT ALL PRIVILEGES ON TABLE agent_knowledge_base_chunks TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION get_agent_kb_chunks TO authenticated, service_role;
+
+COMMENT ON TABLE agent_knowledge_base_chunks IS 'Retrieval chunks of agent knowledge base entries';
+COMMENT ON FUNCTION get_agent_kb_chunks IS 'Returns retrieval chunks (or unchunked entries) of an agent knowledge base';
+
+COMMIT;
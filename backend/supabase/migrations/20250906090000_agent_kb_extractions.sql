@@ -0,0 +1,80 @@
+BEGIN;
+
+-- Extracted text of uploaded knowledge base files, keyed by the sha256 of the raw
+-- bytes and shared by every agent of an account
+CREATE TABLE IF NOT EXISTS agent_kb_extractions (
+    account_id UUID NOT NULL REFERENCES basejump.accounts(id) ON DELETE CASCADE,
+    content_hash VARCHAR(64) NOT NULL,
+
+    content TEXT NOT NULL,
+    mime_type VARCHAR(255),
+    extraction_method VARCHAR(50),
+    file_size BIGINT,
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+
+    PRIMARY KEY (account_id, content_hash)
+);
+
+ALTER TABLE agent_kb_extractions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY agent_kb_extractions_user_access ON agent_kb_extractions
+    FOR ALL
+    USING (basejump.has_role_on_account(account_id) = true);
+
+ALTER TABLE agent_knowledge_base_entries ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_agent_kb_entries_account_content_hash
+    ON agent_knowledge_base_entries(account_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+
+-- Give the given entries the chunks of an already chunked entry with the same
+-- content hash in the same account. Returns the entries that received chunks;
+-- the rest still have to be chunked by the caller.
+CREATE OR REPLACE FUNCTION copy_agent_kb_chunks(
+    p_entry_ids UUID[]
+)
+RETURNS TABLE (
+    copied_entry_id UUID
+)
+SECURITY DEFINER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH sources AS (
+        SELECT DISTINCT ON (t.entry_id)
+            t.entry_id AS target_id,
+            t.agent_id AS target_agent_id,
+            s.entry_id AS source_id
+        FROM agent_knowledge_base_entries t
+        JOIN agent_knowledge_base_entries s
+            ON s.account_id = t.account_id
+            AND s.content_hash = t.content_hash
+            AND s.entry_id <> ALL(p_entry_ids)
+        WHERE t.entry_id = ANY(p_entry_ids)
+        AND t.content_hash IS NOT NULL
+        AND EXISTS (
+            SELECT 1 FROM agent_knowledge_base_chunks c WHERE c.entry_id = s.entry_id
+        )
+        ORDER BY t.entry_id, s.created_at DESC
+    ),
+    copied AS (
+        INSERT INTO agent_knowledge_base_chunks (entry_id, agent_id, chunk_index, content, token_count)
+        SELECT src.target_id, src.target_agent_id, c.chunk_index, c.content, c.token_count
+        FROM sources src
+        JOIN agent_knowledge_base_chunks c ON c.entry_id = src.source_id
+        ON CONFLICT (entry_id, chunk_index) DO NOTHING
+    )
+    SELECT src.target_id FROM sources src;
+END;
+$$;
+
+GRANT ALL PRIVILEGES ON TABLE agent_kb_extractions TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION copy_agent_kb_chunks TO authenticated, service_role;
+
+COMMENT ON TABLE agent_kb_extractions IS 'Content-addressed extracted text of knowledge base files, shared within an account';
+COMMENT ON COLUMN agent_knowledge_base_entries.content_hash IS 'sha256 of the raw file the entry was extracted from';
+COMMENT ON FUNCTION copy_agent_kb_chunks IS 'Reuses the chunks of identical entries in the same account';
+
+COMMIT;
@@ -0,0 +1,14 @@
+BEGIN;
+
+-- Uploads waiting to be processed by the knowledge base worker
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('kb-uploads', 'kb-uploads', false)
+ON CONFLICT (id) DO NOTHING;
+
+-- Container entry of an archive job, so a redelivered job resumes instead of starting over
+ALTER TABLE agent_kb_file_processing_jobs
+    ADD COLUMN IF NOT EXISTS container_entry_id UUID REFERENCES agent_knowledge_base_entries(entry_id) ON DELETE SET NULL;
+
+COMMENT ON COLUMN agent_kb_file_processing_jobs.container_entry_id IS 'ZIP container entry created by the job, used to resume partial processing';
+
+COMMIT;
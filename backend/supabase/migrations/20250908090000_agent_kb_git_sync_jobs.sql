@@ -0,0 +1,11 @@
+BEGIN;
+
+-- Incremental syncs of git repository entries run as knowledge base jobs
+ALTER TABLE agent_kb_file_processing_jobs
+    DROP CONSTRAINT IF EXISTS agent_kb_file_processing_jobs_job_type_check;
+
+ALTER TABLE agent_kb_file_processing_jobs
+    ADD CONSTRAINT agent_kb_file_processing_jobs_job_type_check
+    CHECK (job_type IN ('file_upload', 'zip_extraction', 'git_clone', 'git_sync'));
+
+COMMIT;
@@ -310,11 +310,26 @@ class Configuration:
     SANDBOX_IMAGE_NAME = "kortix/suna:0.1.3.12"
     SANDBOX_SNAPSHOT_NAME = "kortix/suna:0.1.3.12"
     SANDBOX_ENTRYPOINT = "/usr/bin/supervisord -n -c /etc/supervisor/conf.d/supervisord.conf"
+    # Call in-sandbox HTTP services through their preview links instead of curl via exec
+    SANDBOX_DIRECT_HTTP: bool = True
+
+    # Latency-aware routing between equivalent LLM endpoints and hedged streaming calls (services/llm.py)
+    LLM_LATENCY_ROUTING: bool = True
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_TTFT_MS: int = 10000
 
     # LangFuse configuration
     LANGFUSE_PUBLIC_KEY: Optional[str] = None
     LANGFUSE_SECRET_KEY: Optional[str] = None
     LANGFUSE_HOST: str = "https://cloud.langfuse.com"
+    # Trace export (services/trace_export.py): traces that keep payloads up to
+    # TRACE_PAYLOAD_MAX_CHARS; the others are capped at TRACE_SAMPLED_OUT_PAYLOAD_MAX_CHARS
+    TRACE_FULL_PAYLOAD_PERCENT: int = 10
+    TRACE_PAYLOAD_MAX_CHARS: int = 100000
+    TRACE_SAMPLED_OUT_PAYLOAD_MAX_CHARS: int = 2000
+    TRACE_EXPORT_QUEUE_SIZE: int = 10000
+    TRACE_EXPORT_BATCH_SIZE: int = 100
+    TRACE_EXPORT_INTERVAL_MS: int = 500
 
     # Admin API key for server-side operations
     KORTIX_ADMIN_API_KEY: Optional[str] = None
@@ -323,6 +338,28 @@ class Configuration:
     API_KEY_SECRET: str = "default-secret-key-change-in-production"
     API_KEY_LAST_USED_THROTTLE_SECONDS: int = 900
     
+    # Worker pools for blocking and CPU-bound work (utils/offload.py)
+    BLOCKING_POOL_WORKERS: int = 16
+    CPU_POOL_WORKERS: int = 2
+    LOOP_LAG_THRESHOLD_MS: int = 250
+    
+    # Prometheus scrape ports of the agent worker and the API (utils/metrics.py); 0 disables.
+    # Not exposed publicly; only the internal network's scraper should reach them.
+    WORKER_METRICS_PORT: int = 9464
+    API_METRICS_PORT: int = 9465
+    
+    # Agent knowledge base retrieval (knowledge_base/retrieval.py)
+    KB_CONTEXT_MAX_TOKENS: int = 4000
+    KB_CHUNK_TOKENS: int = 400
+    KB_CHUNK_OVERLAP_TOKENS: int = 50
+    KB_EMBEDDING_MODEL: Optional[str] = None
+    # Files of a ZIP or git source extracted concurrently (knowledge_base/file_processor.py)
+    KB_INGEST_CONCURRENCY: int = 8
+    # Knowledge base processing jobs (knowledge_base/jobs.py)
+    KB_JOB_MAX_ATTEMPTS: int = 3
+    KB_JOBS_PER_ACCOUNT: int = 2
+    KB_SMALL_FILE_BYTES: int = 5 * 1024 * 1024
+    
     # Agent execution limits (can be overridden via environment variable)
     _MAX_PARALLEL_AGENT_RUNS_ENV: Optional[str] = None
     
@@ -0,0 +1,139 @@
+"""
+Prometheus metrics for the API and the agent worker.
+
+Latency histograms for the parts of an agent run that time goes into:
+
+- ``LLM_TIME_TO_FIRST_TOKEN``: from starting an LLM call to its first streamed chunk
+- ``LLM_INTER_CHUNK_SECONDS``: gap between consecutive streamed chunks
+- ``LLM_TOKENS_PER_SECOND``: completion tokens over the streaming time of a response
+- ``TOOL_EXECUTION_SECONDS`` / ``TOOL_QUEUE_SECONDS``: tool run time by function
+  name, and time spent waiting for a resource class slot
+- ``REDIS_OPERATION_SECONDS``: Redis publish/rpush latency
+- ``DB_INSERT_SECONDS``: database insert latency by table
+
+and counters of trace calls the trace exporter dropped or truncated
+(``TRACE_EXPORT_DROPPED``, ``TRACE_PAYLOADS_TRUNCATED``).
+
+They are not served by the public API: the API and the worker each start a
+scrape server on a separate port (API_METRICS_PORT, WORKER_METRICS_PORT) that
+only the internal network should reach. Both run several processes (gunicorn
+workers, dramatiq processes). Set PROMETHEUS_MULTIPROC_DIR to a shared, empty directory to
+aggregate the metrics of all processes; otherwise each endpoint only reports
+the process that serves it.
+
+Usage:
+    from utils.metrics import LLM_TIME_TO_FIRST_TOKEN, DB_INSERT_SECONDS, observe_seconds
+
+    LLM_TIME_TO_FIRST_TOKEN.labels(model=model).observe(seconds)
+
+    with observe_seconds(DB_INSERT_SECONDS.labels(table="messages")):
+        await client.table("messages").insert(data).execute()
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+    start_http_server,
+)
+
+from utils.config import config
+from utils.logger import logger
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting an LLM call to its first streamed chunk",
+    ["model"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+LLM_INTER_CHUNK_SECONDS = Histogram(
+    "llm_inter_chunk_seconds",
+    "Gap between consecutive chunks of a streamed LLM response",
+    ["model"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "llm_tokens_per_second",
+    "Completion tokens per second of a streamed LLM response",
+    ["model"],
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300),
+)
+TOOL_EXECUTION_SECONDS = Histogram(
+    "tool_execution_seconds",
+    "Tool call execution time",
+    ["function_name"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+TOOL_QUEUE_SECONDS = Histogram(
+    "tool_queue_seconds",
+    "Time a tool call waited for conflicting calls and its resource class limit",
+    ["resource_class"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+REDIS_OPERATION_SECONDS = Histogram(
+    "redis_operation_seconds",
+    "Latency of Redis operations that stream agent responses",
+    ["operation"],
+)
+DB_INSERT_SECONDS = Histogram(
+    "db_insert_seconds",
+    "Latency of database inserts",
+    ["table"],
+)
+TRACE_EXPORT_DROPPED = Counter(
+    "trace_export_dropped",
+    "Trace calls that were not exported",
+    ["reason"],
+)
+TRACE_PAYLOADS_TRUNCATED = Counter(
+    "trace_payloads_truncated",
+    "Trace payload fields cut to the payload size cap",
+)
+
+_server_attempted = False
+
+
+@contextmanager
+def observe_seconds(histogram: Histogram) -> Iterator[None]:
+    """Observe the duration of the block (also when it raises) in a labeled histogram."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        histogram.observe(time.monotonic() - started)
+
+
+def _registry() -> CollectorRegistry:
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def start_metrics_server(port: int = None) -> bool:
+    """Serve /metrics on a port (WORKER_METRICS_PORT by default; 0 disables).
+
+    Only one process can bind the port; returns False in the others, which
+    report through the process that did when PROMETHEUS_MULTIPROC_DIR is set.
+    Starting is only attempted once per process.
+    """
+    global _server_attempted
+    port = config.WORKER_METRICS_PORT if port is None else port
+    if not port or _server_attempted:
+        return False
+    _server_attempted = True
+    try:
+        start_http_server(port, registry=_registry())
+    except OSError as e:
+        logger.debug(f"Metrics server not started on port {port}: {e}")
+        return False
+    logger.info(f"Serving metrics on port {port}")
+    return True
@@ -0,0 +1,208 @@
+"""
+Worker pools for blocking and CPU-bound work, and an event loop lag monitor.
+
+Agent runs share one event loop per worker process, so a single synchronous
+call (a PIL resize, an openpyxl load, PDF text extraction) stalls every other
+run on that worker. This module provides:
+
+- ``run_blocking``: run a sync callable in a shared thread pool (blocking I/O,
+  C extensions that release the GIL, libraries without async APIs)
+- ``run_cpu_bound``: run a picklable module-level callable in a shared process
+  pool (pure-Python CPU-heavy transforms), falling back to the thread pool when
+  the process pool is unavailable
+- ``blocking``: decorator turning a sync method into an awaitable that runs in
+  the thread pool
+- ``LoopLagMonitor``: measures event loop lag and, when the loop is blocked
+  longer than a threshold, logs the stack of the code holding it
+
+Usage:
+    from utils.offload import blocking, run_cpu_bound
+
+    class MyTool(Tool):
+        @blocking
+        def _parse(self, data: bytes) -> dict:
+            ...
+
+    result = await run_cpu_bound(module_level_transform, payload)
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import pickle
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from utils.config import config
+from utils.logger import logger
+
+T = TypeVar("T")
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=config.BLOCKING_POOL_WORKERS,
+                thread_name_prefix="blocking",
+            )
+        return _thread_pool
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # Never fork a process that already runs threads (event loop, pools, SDK clients)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _process_pool = ProcessPoolExecutor(max_workers=config.CPU_POOL_WORKERS, mp_context=context)
+        return _process_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    with _pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous callable in the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu_bound(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-heavy callable in the shared process pool.
+
+    ``fn`` and its arguments must be picklable, so use module-level functions or
+    static methods rather than bound methods of tools. If the pool is broken or
+    the call cannot be pickled, it runs in the thread pool instead.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_process_pool(), functools.partial(fn, *args, **kwargs))
+    except BrokenProcessPool as e:
+        logger.warning(f"Process pool broken while running {getattr(fn, '__qualname__', fn)}, recreating: {e}")
+        _reset_process_pool()
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        # Only serialization failures fall back; errors raised by fn itself propagate
+        if "pickle" not in str(e):
+            raise
+        logger.warning(f"Cannot run {getattr(fn, '__qualname__', fn)} in a process: {e}")
+    return await run_blocking(fn, *args, **kwargs)
+
+
+def blocking(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Decorator that makes a synchronous function or method awaitable by running it in the thread pool."""
+    if asyncio.iscoroutinefunction(func):
+        raise TypeError(f"@blocking expects a synchronous function, got coroutine function {func.__qualname__}")
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+
+    return wrapper
+
+
+def shutdown_pools():
+    """Shut down the shared pools without waiting for queued work."""
+    global _thread_pool
+    with _pool_lock:
+        thread_pool, _thread_pool = _thread_pool, None
+    if thread_pool is not None:
+        thread_pool.shutdown(wait=False, cancel_futures=True)
+    _reset_process_pool()
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and reports what blocked the loop.
+
+    A heartbeat task on the loop records a timestamp every ``interval`` seconds.
+    A watchdog thread checks the heartbeat; when it is older than the threshold
+    the loop is stuck in synchronous code, so the watchdog logs the loop thread's
+    current stack once per stall. The heartbeat also measures how late each
+    wake-up was, which is the lag every other coroutine experienced.
+    """
+
+    def __init__(self, threshold_ms: Optional[int] = None, interval: float = 0.1):
+        self.threshold = (threshold_ms if threshold_ms is not None else config.LOOP_LAG_THRESHOLD_MS) / 1000
+        self.interval = interval
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._reported_beat: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"max_lag_ms": round(self.max_lag_ms, 1), "stalls": self.stalls}
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, name="loop-lag-monitor", daemon=True).start()
+        logger.debug(f"Event loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.monotonic() - self._last_beat - self.interval) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def _watchdog(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=12)) if frame else "<unavailable>"
+            logger.warning(f"Event loop blocked for over {blocked * 1000:.0f}ms by:\n{stack}")
+
+
+_monitors: Dict[int, LoopLagMonitor] = {}
+
+
+def start_loop_lag_monitor(threshold_ms: Optional[int] = None) -> LoopLagMonitor:
+    """Start (once per event loop) a lag monitor for the running loop."""
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(id(loop))
+    if monitor is None:
+        monitor = _monitors[id(loop)] = LoopLagMonitor(threshold_ms)
+        monitor.start()
+    return monitor
+
+
+def stop_loop_lag_monitor():
+    """Stop the lag monitor of the running loop, if any."""
+    monitor = _monitors.pop(id(asyncio.get_running_loop()), None)
+    if monitor is not None:
+        monitor.stop()